@@ -0,0 +1,178 @@
+"""Controle de acesso do dashboard: credenciais por INEP e limite de tentativas.
+
+A tabela de credenciais é montada uma vez por versão dos dados (junto com o
+snapshot de recarga.py) como um dicionário INEP -> Credencial, com o nome da
+escola e o perfil; o login vira uma consulta ao dicionário em vez de varrer
+senhas_acesso.xlsx e bd_dados.xlsx.
+
+- Perfis: os INEPs de administrador vêm da variável de ambiente
+  RESULTADOS_INEPS_ADMIN (separados por vírgula) e da coluna opcional PERFIL
+  ('ADMIN') de senhas_acesso.xlsx. Sem nenhum dos dois vale INEPS_ADMIN_PADRAO.
+- Códigos de acesso: se senhas_acesso.xlsx tiver a coluna HASH_CODIGO preenchida
+  para um INEP, o login desse INEP exige o código correspondente. O hash é
+  PBKDF2-SHA256 com sal e é gerado com `python acesso.py --gerar-hash`; o código
+  do administrador vai na variável RESULTADOS_HASH_ADMIN.
+- Limite de tentativas: após MAX_FALHAS falhas de um INEP dentro de JANELA_FALHAS
+  segundos, novas tentativas desse INEP são recusadas sem nem calcular o hash,
+  até a janela passar.
+
+Uso:
+
+    python Resultados_diagnosticas/acesso.py --gerar-hash
+"""
+import argparse
+import getpass
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import pandas as pd
+
+# Administrador usado quando nenhum outro é configurado (o antigo INEP_MESTRE)
+INEPS_ADMIN_PADRAO = ('2307650',)
+
+ITERACOES_PBKDF2 = 200_000
+
+MAX_FALHAS = 5
+JANELA_FALHAS = 300  # segundos
+
+PERFIL_ADMIN = 'ADMIN'
+PERFIL_ESCOLA = 'ESCOLA'
+
+Credencial = namedtuple('Credencial', ['inep', 'escola', 'perfil', 'hash_codigo'])
+
+
+def gerar_hash(codigo, iteracoes=ITERACOES_PBKDF2, sal=None):
+    """Hash do código de acesso no formato 'pbkdf2_sha256$iterações$sal$hash'."""
+    sal = os.urandom(16) if sal is None else sal
+    derivado = hashlib.pbkdf2_hmac('sha256', codigo.encode(), sal, iteracoes)
+    return f"pbkdf2_sha256${iteracoes}${sal.hex()}${derivado.hex()}"
+
+
+def verificar_codigo(codigo, hash_codigo):
+    """Confere o código com o hash gerado por `gerar_hash` (tempo constante)."""
+    try:
+        algoritmo, iteracoes, sal, esperado = hash_codigo.split('$')
+    except ValueError:
+        return False
+    if algoritmo != 'pbkdf2_sha256':
+        return False
+    derivado = hashlib.pbkdf2_hmac('sha256', codigo.encode(), bytes.fromhex(sal), int(iteracoes))
+    return hmac.compare_digest(derivado.hex(), esperado)
+
+
+def _texto(valor):
+    return None if pd.isna(valor) or not str(valor).strip() else str(valor).strip()
+
+
+def ineps_admin():
+    """INEPs de administrador configurados no ambiente."""
+    configurados = os.environ.get('RESULTADOS_INEPS_ADMIN', '')
+    return {inep.strip() for inep in configurados.split(',') if inep.strip()}
+
+
+def montar_credenciais(df_login, indice_dados, admins=None):
+    """Dicionário INEP -> Credencial a partir de senhas_acesso e do índice de bd_dados.
+
+    O nome da escola é o primeiro registrado para o INEP em bd_dados (None se o
+    INEP não tiver resultados, como antes).
+    """
+    admins = ineps_admin() if admins is None else set(admins)
+    perfis = df_login['PERFIL'] if 'PERFIL' in df_login.columns else pd.Series(None, index=df_login.index)
+    hashes = df_login['HASH_CODIGO'] if 'HASH_CODIGO' in df_login.columns else pd.Series(None, index=df_login.index)
+
+    credenciais = {}
+    for inep, perfil, hash_codigo in zip(df_login['INEP'], perfis, hashes):
+        perfil = (_texto(perfil) or PERFIL_ESCOLA).upper()
+        if perfil == PERFIL_ADMIN:
+            admins.add(inep)
+            continue
+        credenciais[inep] = Credencial(inep, indice_dados.primeiro('ESCOLA', INEP=inep), PERFIL_ESCOLA,
+                                       _texto(hash_codigo))
+
+    hash_admin = _texto(os.environ.get('RESULTADOS_HASH_ADMIN'))
+    for inep in admins or INEPS_ADMIN_PADRAO:
+        credenciais[inep] = Credencial(inep, 'TODAS', PERFIL_ADMIN, hash_admin)
+    return credenciais
+
+
+class LimiteTentativas:
+    """Conta as falhas de login por INEP numa janela deslizante (compartilhado entre sessões)."""
+
+    def __init__(self, max_falhas=MAX_FALHAS, janela=JANELA_FALHAS):
+        self.max_falhas = max_falhas
+        self.janela = janela
+        self._falhas = {}
+        self._lock = threading.Lock()
+
+    def _recentes(self, inep, agora):
+        falhas = self._falhas.get(inep)
+        while falhas and falhas[0] <= agora - self.janela:
+            falhas.popleft()
+        if falhas is not None and not falhas:
+            del self._falhas[inep]
+            return None
+        return falhas
+
+    def espera(self, inep):
+        """Segundos até o INEP poder tentar de novo (0 se não estiver bloqueado)."""
+        agora = time.monotonic()
+        with self._lock:
+            falhas = self._recentes(inep, agora)
+            if falhas is None or len(falhas) < self.max_falhas:
+                return 0
+            return max(falhas[0] + self.janela - agora, 0)
+
+    def registrar_falha(self, inep):
+        agora = time.monotonic()
+        with self._lock:
+            # Descarta de tempos em tempos os INEPs sem falhas recentes, para que
+            # tentativas com INEPs inventados não façam o dicionário crescer
+            if len(self._falhas) > 10_000:
+                for antigo in list(self._falhas):
+                    self._recentes(antigo, agora)
+            self._falhas.setdefault(inep, deque(maxlen=self.max_falhas)).append(agora)
+
+    def limpar(self, inep):
+        with self._lock:
+            self._falhas.pop(inep, None)
+
+
+def autenticar(credenciais, limite, inep, codigo=''):
+    """Valida o login; retorna (credencial, None) ou (None, mensagem de erro)."""
+    espera = limite.espera(inep)
+    if espera:
+        return None, f"Muitas tentativas para este INEP. Tente novamente em {int(espera // 60) + 1} minuto(s)."
+
+    credencial = credenciais.get(inep)
+    if credencial is None:
+        limite.registrar_falha(inep)
+        return None, 'INEP incorreto.'
+    if credencial.hash_codigo is not None and not verificar_codigo(codigo, credencial.hash_codigo):
+        limite.registrar_falha(inep)
+        return None, 'Código de acesso incorreto.'
+    if credencial.escola is None:
+        return None, 'INEP não encontrado nos dados das escolas.'
+
+    limite.limpar(inep)
+    return credencial, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o hash de um código de acesso para senhas_acesso.xlsx.")
+    parser.add_argument('--gerar-hash', action='store_true', help="Lê o código sem ecoar e imprime o hash.")
+    args = parser.parse_args()
+    if args.gerar_hash:
+        codigo = getpass.getpass('Código de acesso: ')
+        if codigo != getpass.getpass('Repita o código: '):
+            parser.error("os códigos não conferem")
+        print(gerar_hash(codigo))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
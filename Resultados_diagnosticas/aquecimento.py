@@ -0,0 +1,77 @@
+"""Aquecimento dos dados e caches em segundo plano ao iniciar o servidor.
+
+O primeiro usuário depois de um deploy pagaria a carga das planilhas (ou dos
+snapshots), a montagem de índices, variações, cubo e resumo, a importação do
+matplotlib e a renderização dos primeiros gráficos. O `Aquecimento` executa
+essas tarefas numa thread própria logo na primeira execução do script, enquanto
+o formulário de login já é exibido; as sessões que precisarem de algo ainda em
+preparo esperam o mesmo cálculo (os caches do dashboard são compartilhados) em
+vez de repeti-lo.
+
+As tarefas rodam dentro de uma medição 'aquecimento' (instrumentacao.py), então
+as etapas de carga, agregação e gráfico aparecem no log estruturado como as dos
+reruns. Uma tarefa que falha é registrada e as seguintes continuam.
+
+O Streamlit só executa o script quando a primeira sessão se conecta; não há
+gancho na subida do servidor. Para que nem o primeiro visitante pague a leitura
+das planilhas, o deploy roda antes `python Resultados_diagnosticas/dados.py`,
+que grava os snapshots das partições e publica as tabelas combinadas
+(compartilhado.py): o aquecimento do primeiro acesso só mapeia os arquivos e
+monta os derivados. Enquanto isso, quem ainda não fez login vê o formulário sem
+esperar (ver `concluiu`).
+"""
+import logging
+import threading
+import time
+
+import instrumentacao
+
+log = logging.getLogger(__name__)
+
+
+class Aquecimento:
+    """Executa em segundo plano as tarefas de `tarefas()`, na ordem, uma vez.
+
+    `tarefas` é uma função que devolve um iterável de (nome, função); ele é
+    percorrido à medida que as tarefas terminam, então as últimas podem
+    depender do que as primeiras prepararam (por exemplo, o snapshot).
+    """
+
+    def __init__(self, tarefas):
+        self.concluidas = []
+        self.medicao = None
+        self._tarefas = tarefas
+        self._thread = threading.Thread(target=self._executar, name='aquecimento', daemon=True)
+        self._thread.start()
+
+    @property
+    def terminado(self):
+        return not self._thread.is_alive()
+
+    def concluiu(self, nome):
+        """Se a tarefa `nome` já terminou (com ou sem erro)."""
+        return any(concluida == nome for concluida, _, _ in self.concluidas)
+
+    def aguardar(self, tempo_limite=None):
+        """Espera o fim do aquecimento (ou `tempo_limite` segundos); retorna se terminou."""
+        self._thread.join(tempo_limite)
+        return self.terminado
+
+    def _executar(self):
+        medicao = instrumentacao.iniciar('aquecimento')
+        try:
+            for nome, tarefa in self._tarefas():
+                inicio = time.perf_counter()
+                erro = None
+                try:
+                    tarefa()
+                except Exception as e:
+                    log.exception("Falha no aquecimento: %s", nome)
+                    erro = repr(e)
+                self.concluidas.append((nome, (time.perf_counter() - inicio) * 1000, erro))
+        except Exception:
+            # Falha ao gerar a próxima tarefa (por exemplo, sem snapshot): encerra
+            log.exception("Aquecimento interrompido")
+        finally:
+            self.medicao = instrumentacao.concluir(medicao)
+            log.info("Aquecimento concluído: %d tarefas em %.0f ms", len(self.concluidas), medicao.duracao_ms)
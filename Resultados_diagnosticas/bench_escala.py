@@ -0,0 +1,270 @@
+"""Benchmark das etapas do dashboard em escala, com dados sintéticos e base de comparação.
+
+Para cada escala k, os dados são gerados com gerar_dados.py, ou reaproveitados
+de sinteticos/escala-<k>/ se os parâmetros forem os mesmos. A escala multiplica
+as amostras de xls/:
+- escolas: 70 × k;
+- regiões: 7 × √k;
+- edições: 6 × (1 + log10 k).
+As edições não crescem 100×, o que daria séculos de semestres.
+
+Cada escala é medida num processo separado, sem o Streamlit, com
+RESULTADOS_DIR_XLS e RESULTADOS_DIR_SNAPSHOT apontando para os dados gerados.
+As etapas medidas são:
+- ingestao: planilhas -> snapshots Arrow (dados.atualizar_snapshot, forçado);
+- carga: as três tabelas mapeadas do Arrow publicado (TabelaParticionada);
+- montagem: índices, variações, cubo e credenciais (recarga.montar_snapshot);
+- login: acesso.autenticar de um INEP sorteado;
+- aba1_variacao: recorte e formatação da tabela de variação de uma escola ou da rede;
+- aba2_graficos: gráficos de alfabetização (barras e linhas) de uma escola;
+- aba3_agregacao: consulta ao cubo por região e edição com filtros sorteados;
+- aba3_grafico: gráfico de região e edição de uma ETAPA e COMPONENTE.
+
+O tempo de cada etapa é a mediana, em ms por operação, das repetições. Ele é
+comparado com a base gravada em bench_escala_base.json. Uma etapa regride
+quando fica mais lenta que a base além da tolerância relativa e também além da
+folga absoluta; nesse caso o script termina com código 1. --gravar-base grava a
+execução atual como a nova base (a base depende da máquina).
+
+Uso:
+
+    python Resultados_diagnosticas/bench_escala.py [--escalas 1 10 100] [--repeticoes 5]
+        [--tolerancia 0.25] [--folga-ms 5] [--gravar-base] [--base ARQUIVO]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import acesso
+import calculos
+import dados
+import gerar_dados
+import graficos
+import recarga
+import variacao
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SINTETICOS_DIR = os.path.join(BASE_DIR, 'sinteticos')
+BASE_PADRAO = os.path.join(BASE_DIR, 'bench_escala_base.json')
+
+ETAPAS = ['ingestao', 'carga', 'montagem', 'login', 'aba1_variacao', 'aba2_graficos', 'aba3_agregacao', 'aba3_grafico']
+
+# Operações sorteadas por repetição nas etapas que variam com a escola/filtros
+OPERACOES = {'login': 50, 'aba1_variacao': 20, 'aba2_graficos': 3, 'aba3_agregacao': 20, 'aba3_grafico': 1}
+
+
+def parametros_escala(escala):
+    """Parâmetros de gerar_dados.gerar para a escala `escala`."""
+    return {
+        'escolas': 70 * escala,
+        'n_regioes': max(round(7 * math.sqrt(escala)), 1),
+        'n_etapas': 8,
+        'n_componentes': 2,
+        'n_edicoes': 6 * (1 + int(math.log10(escala))),
+        'anos_ama': 15,
+        'semente': 0,
+    }
+
+
+def preparar(escala):
+    """Pasta com os dados sintéticos da escala, gerando-os se ainda não existem."""
+    pasta = os.path.join(SINTETICOS_DIR, f"escala-{escala}")
+    parametros = parametros_escala(escala)
+    try:
+        with open(os.path.join(pasta, 'parametros.json'), encoding='utf-8') as f:
+            existentes = json.load(f)
+    except (FileNotFoundError, ValueError):
+        existentes = None
+    if existentes != {**parametros, 'particionado': False}:
+        inicio = time.perf_counter()
+        gerar_dados.gerar_pasta(pasta, **parametros)
+        print(f"escala {escala}: dados gerados em {time.perf_counter() - inicio:.1f} s ({pasta})")
+    return pasta
+
+
+def _cronometrar(operacoes, repeticoes):
+    # Mediana, em ms, de cada operação executada `repeticoes` vezes
+    tempos = []
+    for _ in range(repeticoes):
+        for operacao in operacoes:
+            inicio = time.perf_counter()
+            operacao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def medir(repeticoes, semente=0):
+    """Mede as etapas com os dados das pastas do ambiente; devolve {etapa: ms}."""
+    aleatorio = random.Random(semente)
+    resultado = {}
+
+    resultado['ingestao'] = _cronometrar(
+        [lambda: [dados.atualizar_snapshot(nome, forcar=True) for nome in dados.PLANILHAS]], repeticoes
+    )
+    tabelas = {}
+    resultado['carga'] = _cronometrar(
+        [lambda: tabelas.update({nome: dados.TabelaParticionada(nome) for nome in dados.PLANILHAS})], repeticoes
+    )
+    snapshots = []
+    resultado['montagem'] = _cronometrar([lambda: snapshots.append(recarga.montar_snapshot(tabelas))], repeticoes)
+    snapshot = snapshots[-1]
+    del snapshots[:-1]
+
+    df_dados = snapshot.tabelas['dados']
+    ineps = df_dados['INEP'].astype(str).unique().tolist()
+    escolas = df_dados['ESCOLA'].astype(str).unique().tolist()
+    etapas = df_dados['ETAPA'].astype(str).unique().tolist()
+    componentes = df_dados['COMP_CURRICULAR'].astype(str).unique().tolist()
+    regioes = df_dados['REGIAO'].astype(str).unique().tolist()
+
+    def sortear(opcoes, n):
+        return [aleatorio.choice(opcoes) for _ in range(n)]
+
+    limite = acesso.LimiteTentativas()
+    resultado['login'] = _cronometrar([
+        lambda inep=inep: acesso.autenticar(snapshot.credenciais, limite, inep, '')
+        for inep in sortear(ineps, OPERACOES['login'])
+    ], repeticoes)
+
+    # Aba 1: a rede toda (administrador) e escolas sorteadas
+    def variacao_aba1(filtro_escola, etapa, componente):
+        recorte = variacao.filtrar_variacoes(snapshot.variacoes, ETAPA=etapa, COMP_CURRICULAR=componente, **filtro_escola)
+        return variacao.formatar_variacoes(recorte)
+
+    filtros_aba1 = [{}] + [{'INEP': inep} for inep in sortear(ineps, OPERACOES['aba1_variacao'] - 1)]
+    resultado['aba1_variacao'] = _cronometrar([
+        lambda f=f, e=e, c=c: variacao_aba1(f, e, c)
+        for f, e, c in zip(filtros_aba1, sortear(etapas + [None], len(filtros_aba1)),
+                           sortear(componentes + [None], len(filtros_aba1)))
+    ], repeticoes)
+
+    # Aba 2: barras e linhas de alfabetização de escolas sorteadas
+    def graficos_aba2(inep):
+        df_ama = calculos.alfabetizacao_ordenada(snapshot.indices['ama'].selecionar(INEP=inep))
+        if not df_ama.empty:
+            graficos.renderizar_png(lambda: graficos.grafico_alfabetizacao_barras(df_ama), **graficos.OPCOES_TELA)
+            graficos.renderizar_png(lambda: graficos.grafico_alfabetizacao_linhas(df_ama), **graficos.OPCOES_TELA)
+
+    resultado['aba2_graficos'] = _cronometrar(
+        [lambda inep=inep: graficos_aba2(inep) for inep in sortear(ineps, OPERACOES['aba2_graficos'])], repeticoes
+    )
+
+    # Aba 3: consulta ao cubo (rede ou escola, todas as regiões ou uma) e o gráfico
+    resultado['aba3_agregacao'] = _cronometrar([
+        lambda e=e, c=c, r=r, s=s: calculos.desempenho_regiao_edicao(snapshot.cubo, e, c, r, s)
+        for e, c, r, s in zip(
+            sortear(etapas + [None], OPERACOES['aba3_agregacao']),
+            sortear(componentes + [None], OPERACOES['aba3_agregacao']),
+            sortear(regioes + [None], OPERACOES['aba3_agregacao']),
+            sortear(escolas + [None] * len(escolas), OPERACOES['aba3_agregacao']),
+        )
+    ], repeticoes)
+
+    def grafico_aba3(etapa, componente):
+        df_regiao_edicao = calculos.desempenho_regiao_edicao(snapshot.cubo, etapa, componente)
+        graficos.renderizar_png(
+            lambda: graficos.grafico_regiao_edicao(df_regiao_edicao, etapa, componente), **graficos.OPCOES_TELA
+        )
+
+    resultado['aba3_grafico'] = _cronometrar([
+        lambda e=e, c=c: grafico_aba3(e, c)
+        for e, c in zip(sortear(etapas, OPERACOES['aba3_grafico']), sortear(componentes, OPERACOES['aba3_grafico']))
+    ], repeticoes)
+
+    resultado['linhas_dados'] = len(df_dados)
+    return resultado
+
+
+def medir_escala(escala, repeticoes):
+    """Executa `medir` num processo separado (dados.py lê as pastas do ambiente ao ser importado)."""
+    pasta = preparar(escala)
+    ambiente = {
+        **os.environ,
+        'RESULTADOS_DIR_XLS': os.path.join(pasta, 'xls'),
+        'RESULTADOS_DIR_SNAPSHOT': os.path.join(pasta, 'snapshot'),
+        'RESULTADOS_LOG_ETAPAS': '',
+        'MPLBACKEND': 'Agg',
+    }
+    ambiente.pop('RESULTADOS_DIR_COMPARTILHADO', None)
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--medir', '--repeticoes', str(repeticoes)],
+        env=ambiente, cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def comparar(atual, base, tolerancia, folga_ms):
+    """Linhas (escala, etapa, base, atual, razão, situação) e se houve regressão."""
+    linhas = []
+    regressao = False
+    for escala, tempos in atual.items():
+        for etapa in ETAPAS:
+            referencia = base.get(escala, {}).get(etapa)
+            tempo = tempos[etapa]
+            if referencia is None:
+                linhas.append((escala, etapa, None, tempo, None, 'sem base'))
+                continue
+            razao = tempo / referencia if referencia else float('inf')
+            if tempo > referencia * (1 + tolerancia) and tempo - referencia > folga_ms:
+                situacao = 'REGRESSÃO'
+                regressao = True
+            elif tempo < referencia * (1 - tolerancia) and referencia - tempo > folga_ms:
+                situacao = 'melhora'
+            else:
+                situacao = 'ok'
+            linhas.append((escala, etapa, referencia, tempo, razao, situacao))
+    return linhas, regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede as etapas do dashboard em escala e compara com a base.")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10], help="Multiplicadores das amostras.")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições de cada operação.")
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="Aumento relativo aceito sobre a base.")
+    parser.add_argument('--folga-ms', type=float, default=5.0, help="Aumento absoluto ignorado (ruído).")
+    parser.add_argument('--base', default=BASE_PADRAO, help="Arquivo JSON da base de comparação.")
+    parser.add_argument('--gravar-base', action='store_true', help="Grava esta execução como a nova base.")
+    parser.add_argument('--medir', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        # Processo filho: mede com as pastas do ambiente e devolve o JSON na última linha
+        print(json.dumps(medir(args.repeticoes)))
+        return
+
+    atual = {}
+    for escala in args.escalas:
+        atual[str(escala)] = medir_escala(escala, args.repeticoes)
+        print(f"escala {escala}: {atual[str(escala)]['linhas_dados']} linhas em bd_dados")
+
+    try:
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)
+    except FileNotFoundError:
+        base = {}
+
+    linhas, regressao = comparar(atual, base, args.tolerancia, args.folga_ms)
+    print(f"{'escala':>6s} {'etapa':16s} {'base (ms)':>10s} {'atual (ms)':>11s} {'razão':>6s}  situação")
+    for escala, etapa, referencia, tempo, razao, situacao in linhas:
+        texto_base = f"{referencia:10.2f}" if referencia is not None else f"{'-':>10s}"
+        texto_razao = f"{razao:6.2f}" if razao is not None else f"{'-':>6s}"
+        print(f"{escala:>6s} {etapa:16s} {texto_base} {tempo:11.2f} {texto_razao}  {situacao}")
+
+    if args.gravar_base:
+        # Mantém as escalas da base que não foram medidas agora
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump({**base, **atual}, f, indent=1, sort_keys=True)
+        print(f"base gravada em {args.base}")
+    elif regressao:
+        print(f"FALHA: etapas acima da base além da tolerância de {args.tolerancia:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
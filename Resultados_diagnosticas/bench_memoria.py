@@ -0,0 +1,161 @@
+"""Benchmark de regressão de memória dos gráficos do dashboard.
+
+Simula milhares de reruns das três abas sem o servidor do Streamlit: a cada
+rerun sorteia a escola (login por INEP, escola escolhida pelo administrador
+ou a rede toda), ETAPA, COMPONENTE e REGIÃO, calcula os dados de cada aba pelos
+mesmos caminhos do dashboard (snapshot de recarga.py, resumo por escola e
+calculos.py) e pede os gráficos ao `CacheGraficos` (com capacidade pequena,
+para forçar despejos), gerando às vezes também o PNG de download.
+O RSS do processo é medido em blocos; o veredito vem da inclinação da reta de
+mínimos quadrados sobre todas as medições (cada renderização causa picos
+passageiros, que uma comparação entre poucas amostras não separa do
+crescimento real). Termina com código 1 se o crescimento estimado ao longo dos
+reruns passar da tolerância.
+
+Uso:
+
+    python Resultados_diagnosticas/bench_memoria.py [--reruns 2000] [--blocos 40] [--tolerancia-mb 25]
+"""
+import argparse
+import gc
+import itertools
+import random
+import statistics
+import sys
+import time
+
+import calculos
+import dados
+import graficos
+import recarga
+from instrumentacao import rss_mb
+
+
+# Medições mínimas para o veredito (com menos, a reta segue o ruído do alocador)
+MIN_AMOSTRAS = 30
+
+
+class Simulacao:
+    """Reproduz o trabalho de dados e gráficos de um rerun das abas 1, 2 e 3."""
+
+    def __init__(self, capacidade_cache, semente=0):
+        self.snapshot = recarga.montar_snapshot({nome: dados.TabelaParticionada(nome) for nome in dados.PLANILHAS})
+        self.cache = graficos.CacheGraficos(capacidade=capacidade_cache)
+        self.aleatorio = random.Random(semente)
+
+        df_dados = self.snapshot.tabelas['dados']
+        # Filtros de escola como os do dashboard: a rede toda ({}), a escola
+        # escolhida pelo administrador (ESCOLA) e o login de uma escola (INEP)
+        escolas = [{}]
+        escolas += [{'ESCOLA': escola} for escola in sorted(df_dados['ESCOLA'].astype(str).unique().tolist())]
+        escolas += [{'INEP': inep} for inep in self.snapshot.resumo.tabela.index]
+        etapas = sorted(df_dados['ETAPA'].unique().tolist())
+        componentes = sorted(df_dados['COMP_CURRICULAR'].unique().tolist())
+        regioes = [None] + sorted(df_dados['REGIAO'].astype(str).unique().tolist())
+        self.filtros = list(itertools.product(escolas, etapas, componentes, regioes))
+
+    def rerun(self):
+        filtro_escola, etapa, componente, regiao = self.aleatorio.choice(self.filtros)
+        escola_chave = tuple(filtro_escola.items()) or None
+        baixar = self.aleatorio.random() < 0.1
+        graficos_rerun = []
+        indice_dados = self.snapshot.indices['dados']
+        resumo_escolas = self.snapshot.resumo
+        inep = resumo_escolas.inep(**filtro_escola)
+
+        # Aba 1: ciclos do resumo (ou das linhas, para a rede) e barras por período
+        if inep is not None:
+            periodos = resumo_escolas.periodos(inep)
+        else:
+            periodos = calculos.periodos_por_edicao(indice_dados.selecionar(**filtro_escola))
+        df_filtrado = calculos.resultados_filtrados(indice_dados, periodos, etapa, componente, **filtro_escola)
+        if not df_filtrado.empty:
+            graficos_rerun.append(self.cache.obter(
+                (escola_chave, etapa, componente, None, 'periodos'),
+                lambda: graficos.grafico_periodos(df_filtrado, etapa, componente),
+            ))
+
+        # Aba 2: barras e linhas de alfabetização (série do resumo, se houver a escola)
+        if inep is not None:
+            df_ama = resumo_escolas.serie_alfabetizacao(inep)
+        else:
+            df_ama = calculos.alfabetizacao_ordenada(self.snapshot.indices['ama'].selecionar(**filtro_escola))
+        if not df_ama.empty:
+            graficos_rerun.append(self.cache.obter(
+                (escola_chave, None, None, None, 'alfabetizacao_barras'),
+                lambda: graficos.grafico_alfabetizacao_barras(df_ama),
+            ))
+            graficos_rerun.append(self.cache.obter(
+                (escola_chave, None, None, None, 'alfabetizacao_linhas'),
+                lambda: graficos.grafico_alfabetizacao_linhas(df_ama),
+            ))
+
+        # Aba 3 (só administrador): barras agrupadas por região e edição, do cubo
+        if 'INEP' not in filtro_escola:
+            escola = filtro_escola.get('ESCOLA')
+            df_regiao_edicao = calculos.desempenho_regiao_edicao(self.snapshot.cubo, etapa, componente, regiao, escola)
+            if not df_regiao_edicao.empty:
+                graficos_rerun.append(self.cache.obter(
+                    (escola_chave, etapa, componente, regiao, 'regiao_edicao'),
+                    lambda: graficos.grafico_regiao_edicao(df_regiao_edicao, etapa, componente),
+                    dpi=300, bbox_inches='tight'
+                ))
+
+        # PNGs exibidos na tela (modo 'png' do dashboard), renderizados no primeiro acesso
+        for grafico in graficos_rerun:
+            _ = grafico.png_tela
+
+        if baixar:
+            for grafico in graficos_rerun:
+                grafico.png_download()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica se o RSS fica estável ao longo de muitos reruns.")
+    parser.add_argument('--reruns', type=int, default=2000, help="Reruns medidos após o aquecimento.")
+    parser.add_argument('--aquecimento', type=int, default=100, help="Reruns antes da primeira medição.")
+    parser.add_argument('--blocos', type=int, default=40,
+                        help=f"Quantidade de medições do RSS (pelo menos {MIN_AMOSTRAS}).")
+    parser.add_argument('--capacidade-cache', type=int, default=32, help="Capacidade do cache de gráficos.")
+    parser.add_argument('--tolerancia-mb', type=float, default=25.0, help="Crescimento máximo aceito do RSS.")
+    args = parser.parse_args()
+    if args.blocos < MIN_AMOSTRAS or args.reruns < args.blocos:
+        parser.error(f"são necessárias pelo menos {MIN_AMOSTRAS} medições de ao menos um rerun cada "
+                     f"(--blocos >= {MIN_AMOSTRAS} e --reruns >= --blocos)")
+
+    simulacao = Simulacao(args.capacidade_cache)
+
+    # O aquecimento enche o cache de gráficos antes da primeira medição
+    for _ in range(args.aquecimento):
+        simulacao.rerun()
+    inicio = time.perf_counter()
+
+    # Mede em blocos para mostrar a curva do RSS, não só os extremos
+    bloco = max(args.reruns // args.blocos, 1)
+    amostras = []
+    marcas = []
+    feitos = 0
+    while feitos < args.reruns:
+        passo = min(bloco, args.reruns - feitos)
+        for _ in range(passo):
+            simulacao.rerun()
+        feitos += passo
+        gc.collect()
+        amostras.append(rss_mb())
+        marcas.append(feitos)
+        print(f"{feitos:6d} reruns  RSS {amostras[-1]:8.1f} MB")
+
+    # Inclinação (MB por rerun) sobre todas as medições, projetada nos reruns medidos
+    inclinacao, _ = statistics.linear_regression(marcas, amostras)
+    crescimento = inclinacao * args.reruns
+    duracao = time.perf_counter() - inicio
+    print(f"RSS inicial {amostras[0]:.1f} MB, mínimo {min(amostras):.1f} MB, máximo {max(amostras):.1f} MB")
+    print(f"Inclinação {inclinacao * 1000:+.2f} MB por 1000 reruns, crescimento estimado {crescimento:+.1f} MB "
+          f"em {args.reruns} reruns ({duracao / args.reruns * 1000:.1f} ms/rerun)")
+    if crescimento > args.tolerancia_mb:
+        print(f"FALHA: crescimento acima da tolerância de {args.tolerancia_mb:.1f} MB")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark da latência de rerun do dashboard por seletor.
+
+Executa o dashboard com o `AppTest` do Streamlit (sem servidor nem navegador),
+faz login como administrador e, para cada seletor (escola, ETAPA e COMPONENTE
+da aba 1, ETAPA, COMPONENTE e REGIÃO da aba 3), alterna entre dois valores
+medindo o tempo de cada rerun. A primeira troca para um valor é "fria" (calcula
+os resultados da aba e renderiza os gráficos); as seguintes são "quentes" e
+mostram o custo de um rerun quando as abas não tocadas vêm dos caches.
+
+O `AppTest` sempre reexecuta o script inteiro: no servidor, os seletores das
+abas reexecutam só o próprio fragmento, então os tempos aqui são um teto.
+
+Uso:
+
+    python Resultados_diagnosticas/bench_reruns.py [--repeticoes 10] [--inep 2307650]
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.py')
+
+# Sem o aquecimento do servidor: as trocas "frias" devem renderizar os próprios gráficos
+os.environ.setdefault('RESULTADOS_AQUECIMENTO', '0')
+
+# Seletor e os dois valores alternados em cada medição (None: segunda opção)
+SELETORES = [
+    ('escola_seletor', 'TODAS', None),
+    ('etapa_selectbox_regiao', 'TODAS', '5° ANO'),
+    ('componente_selectbox_regiao', 'TODOS', 'MATEMÁTICA'),
+    ('etapa_selectbox_regiao_tab3_mestre', 'TODAS', '5° ANO'),
+    ('componente_selectbox_regiao_tab3_mestre', 'TODOS', 'MATEMÁTICA'),
+    ('regiao_selectbox_tab3_mestre', 'TODAS', None),
+]
+
+
+def entrar(inep, timeout):
+    """AppTest já autenticado com o INEP informado."""
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    at.text_input[0].input(inep)
+    next(b for b in at.button if b.label == 'Login').click()
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def medir(at, chave, valores, repeticoes):
+    """Tempos (s) das trocas do seletor `chave` entre os `valores`."""
+    tempos = []
+    for passo in range(repeticoes * len(valores)):
+        inicio = time.perf_counter()
+        at.selectbox(key=chave).select(valores[(passo + 1) % len(valores)]).run()
+        tempos.append(time.perf_counter() - inicio)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    # Volta ao primeiro valor para não afetar a medição do próximo seletor
+    at.selectbox(key=chave).select(valores[0]).run()
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a latência de rerun de cada seletor do dashboard.")
+    parser.add_argument('--repeticoes', type=int, default=10, help="Ciclos de troca por seletor.")
+    parser.add_argument('--inep', default='2307650', help="INEP de administrador usado no login.")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Tempo máximo de cada rerun (s).")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    at = entrar(args.inep, args.timeout)
+
+    print(f"{'seletor':42s} {'frio (ms)':>10s} {'quente (ms)':>12s}")
+    for chave, primeiro, segundo in SELETORES:
+        opcoes = at.selectbox(key=chave).options
+        if segundo is None:
+            segundo = opcoes[1] if len(opcoes) > 1 else opcoes[0]
+        if primeiro not in opcoes or segundo not in opcoes:
+            print(f"{chave:42s} opções indisponíveis nos dados carregados")
+            continue
+        tempos = medir(at, chave, [primeiro, segundo], args.repeticoes)
+        # O primeiro valor já foi exibido no login: só a primeira troca calcula
+        # algo novo, as demais encontram os caches cheios
+        frio = tempos[0]
+        quente = statistics.median(tempos[1:]) if len(tempos) > 1 else float('nan')
+        print(f"{chave:42s} {frio * 1000:10.1f} {quente * 1000:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
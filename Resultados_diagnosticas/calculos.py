@@ -0,0 +1,121 @@
+"""Cálculos das abas do dashboard, sem dependência do Streamlit.
+
+As funções recebem os índices/tabelas já carregados e os filtros escolhidos
+(None significa "TODAS"/"TODOS") e devolvem os DataFrames que cada aba exibe ou
+plota. São usadas pelo dashboard, pelo gerador de relatórios em lote e pelos
+benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+import cubo
+import resumo
+
+# Opções dos seletores que significam "sem filtro"
+OPCOES_TODAS = ('TODAS', 'TODOS')
+
+
+def filtro(valor):
+    """Converte as opções "TODAS"/"TODOS" dos seletores em ausência de filtro (None)."""
+    return None if valor in OPCOES_TODAS else valor
+
+
+def periodos_por_edicao(df_escola):
+    """Classifica as edições da escola em CICLO 1 (primeira metade) e CICLO 2."""
+    # Classificar edições e separar por ciclos
+    edicoes_unicas = sorted(df_escola['EDIÇÃO'].unique().tolist())
+    ponto_corte = len(edicoes_unicas) // 2
+    ciclo_1_edicoes = set(edicoes_unicas[:ponto_corte])
+    return {edicao: 'CICLO 1' if edicao in ciclo_1_edicoes else 'CICLO 2' for edicao in edicoes_unicas}
+
+
+def resultados_filtrados(indice_dados, periodos, etapa=None, componente=None, **filtro_escola):
+    """Linhas da aba 1 (escola, ETAPA e COMPONENTE) com a coluna PERIODO preenchida."""
+    df_filtrado = indice_dados.selecionar(ETAPA=etapa, COMP_CURRICULAR=componente, **filtro_escola)
+    return df_filtrado.assign(PERIODO=df_filtrado['EDIÇÃO'].map(periodos))
+
+
+def alfabetizacao_ordenada(df_escola_ama):
+    """Tabela de alfabetização da aba 2 em ordem crescente de EDIÇÃO."""
+    # A chave numérica da EDIÇÃO já ordena corretamente (sem alterar a tabela carregada)
+    return df_escola_ama.sort_values(by='EDIÇÃO', ascending=True)
+
+
+def desempenho_regiao_edicao(cubo_dados, etapa=None, componente=None, regiao=None, escola=None):
+    """Desempenho médio por região e edição (aba 3), consultado no cubo de agregados.
+
+    Com ETAPA ou COMPONENTE em "TODAS"/"TODOS" usa a média de todas as etapas ou
+    componentes; as regiões (todas ou a selecionada) e as edições vêm detalhadas.
+    """
+    df_regiao_edicao = cubo_dados.medias(
+        ESCOLA=escola,
+        REGIAO=cubo.DETALHADO if regiao is None else regiao,
+        ETAPA=etapa,
+        COMP_CURRICULAR=componente,
+        **{'EDIÇÃO': cubo.DETALHADO},
+    )
+
+    # Ordenar as edições em ordem crescente
+    return df_regiao_edicao.sort_values(by=['EDIÇÃO', 'REGIAO'])
+
+
+def regioes_disponiveis(cubo_dados, escola=None):
+    """Regiões com resultados (da escola, se informada), em ordem alfabética."""
+    return sorted(cubo_dados.consultar(ESCOLA=escola, REGIAO=cubo.DETALHADO)['REGIAO'].tolist())
+
+
+def comparar_escolas(indice_dados, resumo_escolas, ineps, etapa=None, componente=None):
+    """Séries e indicadores de várias escolas numa única passagem agrupada.
+
+    As linhas de todos os `ineps` (com ETAPA e COMPONENTE, se informados) saem
+    do índice de uma vez e são agrupadas por INEP e EDIÇÃO num só groupby, com a
+    média ponderada pelas matrículas quando houver a coluna, como no resumo por
+    escola; os ciclos e a alfabetização vêm do resumo. Devolve (series, tabela):
+    - series: INEP, ESCOLA, EDIÇÃO, DESEMPENHO_MEDIO e PERIODO, para o gráfico;
+    - tabela: uma linha por escola, na ordem de `ineps`, com o desempenho médio
+      de cada ciclo (média das edições do ciclo), a diferença entre os ciclos e
+      os indicadores do resumo. A diferença entre ciclos compara todas as
+      edições do CICLO 2 com as do CICLO 1; não é a variação .2 contra .1 do
+      mesmo ano da tabela da aba 1 (Diferença de Pontos e Variação Percentual).
+    """
+    ineps = [str(inep) for inep in ineps if str(inep) in resumo_escolas.tabela.index]
+    posicoes_inep = indice_dados.posicoes['INEP']
+    vazio = np.empty(0, dtype=np.intp)
+    posicoes = np.concatenate([vazio] + [posicoes_inep.get(inep, vazio) for inep in ineps])
+    filtradas = indice_dados.localizar(ETAPA=etapa, COMP_CURRICULAR=componente)
+    posicoes = np.sort(posicoes) if filtradas is None else np.intersect1d(posicoes, filtradas)
+    linhas = indice_dados.df.take(posicoes)
+
+    peso = cubo.COLUNA_PESO if cubo.COLUNA_PESO in linhas.columns else None
+    series = resumo.medias_por_edicao(linhas, 'DESEMPENHO_MEDIO', peso)
+    ciclos = pd.DataFrame(
+        [(inep, edicao, ciclo) for inep in ineps for edicao, ciclo in resumo_escolas.periodos(inep).items()],
+        columns=['INEP', 'EDIÇÃO', 'PERIODO'],
+    ).astype({'EDIÇÃO': series['EDIÇÃO'].dtype})
+    series = series.merge(ciclos, on=['INEP', 'EDIÇÃO'], how='left')
+    series.insert(1, 'ESCOLA', series['INEP'].map(resumo_escolas.tabela['ESCOLA']))
+
+    # Desempenho médio de cada ciclo e variação do CICLO 2 sobre o CICLO 1
+    por_ciclo = (
+        series.groupby(['INEP', 'PERIODO'])['DESEMPENHO_MEDIO'].mean()
+        .unstack('PERIODO')
+        .reindex(index=ineps, columns=['CICLO 1', 'CICLO 2'])
+    )
+    ciclo_1, ciclo_2 = por_ciclo['CICLO 1'], por_ciclo['CICLO 2']
+    diferenca = ciclo_2 - ciclo_1
+    percentual = pd.Series(np.where(ciclo_1 != 0, diferenca / ciclo_1 * 100, 0), index=ineps).where(ciclo_1.notna())
+
+    resumo_selecionadas = resumo_escolas.tabela.reindex(ineps)
+    tabela = pd.DataFrame({
+        'ESCOLA': resumo_selecionadas['ESCOLA'],
+        'INEP': ineps,
+        'REGIAO': resumo_selecionadas['REGIAO'],
+        'Desempenho CICLO 1': ciclo_1,
+        'Desempenho CICLO 2': ciclo_2,
+        'Diferença entre Ciclos': diferenca,
+        'Variação entre Ciclos': percentual,
+        'Posição na Região': resumo_selecionadas['POSICAO_REGIAO'],
+        'Alfabetização (última edição)': resumo_selecionadas['ALFABETIZACAO_FINAL'],
+        'Tendência da Alfabetização': resumo_selecionadas['TENDENCIA_ALFABETIZACAO'],
+    }, index=ineps).reset_index(drop=True)
+    return series, tabela
@@ -0,0 +1,94 @@
+"""Tabelas publicadas uma vez e mapeadas em memória por todos os processos.
+
+Cada tabela combinada (ver dados.carregar_tabela) é gravada uma única vez por
+versão dos dados num arquivo Arrow IPC, <pasta>/<nome>-<versão>.arrow. Cada
+processo do servidor (ou do gerador de relatórios) apenas mapeia o arquivo em
+memória e monta o DataFrame sem cópia: as colunas numéricas apontam direto para
+as páginas do arquivo, que o sistema operacional compartilha entre todos os
+processos. A memória deixa de crescer com o número de workers, e um worker novo
+só precisa mapear o arquivo, sem ler planilhas nem snapshots de partições.
+
+Os arrays mapeados são somente leitura: qualquer tentativa de alterar as tabelas
+carregadas no lugar falha, em vez de divergir entre processos.
+
+Por padrão a pasta fica em snapshot/compartilhado; apontando a variável
+RESULTADOS_DIR_COMPARTILHADO para um tmpfs (por exemplo /dev/shm/resultados) os
+arquivos ficam direto na memória compartilhada.
+"""
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+
+def _caminho(pasta, nome, versao):
+    return os.path.join(pasta, f"{nome}-{versao}.arrow")
+
+
+def _tabela_arrow(df):
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    # Floats com NaN como valor (sem máscara de nulos) para o to_pandas não copiar
+    for posicao, coluna in enumerate(df.columns):
+        if pd.api.types.is_float_dtype(df[coluna].dtype):
+            valores = pa.array(df[coluna].to_numpy(dtype='float64'), type=pa.float64())
+            tabela = tabela.set_column(posicao, coluna, valores)
+    return tabela
+
+
+def publicar(pasta, nome, versao, df):
+    """Grava `df` como a versão publicada de `nome` e remove as versões antigas.
+
+    Processos que ainda mapeiam uma versão antiga continuam lendo normalmente:
+    o arquivo apagado só é liberado quando o último mapeamento é fechado.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    caminho = _caminho(pasta, nome, versao)
+    tabela = _tabela_arrow(df)
+    # Temporário por processo e thread (a recarga e o aquecimento podem publicar juntos)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with pa.OSFile(temporario, 'wb') as sink:
+        with pa.ipc.new_file(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+    os.replace(temporario, caminho)
+
+    for arquivo in os.listdir(pasta):
+        if arquivo.startswith(f"{nome}-") and arquivo.endswith('.arrow') and arquivo != os.path.basename(caminho):
+            try:
+                os.remove(os.path.join(pasta, arquivo))
+            except OSError:
+                # No Windows um arquivo mapeado não pode ser apagado; fica para a próxima
+                pass
+    return caminho
+
+
+def anexar(caminho):
+    """DataFrame somente leitura sobre o arquivo publicado, sem copiar as colunas numéricas."""
+    # Sem fechar o mapeamento: os buffers das colunas o mantêm aberto enquanto existirem
+    fonte = pa.memory_map(caminho, 'r')
+    tabela = pa.ipc.open_file(fonte).read_all()
+    return tabela.to_pandas(split_blocks=True)
+
+
+def carregar(pasta, nome, versao, montar):
+    """Anexa a versão publicada de `nome`; se ela não existir, monta com `montar()` e publica.
+
+    O arquivo é mapeado direto, sem verificar antes se existe: entre a
+    verificação e o mapeamento outro processo pode publicar uma versão mais nova
+    e apagar esta. Sem o arquivo (ainda não publicado ou já apagado), a versão é
+    montada, publicada e mapeada; se for apagada de novo nesse meio tempo, o
+    DataFrame montado é devolvido como está, fora da memória compartilhada.
+    Dois processos que montem a mesma versão ao mesmo tempo gravam o mesmo
+    conteúdo, cada um no seu arquivo temporário, e a troca é atômica.
+    """
+    caminho = _caminho(pasta, nome, versao)
+    try:
+        return anexar(caminho)
+    except FileNotFoundError:
+        pass
+    df = montar()
+    publicar(pasta, nome, versao, df)
+    try:
+        return anexar(caminho)
+    except FileNotFoundError:
+        return df
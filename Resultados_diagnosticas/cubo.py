@@ -0,0 +1,133 @@
+"""Cubo de agregados de desempenho por escola, região, etapa, componente e edição.
+
+Calculado uma vez por snapshot: para cada combinação de (ESCOLA, REGIAO, ETAPA,
+COMP_CURRICULAR, EDIÇÃO) guarda contagem, soma e média de DESEMPENHO_MEDIO,
+inclusive os totais de cada dimensão, marcados com o mesmo rótulo dos seletores
+do dashboard ('TODAS' ou 'TODOS'; na EDIÇÃO, a chave 0). Assim cada visão da
+aba REGIAO vira uma consulta ao índice do cubo em vez de um groupby sobre as
+linhas brutas.
+
+Se a tabela tiver a coluna de matrículas (COLUNA_PESO), o cubo guarda também a
+média ponderada por ela, que passa a ser a média usada nas consultas.
+"""
+from itertools import combinations
+
+import pandas as pd
+
+DIMENSOES = ['ESCOLA', 'REGIAO', 'ETAPA', 'COMP_CURRICULAR', 'EDIÇÃO']
+
+# Rótulo das linhas de total de cada dimensão (iguais às opções dos seletores);
+# a EDIÇÃO fica com a chave numérica (esquema.py) e o total é a chave 0
+TOTAIS = {
+    'ESCOLA': 'TODAS',
+    'REGIAO': 'TODAS',
+    'ETAPA': 'TODAS',
+    'COMP_CURRICULAR': 'TODOS',
+    'EDIÇÃO': 0,
+}
+
+# Coluna opcional com a quantidade de alunos, usada como peso da média
+COLUNA_PESO = 'MATRICULAS'
+
+# Valor de consulta que pede todos os valores detalhados de uma dimensão
+DETALHADO = object()
+
+
+def combinacoes(dimensoes):
+    """Todos os subconjuntos de `dimensoes`, do vazio (total geral) ao completo."""
+    return [agrupadas for tamanho in range(len(dimensoes) + 1) for agrupadas in combinations(dimensoes, tamanho)]
+
+
+class CuboDesempenho:
+    """Agregados materializados com índice (ESCOLA, REGIAO, ETAPA, COMP_CURRICULAR, EDIÇÃO)."""
+
+    def __init__(self, df, coluna_peso=COLUNA_PESO):
+        self.coluna_peso = coluna_peso
+        self.ponderado = coluna_peso in df.columns
+        self.tabela = self._finalizar(self._agregar(df, combinacoes(DIMENSOES)))
+
+    def _agregar(self, df, subconjuntos):
+        base = df[DIMENSOES].astype({dimensao: str for dimensao in DIMENSOES if dimensao != 'EDIÇÃO'})
+        base['DESEMPENHO_MEDIO'] = df['DESEMPENHO_MEDIO']
+        agregacoes = {
+            'CONTAGEM': ('DESEMPENHO_MEDIO', 'count'),
+            'SOMA': ('DESEMPENHO_MEDIO', 'sum'),
+        }
+        if self.ponderado:
+            base['PESO'] = df[self.coluna_peso].where(df['DESEMPENHO_MEDIO'].notna())
+            base['PONDERADO'] = df['DESEMPENHO_MEDIO'] * df[self.coluna_peso]
+            agregacoes['SOMA_PESOS'] = ('PESO', 'sum')
+            agregacoes['SOMA_PONDERADA'] = ('PONDERADO', 'sum')
+
+        # Um groupby por subconjunto de dimensões; as que ficam de fora viram total
+        partes = []
+        for agrupadas in subconjuntos:
+            if agrupadas:
+                parte = base.groupby(list(agrupadas)).agg(**agregacoes).reset_index()
+            else:
+                parte = base.assign(_total=0).groupby('_total').agg(**agregacoes).reset_index(drop=True)
+            for dimensao in DIMENSOES:
+                if dimensao not in agrupadas:
+                    parte[dimensao] = TOTAIS[dimensao]
+            partes.append(parte)
+        return pd.concat(partes, ignore_index=True)
+
+    def _finalizar(self, cubo):
+        cubo['MEDIA'] = cubo['SOMA'] / cubo['CONTAGEM']
+        if self.ponderado:
+            cubo['MEDIA_PONDERADA'] = cubo['SOMA_PONDERADA'] / cubo['SOMA_PESOS']
+        return cubo.set_index(DIMENSOES).sort_index()
+
+    def atualizar_edicoes(self, df, edicoes):
+        """Refaz as células das `edicoes` alteradas a partir da tabela completa `df`.
+
+        Só as linhas dessas edições são reagrupadas; os totais de EDIÇÃO são
+        somados a partir das células por edição, sem voltar às linhas brutas.
+        """
+        edicoes = {int(edicao) for edicao in edicoes}
+        if not edicoes:
+            return
+        linhas = df[df['EDIÇÃO'].isin(edicoes)]
+        por_edicao = [agrupadas for agrupadas in combinacoes(DIMENSOES) if 'EDIÇÃO' in agrupadas]
+        novas = self._agregar(linhas, por_edicao)
+
+        anteriores = self.tabela.reset_index()
+        mantidas = anteriores[~anteriores['EDIÇÃO'].isin(edicoes | {TOTAIS['EDIÇÃO']})]
+        detalhadas = pd.concat([mantidas, novas], ignore_index=True)[novas.columns]
+        somas = [coluna for coluna in novas.columns if coluna not in DIMENSOES]
+        outras = [dimensao for dimensao in DIMENSOES if dimensao != 'EDIÇÃO']
+        totais = detalhadas.groupby(outras)[somas].sum().reset_index()
+        totais['EDIÇÃO'] = TOTAIS['EDIÇÃO']
+        self.tabela = self._finalizar(pd.concat([detalhadas, totais], ignore_index=True))
+
+    def consultar(self, **filtros):
+        """Células do cubo para os filtros dados, uma por linha.
+
+        Para cada dimensão: um valor seleciona aquele valor; None (ou a
+        dimensão omitida) seleciona o total; DETALHADO seleciona todos os
+        valores detalhados, sem a linha de total.
+        """
+        chave = []
+        detalhadas = []
+        for dimensao in DIMENSOES:
+            valor = filtros.get(dimensao)
+            if valor is DETALHADO:
+                chave.append(slice(None))
+                detalhadas.append(dimensao)
+            else:
+                chave.append(TOTAIS[dimensao] if valor is None else type(TOTAIS[dimensao])(valor))
+
+        try:
+            celulas = self.tabela.loc[tuple(chave), :]
+        except KeyError:
+            return self.tabela.iloc[:0].reset_index()
+        celulas = celulas.reset_index()
+        for dimensao in detalhadas:
+            celulas = celulas[celulas[dimensao] != TOTAIS[dimensao]]
+        return celulas
+
+    def medias(self, **filtros):
+        """Como `consultar`, com a média (ponderada, se houver peso) em DESEMPENHO_MEDIO."""
+        celulas = self.consultar(**filtros)
+        coluna_media = 'MEDIA_PONDERADA' if self.ponderado else 'MEDIA'
+        return celulas[DIMENSOES].assign(DESEMPENHO_MEDIO=celulas[coluna_media])
@@ -0,0 +1,337 @@
+"""Ingestão das planilhas de xls/ em snapshots colunares (Arrow IPC).
+
+Cada tabela pode vir de uma planilha única (xls/bd_dados.xlsx) e/ou de uma pasta
+de partições (xls/bd_dados/, um arquivo por EDIÇÃO ou por ano). Cada arquivo é
+lido com o openpyxl uma única vez, normalizado (colunas sem espaços, EDIÇÃO
+como chave numérica e INEP e demais dimensões como categorias; ver esquema.py)
+e gravado em snapshot/<nome>/<partição>.arrow. O snapshot de uma partição só é refeito
+quando o mtime ou o hash do seu arquivo muda: publicar uma edição nova é só
+acrescentar um arquivo, sem reprocessar o histórico. A tabela combinada de cada
+versão é publicada uma vez e mapeada em memória, sem cópia, por todos os
+processos (ver compartilhado.py).
+
+Uso em linha de comando (a partir da raiz do repositório):
+
+    python Resultados_diagnosticas/dados.py [--forcar]
+
+Sem --particionar, atualiza os snapshots e publica as tabelas combinadas; rodado
+no deploy, antes de subir o servidor, deixa o primeiro acesso só com o
+mapeamento dos arquivos (ver aquecimento.py).
+    python Resultados_diagnosticas/dados.py --particionar dados|ama [--por-ano]
+"""
+import argparse
+import errno
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+import compartilhado
+import esquema
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Pastas das planilhas e dos snapshots; as variáveis de ambiente permitem
+# apontar para outro conjunto de dados (por exemplo, os de gerar_dados.py)
+XLS_DIR = os.environ.get('RESULTADOS_DIR_XLS') or os.path.join(BASE_DIR, 'xls')
+SNAPSHOT_DIR = os.environ.get('RESULTADOS_DIR_SNAPSHOT') or os.path.join(BASE_DIR, 'snapshot')
+
+# Planilhas de origem de cada tabela do dashboard
+PLANILHAS = {
+    'login': 'senhas_acesso.xlsx',
+    'dados': 'bd_dados.xlsx',
+    'ama': 'bd_ama.xlsx',
+}
+
+# Incrementar quando normalizar() mudar o formato gravado, para refazer os snapshots
+VERSAO_ESQUEMA = 2
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _nome_snapshot(particao):
+    # 'bd_dados/2025.1.xlsx' -> 'bd_dados__2025.1'
+    return os.path.splitext(particao)[0].replace('/', '__')
+
+
+def _caminhos(nome, particao):
+    pasta = os.path.join(SNAPSHOT_DIR, nome)
+    return os.path.join(pasta, _nome_snapshot(particao) + '.arrow'), os.path.join(pasta, 'manifesto.json')
+
+
+def _ler_manifesto(caminho_manifesto):
+    try:
+        with open(caminho_manifesto, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _gravar_atomico(caminho, escrever):
+    # Grava em arquivo temporário e troca de uma vez, para que outro processo
+    # nunca leia um snapshot pela metade
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+
+def _gravar_manifesto(caminho_manifesto, manifesto):
+    def escrever(temporario):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False)
+    _gravar_atomico(caminho_manifesto, escrever)
+
+
+def normalizar(nome, df):
+    """Aplica a limpeza que antes era feita no dashboard a cada carregamento."""
+    # Remover espaços extras nos nomes das colunas e descartar colunas de índice
+    df.columns = df.columns.str.strip()
+    df = df.drop(columns=[c for c in df.columns if c.startswith('Unnamed:')])
+
+    # EDIÇÃO como chave inteira (ANO * 10 + SEMESTRE) e dimensões como categorias
+    if 'EDIÇÃO' in df.columns:
+        df['EDIÇÃO'] = esquema.chave_edicao(df['EDIÇÃO'])
+    return esquema.categorizar(df)
+
+
+def particoes(nome):
+    """Arquivos de origem de `nome`, relativos a xls/, na ordem em que são combinados.
+
+    A tabela pode vir da planilha única (xls/bd_dados.xlsx), de uma pasta de
+    partições com o mesmo nome (xls/bd_dados/*.xlsx, um arquivo por EDIÇÃO ou por
+    ano) ou dos dois; a planilha única vem primeiro e as partições em ordem
+    alfabética.
+    """
+    planilha = PLANILHAS[nome]
+    encontradas = []
+    if os.path.exists(os.path.join(XLS_DIR, planilha)):
+        encontradas.append(planilha)
+    pasta = os.path.splitext(planilha)[0]
+    if os.path.isdir(os.path.join(XLS_DIR, pasta)):
+        encontradas.extend(
+            f"{pasta}/{arquivo}"
+            for arquivo in sorted(os.listdir(os.path.join(XLS_DIR, pasta)))
+            # Ignora os arquivos de trava que o Excel cria ao abrir uma planilha
+            if arquivo.endswith('.xlsx') and not arquivo.startswith('~$')
+        )
+    if not encontradas:
+        raise FileNotFoundError(errno.ENOENT, 'Arquivo não encontrado', os.path.join(XLS_DIR, planilha))
+    return encontradas
+
+
+def converter_particao(nome, particao, assinatura):
+    """Lê um arquivo de origem e grava o snapshot Arrow da partição.
+
+    Retorna a assinatura acrescida das edições presentes na partição.
+    """
+    caminho_snapshot, _ = _caminhos(nome, particao)
+    df = normalizar(nome, pd.read_excel(os.path.join(XLS_DIR, particao)))
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    def escrever(temporario):
+        with pa.OSFile(temporario, 'wb') as sink:
+            with pa.ipc.new_file(sink, tabela.schema) as writer:
+                writer.write_table(tabela)
+
+    os.makedirs(os.path.dirname(caminho_snapshot), exist_ok=True)
+    _gravar_atomico(caminho_snapshot, escrever)
+    edicoes = sorted(df['EDIÇÃO'].unique().tolist()) if 'EDIÇÃO' in df.columns else []
+    return dict(assinatura, esquema=VERSAO_ESQUEMA, edicoes=edicoes)
+
+
+def atualizar_snapshot(nome, forcar=False):
+    """Garante que os snapshots das partições de `nome` correspondem à origem.
+
+    Só as partições novas ou alteradas são lidas de novo; as removidas da
+    origem têm o snapshot apagado. Retorna o manifesto {partição: mtime,
+    tamanho, sha256 e edições}, na ordem em que as partições são combinadas.
+    """
+    _, caminho_manifesto = _caminhos(nome, '')
+    anterior = _ler_manifesto(caminho_manifesto) or {}
+    manifesto = {}
+    for particao in particoes(nome):
+        origem = os.path.join(XLS_DIR, particao)
+        caminho_snapshot, _ = _caminhos(nome, particao)
+        registro = anterior.get(particao)
+        estado = os.stat(origem)
+
+        if (not forcar and registro is not None and registro.get('esquema') == VERSAO_ESQUEMA
+                and os.path.exists(caminho_snapshot)):
+            # Mesmo mtime e tamanho: nada a fazer, sem nem ler a planilha
+            if registro['mtime_ns'] == estado.st_mtime_ns and registro['tamanho'] == estado.st_size:
+                manifesto[particao] = registro
+                continue
+            # Arquivo tocado mas com o mesmo conteúdo: só atualiza o manifesto
+            sha256 = _hash_arquivo(origem)
+            if registro['sha256'] == sha256:
+                manifesto[particao] = dict(registro, mtime_ns=estado.st_mtime_ns, tamanho=estado.st_size)
+                continue
+        else:
+            sha256 = _hash_arquivo(origem)
+
+        manifesto[particao] = converter_particao(nome, particao, {
+            'mtime_ns': estado.st_mtime_ns,
+            'tamanho': estado.st_size,
+            'sha256': sha256,
+        })
+
+    if manifesto != anterior:
+        for particao in anterior.keys() - manifesto.keys():
+            caminho_snapshot, _ = _caminhos(nome, particao)
+            if os.path.exists(caminho_snapshot):
+                os.remove(caminho_snapshot)
+        _gravar_manifesto(caminho_manifesto, manifesto)
+    return manifesto
+
+
+def versao_manifestos(manifestos):
+    """Identificador curto de um conjunto de manifestos {nome: manifesto}."""
+    h = hashlib.sha256()
+    for nome, manifesto in manifestos.items():
+        for particao, registro in manifesto.items():
+            h.update(f"{nome}/{particao}={registro['sha256']}/{registro.get('esquema')};".encode())
+    return h.hexdigest()[:16]
+
+
+def versao_snapshot(nomes=tuple(PLANILHAS)):
+    """Identificador curto do conjunto de snapshots, derivado dos hashes de origem.
+
+    Muda sempre que o conteúdo de alguma partição muda (ou uma partição entra ou
+    sai); serve de chave para os caches que dependem dos dados (gráficos,
+    agregados etc.).
+    """
+    return versao_manifestos({nome: atualizar_snapshot(nome) for nome in nomes})
+
+
+def ler_particao(nome, particao):
+    """DataFrame de uma partição, lido do snapshot mapeado em memória."""
+    caminho_snapshot, _ = _caminhos(nome, particao)
+    with pa.memory_map(caminho_snapshot, 'r') as source:
+        tabela = pa.ipc.open_file(source).read_all()
+    return tabela.to_pandas()
+
+
+def combinar(partes):
+    """Junta as partições (na ordem do manifesto) numa única tabela.
+
+    Se a mesma EDIÇÃO aparecer em mais de uma partição, valem as linhas da
+    última: um arquivo novo substitui a edição que estava na planilha única.
+    """
+    partes = list(partes)
+    if len(partes) == 1:
+        return partes[0]
+    if 'EDIÇÃO' in partes[-1].columns:
+        vistas = set()
+        for i in range(len(partes) - 1, -1, -1):
+            edicoes = set(partes[i]['EDIÇÃO'].unique())
+            if vistas:
+                partes[i] = partes[i][~partes[i]['EDIÇÃO'].isin(vistas)]
+            vistas |= edicoes
+    df = pd.concat(partes, ignore_index=True)
+    # Categorias diferentes entre partições viram texto no concat
+    return esquema.categorizar(df)
+
+
+def pasta_compartilhada():
+    """Pasta das tabelas publicadas para todos os processos (ver compartilhado.py)."""
+    return os.environ.get('RESULTADOS_DIR_COMPARTILHADO') or os.path.join(SNAPSHOT_DIR, 'compartilhado')
+
+
+def _publicada(nome, manifesto):
+    # A tabela combinada é montada a partir das partições uma única vez por
+    # versão; os demais processos só mapeiam o arquivo publicado
+    return compartilhado.carregar(
+        pasta_compartilhada(), nome, versao_manifestos({nome: manifesto}),
+        lambda: combinar(ler_particao(nome, particao) for particao in manifesto),
+    )
+
+
+def carregar_tabela(nome):
+    """Retorna o DataFrame (somente leitura) de `nome`, compartilhado entre processos."""
+    return _publicada(nome, atualizar_snapshot(nome))
+
+
+class TabelaParticionada:
+    """Tabela mantida em memória que acompanha as mudanças das partições.
+
+    `atualizar` compara o manifesto atual com o da última carga para saber quais
+    edições mudaram e, se algo mudou, anexa a nova versão publicada da tabela.
+    Só as partições novas ou alteradas são lidas das planilhas.
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.manifesto = {}
+        self.df = None
+        self.atualizar()
+
+    def atualizar(self):
+        """Incorpora as mudanças da origem.
+
+        Retorna None se nada mudou; senão, o conjunto de edições afetadas
+        (adicionadas, alteradas ou removidas), vazio em tabelas sem EDIÇÃO.
+        """
+        manifesto = atualizar_snapshot(self.nome)
+        afetadas = set()
+        mudou = False
+        for particao in self.manifesto.keys() - manifesto.keys():
+            afetadas.update(self.manifesto[particao]['edicoes'])
+            mudou = True
+        for particao, registro in manifesto.items():
+            anterior = self.manifesto.get(particao)
+            if anterior is not None and anterior['sha256'] == registro['sha256']:
+                continue
+            afetadas.update(registro['edicoes'])
+            if anterior is not None:
+                afetadas.update(anterior['edicoes'])
+            mudou = True
+        if not mudou:
+            return None
+        self.df = _publicada(self.nome, manifesto)
+        self.manifesto = manifesto
+        return afetadas
+
+
+def particionar(nome, por_ano=False):
+    """Divide a planilha única de `nome` em um arquivo por EDIÇÃO (ou por ano) em xls/<planilha>/."""
+    planilha = PLANILHAS[nome]
+    df = pd.read_excel(os.path.join(XLS_DIR, planilha))
+    coluna_edicao = next(c for c in df.columns if c.strip() == 'EDIÇÃO')
+    chaves = esquema.chave_edicao(df[coluna_edicao])
+    chaves = esquema.ano(chaves).astype(str) if por_ano else esquema.formatar_edicoes(chaves)
+    pasta = os.path.join(XLS_DIR, os.path.splitext(planilha)[0])
+    os.makedirs(pasta, exist_ok=True)
+    for chave, parte in df.groupby(chaves, sort=True):
+        caminho = os.path.join(pasta, f"{chave}.xlsx")
+        parte.to_excel(caminho, index=False)
+        print(f"{nome}: {len(parte)} linhas -> {os.path.relpath(caminho, BASE_DIR)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte as planilhas de xls/ em snapshots Arrow.")
+    parser.add_argument('--forcar', action='store_true', help="Refaz os snapshots mesmo sem mudanças na origem.")
+    parser.add_argument('--particionar', choices=['dados', 'ama'],
+                        help="Divide a planilha única da tabela em um arquivo por EDIÇÃO na pasta de partições.")
+    parser.add_argument('--por-ano', action='store_true', help="Com --particionar, um arquivo por ano.")
+    args = parser.parse_args()
+    if args.particionar:
+        particionar(args.particionar, args.por_ano)
+        return
+    for nome in PLANILHAS:
+        manifesto = atualizar_snapshot(nome, forcar=args.forcar)
+        for particao, registro in manifesto.items():
+            print(f"{nome}: {particao} -> snapshot/{nome}/{_nome_snapshot(particao)}.arrow "
+                  f"(sha256 {registro['sha256'][:12]})")
+        df = _publicada(nome, manifesto)
+        print(f"{nome}: {len(df)} linhas publicadas em {pasta_compartilhada()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,22 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import io
-from io import BytesIO
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from collections import deque
+from functools import partial, wraps
+
+import calculos
+import acesso
+import aquecimento
+import esquema
+import exportacao
+import graficos
+import graficos_vega
+import instrumentacao
+import paginacao
+import recarga
+import variacao
 
 # Configuração da página Streamlit
 st.set_page_config(
@@ -22,34 +35,43 @@ with st.sidebar:
 st.title("📊 Dashboard de Resultados Escolares")
 st.markdown("Bem-vindo ao sistema de acesso aos resultados escolares.")
 
-# Função para carregar os dados
-@st.cache_data
-def load_data(file_path):
-    df = pd.read_excel(file_path)
-    return df
-
-# Carregamento dos dados
-try:
-    df_login = load_data('Resultados_diagnosticas/xls/senhas_acesso.xlsx')
-    df_dados = load_data('Resultados_diagnosticas/xls/bd_dados.xlsx')
-    df_ama = load_data('Resultados_diagnosticas/xls/bd_ama.xlsx')  # Carrega a nova tabela de alfabetização
-    
-    # Remover espaços extras nos nomes das colunas e valores
-    df_login.columns = df_login.columns.str.strip()
-    df_dados.columns = df_dados.columns.str.strip()
-    df_ama.columns = df_ama.columns.str.strip()  # Limpa os nomes das colunas da nova tabela
-    df_login['INEP'] = df_login['INEP'].astype(str).str.strip()
-    df_dados['INEP'] = df_dados['INEP'].astype(str).str.strip()
-    df_ama['INEP'] = df_ama['INEP'].astype(str).str.strip()  # Limpa a coluna INEP da nova tabela
-
-    # Formatar a coluna 'EDIÇÃO' corretamente
-    df_dados['EDIÇÃO'] = df_dados['EDIÇÃO'].astype(float).map(lambda x: f"{x:.1f}")
-    df_ama['EDIÇÃO'] = df_ama['EDIÇÃO'].astype(int).astype(str)
-    #df_dados['EDIÇÃO'] = df_dados['EDIÇÃO'].astype(int).astype(str)
-
-except FileNotFoundError as e:
-    st.error(f"Erro: Arquivo não encontrado: {e.filename}. Verifique os arquivos.")
-    st.stop()
+# Dados carregados a partir dos snapshots Arrow gerados por dados.py, com
+# recarga a quente: uma thread verifica as planilhas e, quando mudam, monta e
+# publica um novo snapshot (tabelas, índices, variações e cubo) sem bloquear as
+# sessões. cache_resource mantém um único recarregador por servidor e as
+# tabelas são compartilhadas sem cópia; por isso nunca são alteradas no script
+@st.cache_resource
+def load_recarregador():
+    return recarga.Recarregador()
+
+# Cache de gráficos renderizados compartilhado entre as sessões
+CAPACIDADE_CACHE_GRAFICOS = 64
+
+@st.cache_resource
+def load_cache_graficos():
+    cache = graficos.CacheGraficos(capacidade=CAPACIDADE_CACHE_GRAFICOS)
+    # Gráficos de versões anteriores dos dados são descartados a cada troca
+    load_recarregador().ao_trocar(
+        lambda novo, anterior: cache.descartar(lambda chave: chave[0] != novo.versao)
+    )
+    return cache
+
+# Onde os gráficos são desenhados na tela: 'png' (matplotlib no servidor) ou
+# 'vega' (Vega-Lite no navegador, com só as séries agregadas). Nos dois modos o
+# PNG de download é renderizado no servidor, só quando o usuário clica
+MODO_GRAFICOS = os.environ.get('RESULTADOS_GRAFICOS', 'png')
+
+# Aquecimento dos dados e gráficos em segundo plano ao iniciar o servidor
+# (RESULTADOS_AQUECIMENTO=0 desativa)
+AQUECIMENTO = os.environ.get('RESULTADOS_AQUECIMENTO', '1') != '0'
+
+# Medição das etapas deste rerun (tempo, linhas e memória de carga, acesso,
+# filtro, agregação, gráfico e codificação), gravada no log de etapas ao final
+medicao = instrumentacao.iniciar('rerun', raiz=True)
+
+# Converte as opções "TODAS"/"TODOS" dos seletores em ausência de filtro
+# (a mesma conversão da exportação pela linha de comando)
+filtro = calculos.filtro
 
 # Função de logout
 def logout():
@@ -57,25 +79,576 @@ def logout():
     st.session_state.escola_logada = None
     st.success("Logout realizado com sucesso!")
 
-# Função para formatar a variação
-def formatar_variacao(valor, eh_percentual=False):
-    if valor > 0:
-        sinal = "▲"
-        cor = "green"
-    elif valor < 0:
-        sinal = "▼"
-        cor = "red"
+# Limite de tentativas de login por INEP, compartilhado entre as sessões
+@st.cache_resource
+def load_limite_tentativas():
+    return acesso.LimiteTentativas()
+
+# Resultados das abas memorizados pelas próprias entradas (versão dos dados,
+# escola e filtros da aba): um rerun só recalcula o que mudou. Os índices,
+# variações e cubo vêm do snapshot, que entra
+# como parâmetro com "_" (fora da chave), representado pela versão dos dados.
+# Compartilhados entre as sessões como as tabelas: nunca são alterados no script
+CAPACIDADE_CACHE_ABAS = 256
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('filtro')
+def linhas_escola(_snapshot, versao, escola_chave):
+    filtro_escola = dict(escola_chave or ())
+    return _snapshot.indices['dados'].selecionar(**filtro_escola), _snapshot.indices['ama'].selecionar(**filtro_escola)
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('filtro')
+def calcular_aba_avaliacao(_snapshot, versao, escola_chave, etapa, componente):
+    filtro_escola = dict(escola_chave or ())
+
+    # Ciclos das edições: os da escola vêm prontos do resumo; para a rede toda
+    # (ou um nome de escola ambíguo), classificados a partir das linhas
+    inep = _snapshot.resumo.inep(**filtro_escola)
+    if inep is not None:
+        periodos = _snapshot.resumo.periodos(inep)
     else:
-        sinal = ""
-        cor = "blue"
-    
-    if eh_percentual:
-        return f'<p style="color:{cor};">{sinal} {valor:.2f}%</p>'
+        df_escola, _ = linhas_escola(_snapshot, versao, escola_chave)
+        periodos = calculos.periodos_por_edicao(df_escola)
+
+    # Filtrar dados conforme seleção (interseção dos índices)
+    df_filtrado = calculos.resultados_filtrados(
+        _snapshot.indices['dados'], periodos, filtro(etapa), filtro(componente), **filtro_escola
+    )
+
+    # Variação entre ciclos: recorte da tabela pré-calculada (formatada só na página exibida)
+    variacao_df = variacao.para_tabela(variacao.filtrar_variacoes(
+        _snapshot.variacoes,
+        ETAPA=filtro(etapa),
+        COMP_CURRICULAR=filtro(componente),
+        **filtro_escola
+    ))
+    return df_filtrado.drop(columns=['Unnamed: 0'], errors='ignore'), variacao_df
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('filtro')
+def calcular_aba_alfabetizacao(_snapshot, versao, escola_chave):
+    _, df_escola_ama = linhas_escola(_snapshot, versao, escola_chave)
+    exibicao = esquema.para_exibicao(df_escola_ama.drop(columns=['Unnamed: 0'], errors='ignore'))
+    # Série dos gráficos já em ordem de EDIÇÃO no resumo da escola; para a rede
+    # toda, as linhas ordenadas pela EDIÇÃO em ordem crescente
+    inep = _snapshot.resumo.inep(**dict(escola_chave or ()))
+    if inep is not None:
+        return exibicao, _snapshot.resumo.serie_alfabetizacao(inep)
+    return exibicao, calculos.alfabetizacao_ordenada(df_escola_ama)
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('agregacao')
+def calcular_aba_regiao(_snapshot, versao, escola, etapa, componente, regiao):
+    # Desempenho médio por região e edição consultado no cubo pré-agregado
+    return calculos.desempenho_regiao_edicao(_snapshot.cubo, filtro(etapa), filtro(componente), filtro(regiao), escola)
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('agregacao')
+def regioes_escola(_snapshot, versao, escola):
+    # Regiões da escola selecionada, vindas do cubo
+    return sorted(['TODAS'] + calculos.regioes_disponiveis(_snapshot.cubo, escola))
+
+# Ordem das linhas de uma tabela da aba por coluna e sentido, calculada uma vez;
+# `chave` identifica a tabela (versão, escola, filtros), que entra com "_"
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('filtro')
+def ordem_linhas(_df, chave, coluna, crescente):
+    return paginacao.ordem(_df, coluna, crescente)
+
+# Tabela paginada no servidor: só a página visível, com as colunas escolhidas,
+# é formatada por `formatar` e enviada ao navegador
+def tabela_paginada(df, chave, prefixo, formatar=esquema.para_exibicao, configuracao=None):
+    colunas = df.columns.tolist()
+    col1, col2, col3, col4, col5 = st.columns([4, 2, 1, 1, 1])
+    with col1:
+        visiveis = st.multiselect("Colunas", colunas, default=colunas, key=f"{prefixo}_colunas")
+    with col2:
+        ordenar_por = st.selectbox("Ordenar por", ['(ordem original)'] + colunas, key=f"{prefixo}_ordenar")
+    with col3:
+        crescente = st.selectbox("Sentido", ['Crescente', 'Decrescente'], key=f"{prefixo}_sentido") == 'Crescente'
+    with col4:
+        tamanho = st.selectbox("Linhas por página", paginacao.TAMANHOS, key=f"{prefixo}_tamanho")
+    paginas = paginacao.total_paginas(len(df), tamanho)
+    # A página guardada pode não existir mais depois de uma troca de filtro
+    if st.session_state.get(f"{prefixo}_pagina", 1) > paginas:
+        st.session_state[f"{prefixo}_pagina"] = paginas
+    with col5:
+        numero = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key=f"{prefixo}_pagina")
+
+    coluna = None if ordenar_por == '(ordem original)' else ordenar_por
+    posicoes = ordem_linhas(df, chave, coluna, crescente)
+    trecho = paginacao.pagina(df, posicoes, numero, tamanho, visiveis or colunas)
+    with instrumentacao.etapa('codificacao', prefixo) as registro:
+        st.dataframe(
+            registro.resultado(formatar(trecho)), width='stretch', hide_index=True, column_config=configuracao
+        )
+    inicio = (numero - 1) * tamanho
+    st.caption(f"Linhas {min(inicio + 1, len(df))}–{inicio + len(trecho)} de {len(df)}")
+
+# Gráficos de alfabetização e de região no cache compartilhado. A chave
+# identifica versão, escola, filtros e tipo; as abas e o aquecimento usam as
+# mesmas funções, então os gráficos pré-renderizados são os que as abas pedem
+def graficos_alfabetizacao(cache, snapshot, escola_chave, df_escola_ama):
+    barras = cache.obter(
+        (snapshot.versao, escola_chave, None, None, None, 'alfabetizacao_barras'),
+        partial(graficos.grafico_alfabetizacao_barras, df_escola_ama),
+    )
+    linhas = cache.obter(
+        (snapshot.versao, escola_chave, None, None, None, 'alfabetizacao_linhas'),
+        partial(graficos.grafico_alfabetizacao_linhas, df_escola_ama),
+    )
+    return barras, linhas
+
+def grafico_regiao(cache, snapshot, escola_chave, etapa, componente, regiao, df_regiao_edicao):
+    return cache.obter(
+        (snapshot.versao, escola_chave, etapa, componente, regiao, 'regiao_edicao'),
+        partial(graficos.grafico_regiao_edicao, df_regiao_edicao, etapa, componente),
+        dpi=300, bbox_inches='tight'
+    )
+
+# Gráfico na tela conforme MODO_GRAFICOS: o PNG do cache ou, no modo 'vega',
+# os dados e a especificação montados por `especificar` (graficos_vega.py)
+def exibir_grafico(grafico, especificar):
+    if MODO_GRAFICOS == 'vega':
+        with instrumentacao.etapa('grafico', especificar.func.__name__) as registro:
+            dados_grafico, especificacao = especificar()
+            registro.resultado(dados_grafico)
+        st.vega_lite_chart(dados_grafico, especificacao, width='stretch')
+    else:
+        st.image(grafico.png_tela, width='stretch')
+
+# Exportação da tabela inteira (não só da página) no formato escolhido; o
+# arquivo é escrito em blocos só quando o usuário clica no botão
+def botao_exportar(df, nome_arquivo, prefixo):
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        formato = st.selectbox("Formato", list(exportacao.FORMATOS), key=f"{prefixo}_formato", label_visibility='collapsed')
+    with col2:
+        st.download_button(
+            label=f"Baixar Tabela ({formato.upper()})",
+            data=partial(exportacao.para_bytes, df, formato),
+            file_name=f"{nome_arquivo}.{formato}",
+            mime=exportacao.FORMATOS[formato],
+            key=f"{prefixo}_exportar",
+        )
+
+# Variação com ▲/▼ em texto e cor por Styler, vetorizados sobre a página exibida
+def estilo_variacoes(trecho):
+    texto = variacao.formatar_variacoes(trecho)
+    cores = variacao.cores_variacoes(trecho)
+    if cores.columns.empty:
+        return texto
+    return texto.style.apply(lambda _: cores, axis=None, subset=list(cores.columns))
+
+# Indicadores da escola selecionada, lidos do resumo por escola do snapshot
+def _numero(valor, formato):
+    return "N/A" if pd.isna(valor) else format(valor, formato)
+
+def metricas_escola(snapshot, filtro_escola):
+    inep = snapshot.resumo.inep(**filtro_escola)
+    if inep is None:
+        return
+    linha = snapshot.resumo.tabela.loc[inep]
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric(
+        "Desempenho Médio (última edição)", _numero(linha['DESEMPENHO_FINAL'], '.2f'),
+        delta=None if pd.isna(linha['DESEMPENHO_FINAL']) else
+        f"{linha['DESEMPENHO_FINAL'] - linha['DESEMPENHO_INICIAL']:+.2f} desde a primeira edição",
+    )
+    col2.metric("Tendência do Desempenho (por edição)", _numero(linha['TENDENCIA_DESEMPENHO'], '+.2f'))
+    col3.metric(
+        "Posição na Região",
+        "N/A" if pd.isna(linha['POSICAO_REGIAO']) else f"{linha['POSICAO_REGIAO']}º de {linha['ESCOLAS_REGIAO']}",
+        help=f"Pelo desempenho médio da última edição, entre as escolas da {linha['REGIAO']}",
+    )
+    col4.metric(
+        "Alfabetização (última edição)", _numero(linha['ALFABETIZACAO_FINAL'], '.1f') + ('' if pd.isna(linha['ALFABETIZACAO_FINAL']) else '%'),
+        delta=None if pd.isna(linha['ALFABETIZACAO_FINAL']) else
+        f"{linha['ALFABETIZACAO_FINAL'] - linha['ALFABETIZACAO_INICIAL']:+.1f} p.p. desde a primeira edição",
+    )
+    col5.metric("Tendência da Alfabetização (p.p. por edição)", _numero(linha['TENDENCIA_ALFABETIZACAO'], '+.2f'))
+
+# Visão geral do administrador: uma linha por escola, com as séries como minigráficos
+COLUNAS_VISAO_GERAL = {
+    'ESCOLA': st.column_config.TextColumn("Escola"),
+    'INEP': st.column_config.TextColumn("INEP"),
+    'REGIAO': st.column_config.TextColumn("Região"),
+    'POSICAO_REGIAO': st.column_config.NumberColumn("Posição na região"),
+    'DESEMPENHO_INICIAL': st.column_config.NumberColumn("Desempenho inicial", format="%.2f"),
+    'DESEMPENHO_FINAL': st.column_config.NumberColumn("Desempenho final", format="%.2f"),
+    'TENDENCIA_DESEMPENHO': st.column_config.NumberColumn("Tendência do desempenho", format="%+.2f"),
+    'SERIE_DESEMPENHO': st.column_config.LineChartColumn("Desempenho por edição"),
+    'ALFABETIZACAO_INICIAL': st.column_config.NumberColumn("Alfabetização inicial (%)", format="%.1f"),
+    'ALFABETIZACAO_FINAL': st.column_config.NumberColumn("Alfabetização final (%)", format="%.1f"),
+    'TENDENCIA_ALFABETIZACAO': st.column_config.NumberColumn("Tendência da alfabetização", format="%+.2f"),
+    'SERIE_ALFABETIZACAO': st.column_config.LineChartColumn("Alfabetização por edição", y_min=0, y_max=100),
+}
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+def visao_geral_escolas(_snapshot, versao):
+    return _snapshot.resumo.tabela.reset_index()[list(COLUNAS_VISAO_GERAL)]
+
+# Comparação de escolas (só administrador): até MAX_ESCOLAS_COMPARACAO escolas
+# calculadas juntas, numa única passagem agrupada sobre o índice
+MAX_ESCOLAS_COMPARACAO = 10
+
+COLUNAS_COMPARACAO = {
+    'Desempenho CICLO 1': st.column_config.NumberColumn(format="%.2f"),
+    'Desempenho CICLO 2': st.column_config.NumberColumn(format="%.2f"),
+    'Posição na Região': st.column_config.NumberColumn(),
+    'Alfabetização (última edição)': st.column_config.NumberColumn(format="%.1f"),
+    'Tendência da Alfabetização': st.column_config.NumberColumn(format="%+.2f"),
+}
+
+@st.cache_resource(max_entries=CAPACIDADE_CACHE_ABAS, show_spinner=False)
+@instrumentacao.medido('agregacao')
+def calcular_comparacao(_snapshot, versao, ineps, etapa, componente):
+    return calculos.comparar_escolas(
+        _snapshot.indices['dados'], _snapshot.resumo, ineps, filtro(etapa), filtro(componente)
+    )
+
+# Medições da sessão mostradas no painel de desempenho (as mais recentes)
+HISTORICO_MEDICOES = 20
+
+def registrar_medicao(medicao):
+    instrumentacao.concluir(medicao)
+    if 'historico_medicoes' not in st.session_state:
+        st.session_state.historico_medicoes = deque(maxlen=HISTORICO_MEDICOES)
+    st.session_state.historico_medicoes.append(medicao)
+
+# O rerun só de um fragmento tem a própria medição; no rerun completo a aba
+# registra na medição do script. A decisão vem do contexto da execução, não da
+# medição ativa na thread: um rerun completo interrompido (st.stop, exceção ou
+# RerunException) deixa a medição dele aberta, e ela é descartada aqui em vez
+# de receber as etapas do fragmento
+def rerun_de_fragmento():
+    contexto = get_script_run_ctx()
+    return contexto is not None and bool(contexto.fragment_ids_this_run)
+
+def instrumentado(aba):
+    @wraps(aba)
+    def executar(*args, **kwargs):
+        if not rerun_de_fragmento():
+            return aba(*args, **kwargs)
+        medicao_aba = instrumentacao.iniciar(aba.__name__, raiz=True)
+        try:
+            return aba(*args, **kwargs)
+        finally:
+            registrar_medicao(medicao_aba)
+    return executar
+
+# Painel de desempenho (só administrador): etapas do último rerun completo e
+# resumo das medições recentes da sessão, inclusive dos fragmentos
+def painel_desempenho(medicao):
+    with st.expander("⏱️ Desempenho por etapa", expanded=True):
+        st.caption(f"Rerun completo: {medicao.duracao_ms:.0f} ms, dados versão {versao_dados}")
+        st.dataframe(medicao.tabela(), width='stretch', hide_index=True)
+        resumo = pd.DataFrame([
+            {'rotulo': m.rotulo, 'duracao_ms': m.duracao_ms, **m.totais()}
+            for m in reversed(st.session_state.get('historico_medicoes', ()))
+        ])
+        st.dataframe(resumo, width='stretch', hide_index=True)
+        if medicao.perfil:
+            st.caption(f"Perfil gravado em {medicao.perfil}")
+        if AQUECIMENTO:
+            estado = load_aquecimento()
+            if estado.terminado:
+                st.caption(f"Aquecimento: {len(estado.concluidas)} tarefas em {estado.medicao.duracao_ms:.0f} ms")
+            else:
+                st.caption(f"Aquecimento em andamento: {len(estado.concluidas)} tarefas concluídas")
+
+# Cada aba é um fragmento: mudar um seletor da aba reexecuta só a aba, com os
+# mesmos argumentos (snapshot e escola) do último rerun completo
+@st.fragment
+@instrumentado
+def aba_avaliacao(snapshot, filtro_escola):
+    escola_chave = tuple(filtro_escola.items()) if filtro_escola else None
+    df_escola, _ = linhas_escola(snapshot, snapshot.versao, escola_chave)
+
+    # Filtros por ETAPA e COMP_CURRICULAR
+    etapas = df_escola['ETAPA'].unique().tolist()
+    etapas.insert(0, 'TODAS')  # Adiciona a opção "TODAS"
+    componentes = df_escola['COMP_CURRICULAR'].unique().tolist()
+    componentes.insert(0, 'TODOS')  # Adiciona a opção "TODOS"
+
+    # Para outros INEPs, mostrar apenas ETAPA e COMPONENTE CURRICULAR
+    col1, col2 = st.columns(2)
+    with col1:
+            etapa_selecionada = st.selectbox("Selecione a ETAPA", sorted(etapas), key="etapa_selectbox_regiao")
+    with col2:
+            componente_selecionado = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes, key="componente_selectbox_regiao")
+
+    df_filtrado, variacao_df = calcular_aba_avaliacao(
+        snapshot, snapshot.versao, escola_chave, etapa_selecionada, componente_selecionado
+    )
+    chave_tabelas = (snapshot.versao, escola_chave, etapa_selecionada, componente_selecionado)
+
+    # Exibir resultados da escola logada (com filtro aplicado), paginados
+    st.subheader(f"Resultados Filtrados - {etapa_selecionada} - {componente_selecionado}")
+    tabela_paginada(df_filtrado, chave_tabelas + ('resultados',), 'resultados')
+    botao_exportar(df_filtrado, "resultados_filtrados", 'resultados')
+
+    # Variação entre ciclos (com filtro aplicado), paginada
+    if not variacao_df.empty:
+        st.subheader("Tabela de Variação Entre Ciclos")
+        tabela_paginada(variacao_df, chave_tabelas + ('variacoes',), 'variacoes', estilo_variacoes)
+        botao_exportar(variacao_df, "variacao_ciclos", 'variacoes')
+    else:
+        st.write("Não há dados suficientes para calcular a variação entre os ciclos.")
+
+    # Exibir gráficos de barras por PERIODO (após a tabela de variações)
+    if etapa_selecionada != 'TODAS' and componente_selecionado != 'TODOS':
+        if not df_filtrado.empty:
+            st.subheader(f"Desempenho Médio por Período - {etapa_selecionada} - {componente_selecionado}")
+
+            # Gráfico renderizado uma vez por combinação de filtros
+            grafico = cache_graficos.obter(
+                (snapshot.versao, escola_chave, etapa_selecionada, componente_selecionado, None, 'periodos'),
+                partial(graficos.grafico_periodos, df_filtrado, etapa_selecionada, componente_selecionado),
+            )
+
+            # Exibir o gráfico
+            exibir_grafico(grafico, partial(graficos_vega.grafico_periodos, df_filtrado, etapa_selecionada, componente_selecionado))
+
+            # Botão de download do gráfico (PNG gerado só ao clicar)
+            st.download_button(
+                label="Baixar Gráfico (PNG)",
+                data=grafico.png_download,
+                file_name="grafico_desempenho.png",
+                mime="image/png"
+            )
+        else:
+            st.write("Não há dados disponíveis para os filtros selecionados.")
+    else:
+        st.info("Os gráficos são exibidos apenas quando uma ETAPA e um COMPONENTE CURRICULAR específicos são selecionados.")
+
+@st.fragment
+@instrumentado
+def aba_alfabetizacao(snapshot, filtro_escola):
+    escola_chave = tuple(filtro_escola.items()) if filtro_escola else None
+
+    # Exibir resultados da tabela de alfabetização
+    st.subheader("Percentual de Alfabetização")
+    exibicao, df_escola_ama = calcular_aba_alfabetizacao(snapshot, snapshot.versao, escola_chave)
+    if not df_escola_ama.empty:
+        with instrumentacao.etapa('codificacao', 'alfabetizacao') as registro:
+            st.dataframe(registro.resultado(exibicao), width='stretch')
+
+        # Gráfico de barras verticais para o percentual de alfabetização por edição
+        st.subheader("Gráfico de Barras - Percentual de Alfabetização por Edição")
+
+        grafico_bar, grafico_line = graficos_alfabetizacao(cache_graficos, snapshot, escola_chave, df_escola_ama)
+
+        # Exibir o gráfico
+        exibir_grafico(grafico_bar, partial(graficos_vega.grafico_alfabetizacao_barras, df_escola_ama))
+
+        # Botão de download do gráfico
+        st.download_button(
+            label="Baixar Gráfico (PNG)",
+            data=grafico_bar.png_download,
+            file_name="grafico_alfabetizacao_barras.png",
+            mime="image/png"
+        )
+
+        # Gráfico de linhas para o percentual de alfabetização por edição
+        st.subheader("Gráfico de Linhas - Percentual de Alfabetização por Edição")
+
+        # Exibir o gráfico
+        exibir_grafico(grafico_line, partial(graficos_vega.grafico_alfabetizacao_linhas, df_escola_ama))
+
+        # Botão de download do gráfico
+        st.download_button(
+            label="Baixar Gráfico (PNG)",
+            data=grafico_line.png_download,
+            file_name="grafico_alfabetizacao_linhas.png",
+            mime="image/png"
+        )
     else:
-        return f'<p style="color:{cor};">{sinal} {valor:.2f}</p>'
+        st.warning("Não há dados disponíveis para o percentual de alfabetização.")
 
-# Credenciais mestre
-INEP_MESTRE = '2307650'
+@st.fragment
+@instrumentado
+def aba_regiao(snapshot, filtro_escola):
+    escola_chave = tuple(filtro_escola.items()) if filtro_escola else None
+
+    # Nova aba REGIAO
+    st.subheader("Desempenho Médio por Região e Edição")
+
+    # Verificar se é o INEP mestre
+    if 'escola_logada' in st.session_state:
+        is_inep_mestre = st.session_state.escola_logada == 'TODAS'  # INEP mestre é identificado como 'TODAS'
+    else:
+        is_inep_mestre = False  # Caso contrário, não é o INEP mestre
+
+    if not is_inep_mestre:
+        # Se não for o INEP mestre, exibir uma mensagem de alerta
+        st.warning("Não há dados disponíveis para esse INEP.")
+        return
+
+    # Se for o INEP mestre, mostrar seletor de REGIÃO
+    df_escola, _ = linhas_escola(snapshot, snapshot.versao, escola_chave)
+    etapas = ['TODAS'] + df_escola['ETAPA'].unique().tolist()
+    componentes = ['TODOS'] + df_escola['COMP_CURRICULAR'].unique().tolist()
+    escola = filtro_escola.get('ESCOLA')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        etapa_selecionada_regiao = st.selectbox("Selecione a ETAPA", sorted(etapas), key="etapa_selectbox_regiao_tab3_mestre")
+    with col2:
+        componente_selecionado_regiao = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes, key="componente_selectbox_regiao_tab3_mestre")
+    with col3:
+        # Seletor de REGIAO
+        regiao_selecionada = st.selectbox("Selecione a REGIAO", regioes_escola(snapshot, snapshot.versao, escola), key="regiao_selectbox_tab3_mestre")
+
+    df_regiao_edicao = calcular_aba_regiao(
+        snapshot, snapshot.versao, escola, etapa_selecionada_regiao, componente_selecionado_regiao, regiao_selecionada
+    )
+
+    if not df_regiao_edicao.empty:
+        grafico_regiao_edicao = grafico_regiao(
+            cache_graficos, snapshot, escola_chave, etapa_selecionada_regiao, componente_selecionado_regiao,
+            regiao_selecionada, df_regiao_edicao
+        )
+
+        # Exibir o gráfico
+        exibir_grafico(
+            grafico_regiao_edicao,
+            partial(graficos_vega.grafico_regiao_edicao, df_regiao_edicao, etapa_selecionada_regiao, componente_selecionado_regiao),
+        )
+
+        # Botão de download do gráfico (alta resolução, gerado só ao clicar)
+        st.download_button(
+            label="Baixar Gráfico (PNG)",
+            data=grafico_regiao_edicao.png_download,
+            file_name="grafico_desempenho_regiao_edicao.png",
+            mime="image/png"
+        )
+
+        # Exportação das médias por região e edição usadas no gráfico
+        botao_exportar(df_regiao_edicao, "desempenho_regiao_edicao", 'regiao')
+
+    else:
+        st.warning("Não há dados disponíveis para a região e edição selecionadas.")
+
+@st.fragment
+@instrumentado
+def aba_escolas(snapshot):
+    st.subheader("Visão Geral das Escolas")
+    st.caption(
+        "Primeiro e último resultado, tendência (inclinação por edição) e posição na região pelo "
+        "desempenho médio da última edição. Ordene por qualquer coluna para comparar as escolas."
+    )
+    visao = visao_geral_escolas(snapshot, snapshot.versao)
+    tabela_paginada(visao, (snapshot.versao, 'escolas'), 'escolas', configuracao=COLUNAS_VISAO_GERAL)
+
+@st.fragment
+@instrumentado
+def aba_comparacao(snapshot):
+    st.subheader("Comparação entre Escolas")
+    st.caption(
+        "Desempenho médio de cada ciclo (média das edições do ciclo) e a diferença entre eles. "
+        "Não é a variação entre os semestres do mesmo ano da aba AVALIAÇÃO DIAGNÓSTICA MUNICIPAL."
+    )
+    resumo_escolas = snapshot.resumo.tabela
+    df_rede, _ = linhas_escola(snapshot, snapshot.versao, None)
+    etapas = ['TODAS'] + df_rede['ETAPA'].unique().tolist()
+    componentes = ['TODOS'] + df_rede['COMP_CURRICULAR'].unique().tolist()
+
+    ineps = st.multiselect(
+        f"Selecione as escolas (até {MAX_ESCOLAS_COMPARACAO})",
+        resumo_escolas.index.tolist(),
+        format_func=lambda inep: f"{resumo_escolas.at[inep, 'ESCOLA']} ({inep})",
+        max_selections=MAX_ESCOLAS_COMPARACAO,
+        key="comparacao_escolas",
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        etapa_selecionada = st.selectbox("Selecione a ETAPA", sorted(etapas), key="etapa_selectbox_comparacao")
+    with col2:
+        componente_selecionado = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes, key="componente_selectbox_comparacao")
+
+    if not ineps:
+        st.info("Selecione ao menos uma escola para comparar.")
+        return
+
+    # Uma entrada de cache por seleção, qualquer que seja a ordem dos cliques
+    ineps = tuple(sorted(ineps))
+    series_escolas, tabela = calcular_comparacao(
+        snapshot, snapshot.versao, ineps, etapa_selecionada, componente_selecionado
+    )
+
+    # Variação entre ciclos e indicadores do resumo, uma linha por escola
+    with instrumentacao.etapa('codificacao', 'comparacao') as registro:
+        st.dataframe(
+            registro.resultado(estilo_variacoes(tabela)), width='stretch', hide_index=True,
+            column_config=COLUNAS_COMPARACAO
+        )
+    botao_exportar(tabela, "comparacao_escolas", 'comparacao')
+
+    if series_escolas.empty:
+        st.warning("Não há dados disponíveis para as escolas e filtros selecionados.")
+        return
+
+    # Um só gráfico com a linha de cada escola
+    grafico_comparacao = cache_graficos.obter(
+        (snapshot.versao, ineps, etapa_selecionada, componente_selecionado, None, 'comparacao'),
+        partial(graficos.grafico_comparacao, series_escolas, etapa_selecionada, componente_selecionado),
+    )
+    exibir_grafico(
+        grafico_comparacao,
+        partial(graficos_vega.grafico_comparacao, series_escolas, etapa_selecionada, componente_selecionado),
+    )
+    st.download_button(
+        label="Baixar Gráfico (PNG)",
+        data=grafico_comparacao.png_download,
+        file_name="grafico_comparacao_escolas.png",
+        mime="image/png"
+    )
+
+# Aquecimento ao iniciar o servidor (uma vez por processo, em segundo plano):
+# snapshot com índices, variações, cubo e resumo, importação do matplotlib e os
+# gráficos que o administrador vê primeiro
+# Gráficos da aba REGIAO pré-renderizados (os primeiros da lista de prioridade):
+# cada um ocupa a CPU do servidor por até meio segundo e uma vaga do cache
+GRAFICOS_AQUECIMENTO = 12
+
+def aquecer_regiao(cache, snapshot, etapa, componente, regiao):
+    df_regiao_edicao = calculos.desempenho_regiao_edicao(snapshot.cubo, filtro(etapa), filtro(componente), filtro(regiao))
+    if not df_regiao_edicao.empty:
+        _ = grafico_regiao(cache, snapshot, None, etapa, componente, regiao, df_regiao_edicao).png_tela
+
+def tarefas_aquecimento():
+    yield 'snapshot', load_recarregador
+    snapshot = load_recarregador().atual
+    cache = load_cache_graficos()
+    if MODO_GRAFICOS == 'vega':
+        # Gráficos desenhados no navegador: o matplotlib fica para os downloads
+        return
+    yield 'matplotlib', graficos.preparar
+
+    # Visão inicial do administrador (todas as escolas): alfabetização da rede
+    # e a seleção padrão da aba REGIAO; depois a rede em cada ETAPA e COMPONENTE
+    df_ama = calculos.alfabetizacao_ordenada(snapshot.tabelas['ama'])
+    yield 'alfabetizacao', lambda: [grafico.png_tela for grafico in graficos_alfabetizacao(cache, snapshot, None, df_ama)]
+    df_dados = snapshot.tabelas['dados']
+    etapas = sorted(['TODAS'] + df_dados['ETAPA'].unique().tolist())
+    componentes = ['TODOS'] + df_dados['COMP_CURRICULAR'].unique().tolist()
+    regioes = sorted(['TODAS'] + calculos.regioes_disponiveis(snapshot.cubo))
+    combinacoes = [(etapas[0], componentes[0], regioes[0])]
+    combinacoes += [(etapa, componente, 'TODAS') for etapa in etapas for componente in componentes]
+    for etapa, componente, regiao in list(dict.fromkeys(combinacoes))[:GRAFICOS_AQUECIMENTO]:
+        yield (
+            f"regiao_edicao {etapa} {componente} {regiao}",
+            partial(aquecer_regiao, cache, snapshot, etapa, componente, regiao),
+        )
+
+@st.cache_resource(show_spinner=False)
+def load_aquecimento():
+    return aquecimento.Aquecimento(tarefas_aquecimento)
+
+# Iniciado depois de definidas todas as funções que as tarefas usam
+if AQUECIMENTO:
+    load_aquecimento()
 
 # Barra lateral para login
 with st.sidebar:
@@ -84,33 +657,58 @@ with st.sidebar:
 
     with st.form(key='login_form'):
         inep = st.text_input('INEP').strip()
+        codigo_acesso = st.text_input('Código de acesso (se houver)', type='password')
         login_button = st.form_submit_button('Login')
 
+# Primeiro acesso depois do deploy: enquanto o aquecimento ainda monta o
+# snapshot, quem só abriu a página vê o formulário sem esperar; a carga abaixo
+# espera o aquecimento apenas quando há um login a verificar ou uma sessão já
+# autenticada
+if (AQUECIMENTO and not load_aquecimento().concluiu('snapshot')
+        and not login_button and not st.session_state.get('login_success')):
+    st.info("Preparando os dados. Você já pode informar o INEP da escola.")
+    registrar_medicao(medicao)
+    st.stop()
+
+# Carregamento dos dados (depois do formulário de login, que já aparece enquanto
+# o aquecimento termina de montar o snapshot)
+try:
+    # O snapshot é lido uma vez por rerun: o script inteiro usa a mesma versão
+    with instrumentacao.etapa('carga', 'snapshot'):
+        snapshot = load_recarregador().atual
+    df_login = snapshot.tabelas['login']
+    df_dados = snapshot.tabelas['dados']
+    df_ama = snapshot.tabelas['ama']  # Carrega a nova tabela de alfabetização
+    # Limpeza de colunas e tipos (EDIÇÃO numérica, dimensões categóricas) já vêm
+    # prontos do snapshot; a EDIÇÃO só vira texto na exibição (esquema.py)
+
+except FileNotFoundError as e:
+    st.error(f"Erro: Arquivo não encontrado: {e.filename}. Verifique os arquivos.")
+    st.stop()
+
+# Versão dos dados carregados, usada nas chaves dos caches derivados
+versao_dados = snapshot.versao
+cache_graficos = load_cache_graficos()
+
 # Verificação de login
 if 'login_success' not in st.session_state:
     st.session_state.login_success = False
 
 if login_button:
-    if inep == INEP_MESTRE:
+    # Consulta às credenciais da versão atual dos dados (INEP -> escola e perfil)
+    with instrumentacao.etapa('acesso', 'autenticar'):
+        credencial, erro = acesso.autenticar(snapshot.credenciais, load_limite_tentativas(), inep, codigo_acesso)
+    if erro is not None:
+        st.error(erro)
+        st.session_state.login_success = False
+    elif credencial.perfil == acesso.PERFIL_ADMIN:
         st.session_state.login_success = True
         st.session_state.escola_logada = 'TODAS'
         st.success('Login realizado com sucesso como administrador!')
     else:
-        usuario = df_login[df_login['INEP'] == inep]
-        if not usuario.empty:
-            # Verifica se o INEP existe em df_dados
-            escola_filtrada = df_dados[df_dados['INEP'] == inep]
-            if not escola_filtrada.empty:
-                st.session_state.login_success = True
-                st.session_state.escola_logada = inep
-                nome_escola = escola_filtrada['ESCOLA'].iloc[0]  # Pega o nome da escola
-                st.success(f'Login realizado com sucesso! Bem-vindo, {nome_escola}!')
-            else:
-                st.error('INEP não encontrado nos dados das escolas.')
-                st.session_state.login_success = False
-        else:
-            st.error('INEP incorreto.')
-            st.session_state.login_success = False
+        st.session_state.login_success = True
+        st.session_state.escola_logada = inep
+        st.success(f'Login realizado com sucesso! Bem-vindo, {credencial.escola}!')
 
 # Exibir dashboard após login
 if st.session_state.login_success:
@@ -123,446 +721,58 @@ if st.session_state.login_success:
         escolas.insert(0, 'TODAS')  # Adiciona a opção "TODAS"
         escola_selecionada = st.selectbox("Selecione a ESCOLA", escolas, key='escola_seletor')
         
-        if escola_selecionada == 'TODAS':
-            df_escola = df_dados.copy()
-            df_escola_ama = df_ama.copy()  # Filtra a tabela de alfabetização para todas as escolas
-        else:
-            df_escola = df_dados[df_dados['ESCOLA'] == escola_selecionada].copy()
-            df_escola_ama = df_ama[df_ama['ESCOLA'] == escola_selecionada].copy()  # Filtra a tabela de alfabetização para a escola selecionada
+        # Filtro da escola aplicado via índice (vazio para todas as escolas)
+        filtro_escola = {} if escola_selecionada == 'TODAS' else {'ESCOLA': escola_selecionada}
         
         st.header(f"📊 Resultados de {escola_selecionada if escola_selecionada != 'TODAS' else 'Todas as Escolas'}")
     else:
         # Verifica se st.session_state.escola_logada não é None antes de acessar o nome da escola
         if st.session_state.escola_logada is not None:
-            nome_escola = df_dados[df_dados['INEP'] == st.session_state.escola_logada]['ESCOLA'].iloc[0]
+            credencial = snapshot.credenciais.get(st.session_state.escola_logada)
+            nome_escola = credencial.escola if credencial is not None else None
             st.markdown(f"<h3>Bem-vindo, escola <span style='color: blue;'>{nome_escola}</span></h3>", unsafe_allow_html=True)
-            df_escola = df_dados[df_dados['INEP'] == st.session_state.escola_logada].copy()
-            df_escola_ama = df_ama[df_ama['INEP'] == st.session_state.escola_logada].copy()  # Filtra a tabela de alfabetização para a escola logada
+            filtro_escola = {'INEP': st.session_state.escola_logada}
         else:
             st.warning("Nenhuma escola logada.")
-            df_escola = pd.DataFrame()  # DataFrame vazio para evitar erros
-            df_escola_ama = pd.DataFrame()  # DataFrame vazio para a tabela de alfabetização
+            filtro_escola = None
+
+    # Seleção das linhas da escola pelo índice, sem copiar as tabelas
+    escola_chave = tuple(filtro_escola.items()) if filtro_escola else None
+    if filtro_escola is None:
+        df_escola = pd.DataFrame()  # DataFrame vazio para evitar erros
+    else:
+        df_escola, _ = linhas_escola(snapshot, versao_dados, escola_chave)
 
     if df_escola.empty:
         st.warning("Não há dados disponíveis para esta escola.")
     else:
-        # Cria duas abas: uma para os resultados das avaliações e outra para a alfabetização
-        tab1, tab2, tab3 = st.tabs(["AVALIAÇÃO DIAGNÓSTICA MUNICIPAL", "AVALIAÇÃO MUNICIPAL DE ALFABETIZAÇÃO", "REGIAO"])
+        metricas_escola(snapshot, filtro_escola)
 
-        with tab1:
-            # Classificar edições e separar por ciclos
-            edicoes_unicas = sorted(df_escola['EDIÇÃO'].unique(), key=float)
-            ponto_corte = len(edicoes_unicas) // 2
-            ciclo_1_edicoes = edicoes_unicas[:ponto_corte]
-            ciclo_2_edicoes = edicoes_unicas[ponto_corte:]
-
-            df_escola['PERIODO'] = df_escola['EDIÇÃO'].apply(
-                lambda x: 'CICLO 1' if x in ciclo_1_edicoes else 'CICLO 2'
-            )
+        # Cria as abas: resultados das avaliações, alfabetização e regiões; o
+        # administrador tem também a visão geral e a comparação de escolas
+        nomes_abas = ["AVALIAÇÃO DIAGNÓSTICA MUNICIPAL", "AVALIAÇÃO MUNICIPAL DE ALFABETIZAÇÃO", "REGIAO"]
+        if st.session_state.escola_logada == 'TODAS':
+            nomes_abas += ["ESCOLAS", "COMPARAR ESCOLAS"]
+        tab1, tab2, tab3, *abas_administrador = st.tabs(nomes_abas)
 
-            # Filtros por ETAPA e COMP_CURRICULAR
-            etapas = df_escola['ETAPA'].unique().tolist()
-            etapas.insert(0, 'TODAS')  # Adiciona a opção "TODAS"
-            componentes = df_escola['COMP_CURRICULAR'].unique().tolist()
-            componentes.insert(0, 'TODOS')  # Adiciona a opção "TODOS"
-
-            #etapa_selecionada = st.selectbox("Selecione a ETAPA", etapas)
-           #componente_selecionado = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes)
-
-            # Para outros INEPs, mostrar apenas ETAPA e COMPONENTE CURRICULAR
-            col1, col2 = st.columns(2)
-            with col1:
-                    etapa_selecionada = st.selectbox("Selecione a ETAPA", sorted(etapas), key="etapa_selectbox_regiao")
-            with col2:
-                    componente_selecionado = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes, key="componente_selectbox_regiao")
-
-
-            # Filtrar dados conforme seleção
-            if etapa_selecionada == 'TODAS' and componente_selecionado == 'TODOS':
-                df_filtrado = df_escola.copy()
-            elif etapa_selecionada == 'TODAS':
-                df_filtrado = df_escola[df_escola['COMP_CURRICULAR'] == componente_selecionado]
-            elif componente_selecionado == 'TODOS':
-                df_filtrado = df_escola[df_escola['ETAPA'] == etapa_selecionada]
-            else:
-                df_filtrado = df_escola[
-                    (df_escola['ETAPA'] == etapa_selecionada) &
-                    (df_escola['COMP_CURRICULAR'] == componente_selecionado)
-                ]
-
-            # Exibir resultados da escola logada (com filtro aplicado)
-            st.subheader(f"Resultados Filtrados - {etapa_selecionada} - {componente_selecionado}")
-            st.dataframe(df_filtrado.drop(columns=['Unnamed: 0'], errors='ignore'), use_container_width=True)
-
-            # Cálculo de variação entre ciclos (com filtro aplicado)
-            variacao_data = []
-            for escola in df_filtrado['ESCOLA'].unique():
-                df_escola_especifica = df_filtrado[df_filtrado['ESCOLA'] == escola]
-                for etapa in [etapa_selecionada] if etapa_selecionada != 'TODAS' else df_filtrado['ETAPA'].unique():
-                    for componente in [componente_selecionado] if componente_selecionado != 'TODOS' else df_filtrado['COMP_CURRICULAR'].unique():
-                        subset = df_escola_especifica[
-                            (df_escola_especifica['ETAPA'] == etapa) &
-                            (df_escola_especifica['COMP_CURRICULAR'] == componente)
-                        ]
-                        # Separa as edições por ano e compara apenas .2 com .1 do mesmo ano
-                        edicoes_ano = subset['EDIÇÃO'].unique()
-                        for edicao in edicoes_ano:
-                            if edicao.endswith('.2'):
-                                edicao_1 = edicao.replace('.2', '.1')
-                                ciclo_2 = subset[subset['EDIÇÃO'] == edicao]
-                                ciclo_1 = subset[subset['EDIÇÃO'] == edicao_1]
-
-                                desempenho_ciclo_1 = ciclo_1['DESEMPENHO_MEDIO'].mean() if not ciclo_1.empty else None
-                                desempenho_ciclo_2 = ciclo_2['DESEMPENHO_MEDIO'].mean() if not ciclo_2.empty else None
-
-                                if desempenho_ciclo_1 is not None and desempenho_ciclo_2 is not None:
-                                    dif_pontos = desempenho_ciclo_2 - desempenho_ciclo_1
-                                    percentual_variacao = (dif_pontos / desempenho_ciclo_1) * 100 if desempenho_ciclo_1 != 0 else 0
-
-                                    # Captura os períodos (edições) que estão sendo comparados
-                                    periodo_ciclo_1 = ciclo_1['EDIÇÃO'].iloc[0] if not ciclo_1.empty else None
-                                    periodo_ciclo_2 = ciclo_2['EDIÇÃO'].iloc[0] if not ciclo_2.empty else None
-
-                                    # Formata a string dos períodos (ex: "2024.2 - 2024.1")
-                                    periodos_comparados = f"{periodo_ciclo_2} - {periodo_ciclo_1}" if periodo_ciclo_1 and periodo_ciclo_2 else "N/A"
-
-                                    variacao_data.append({
-                                        'ESCOLA': escola,
-                                        'ETAPA': etapa,
-                                        'COMP_CURRICULAR': componente,
-                                        'Períodos Comparados': periodos_comparados,  # Adiciona os períodos comparados
-                                        'Diferença de Pontos': dif_pontos,
-                                        'Variação Percentual': percentual_variacao
-                                    })
-                                else:
-                                    variacao_data.append({
-                                        'ESCOLA': escola,
-                                        'ETAPA': etapa,
-                                        'COMP_CURRICULAR': componente,
-                                        'Períodos Comparados': "N/A",  # Caso não haja dados para comparação
-                                        'Diferença de Pontos': None,
-                                        'Variação Percentual': None
-                                    })
-
-            if variacao_data:
-                variacao_df = pd.DataFrame(variacao_data)
-
-                variacao_df['Diferença de Pontos'] = variacao_df['Diferença de Pontos'].apply(
-                    lambda x: formatar_variacao(x) if pd.notnull(x) else '<p style="color:blue;">N/A</p>'
-                )
-                variacao_df['Variação Percentual'] = variacao_df['Variação Percentual'].apply(
-                    lambda x: formatar_variacao(x, eh_percentual=True) if pd.notnull(x) else '<p style="color:blue;">N/A</p>'
-                )
-
-                st.subheader("Tabela de Variação Entre Ciclos")
-                st.write(variacao_df.to_html(escape=False, index=False), unsafe_allow_html=True)
-            else:
-                st.write("Não há dados suficientes para calcular a variação entre os ciclos.")
-
-            # Exibir gráficos de barras por PERIODO (após a tabela de variações)
-            if etapa_selecionada != 'TODAS' and componente_selecionado != 'TODOS':
-                if not df_filtrado.empty:
-                    st.subheader(f"Desempenho Médio por Período - {etapa_selecionada} - {componente_selecionado}")
-            
-                    # Configuração das cores das barras
-                    cores = {'CICLO 1': 'skyblue', 'CICLO 2': 'lightgreen'}  # Cores podem ser modificadas aqui
-            
-                    # Ajuste o tamanho da figura aqui (largura, altura)
-                    tamanho_grafico = (8, 4)  # Tamanho do gráfico (pode ser modificado)
-                    fig, ax = plt.subplots(figsize=tamanho_grafico)
-
-                    # Adicionar título dentro da figura
-                    ax.set_title(
-                        f"Desempenho Médio por Período - {etapa_selecionada} - {componente_selecionado}",
-                        fontsize=12,  # Tamanho da fonte
-                        fontweight='bold',  # Negrito
-                        pad=20  # Espaçamento entre o título e o gráfico
-                    )
-            
-                    # Converter as edições para float para ordenação correta
-                    df_filtrado['EDIÇÃO_FLOAT'] = df_filtrado['EDIÇÃO'].apply(lambda x: float(x))
-            
-                    # Ordenar os dados por EDIÇÃO antes de plotar
-                    df_filtrado_ordenado = df_filtrado.sort_values(by='EDIÇÃO_FLOAT')
-            
-                    # Plotar os dados ordenados
-                    for periodo, cor in cores.items():
-                        dados_periodo = df_filtrado_ordenado[df_filtrado_ordenado['PERIODO'] == periodo]
-                        barras = ax.bar(dados_periodo['EDIÇÃO'], dados_periodo['DESEMPENHO_MEDIO'], color=cor, label=periodo)
-            
-                        # Adicionar rótulos de desempenho médio nas barras
-                        for barra in barras:
-                            altura = barra.get_height()
-                            ax.text(
-                                barra.get_x() + barra.get_width() / 2,  # Posição X do rótulo
-                                altura + 0.05,  # Posição Y do rótulo (acima da barra)
-                                f'{altura:.2f}',  # Valor do desempenho médio
-                                ha='center',  # Alinhamento horizontal
-                                va='bottom',  # Alinhamento vertical
-                                color='blue',  # Cor do rótulo
-                                fontsize=10  # Tamanho da fonte
-                            )
-            
-                    # Configuração dos rótulos dos eixos
-                    ax.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
-                    ax.set_ylabel('Desempenho Médio', color='blue', fontsize=12)  # Rótulo do eixo Y
-                    ax.tick_params(axis='x', colors='blue', labelsize=10, rotation=45)  # Configuração dos ticks do eixo X
-                    ax.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
-                    ax.legend()
-            
-                    # Exibir o gráfico
-                    st.pyplot(fig)
-
-                    # Botão de download do gráfico
-                    buf = io.BytesIO()
-                    fig.savefig(buf, format='png')
-                    buf.seek(0)
-                    st.download_button(
-                        label="Baixar Gráfico (PNG)",
-                        data=buf,
-                        file_name="grafico_desempenho.png",
-                        mime="image/png"
-                    )
-                else:
-                    st.write("Não há dados disponíveis para os filtros selecionados.")
-            else:
-                st.info("Os gráficos são exibidos apenas quando uma ETAPA e um COMPONENTE CURRICULAR específicos são selecionados.")
-                
-                # ... (código original anterior)
+        with tab1:
+            aba_avaliacao(snapshot, filtro_escola)
 
         with tab2:
-            # Exibir resultados da tabela de alfabetização
-            st.subheader("Percentual de Alfabetização")
-            if not df_escola_ama.empty:
-                st.dataframe(df_escola_ama.drop(columns=['Unnamed: 0'], errors='ignore'), use_container_width=True)
-
-                # Remover decimais da coluna EDIÇÃO
-                df_escola_ama['EDIÇÃO'] = df_escola_ama['EDIÇÃO'].astype(str).str.replace('.0', '', regex=False)
-
-                # Ordenar os dados por EDIÇÃO em ordem crescente
-                df_escola_ama = df_escola_ama.sort_values(by='EDIÇÃO', ascending=True)
-
-                # Gráfico de barras verticais para o percentual de alfabetização por edição
-                st.subheader("Gráfico de Barras - Percentual de Alfabetização por Edição")
-
-                # Configuração do gráfico de barras
-                fig_bar, ax_bar = plt.subplots(figsize=(8, 4))
-                barras = ax_bar.bar(df_escola_ama['EDIÇÃO'], df_escola_ama['PERCENTUAL ALFABETIZAÇÃO'], color='blue')
-
-                # Adicionar rótulos de percentual nas barras
-                for barra in barras:
-                    altura = barra.get_height()
-                    ax_bar.text(
-                        barra.get_x() + barra.get_width() / 2,  # Posição X do rótulo
-                        altura + 0.05,  # Posição Y do rótulo (acima da barra)
-                        f'{altura:.1f}%',  # Valor do percentual
-                        ha='center',  # Alinhamento horizontal
-                        va='bottom',  # Alinhamento vertical
-                        color='black',  # Cor do rótulo
-                        fontsize=8  # Tamanho da fonte
-                    )
-
-                # Configuração dos rótulos dos eixos
-                ax_bar.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
-                ax_bar.set_ylabel('Percentual de Alfabetização', color='blue', fontsize=12)  # Rótulo do eixo Y
-                ax_bar.tick_params(axis='x', colors='blue', labelsize=10)  # Configuração dos ticks do eixo X
-                ax_bar.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
-
-                # Exibir o gráfico
-                st.pyplot(fig_bar)
-
-                # Botão de download do gráfico
-                buf_bar = io.BytesIO()
-                fig_bar.savefig(buf_bar, format='png')
-                buf_bar.seek(0)
-                st.download_button(
-                    label="Baixar Gráfico (PNG)",
-                    data=buf_bar,
-                    file_name="grafico_alfabetizacao_barras.png",
-                    mime="image/png"
-                )
-
-                # Gráfico de linhas para o percentual de alfabetização por edição
-                st.subheader("Gráfico de Linhas - Percentual de Alfabetização por Edição")
-
-                # Configuração do gráfico de linhas
-                fig_line, ax_line = plt.subplots(figsize=(8, 4))
-                ax_line.plot(df_escola_ama['EDIÇÃO'], df_escola_ama['PERCENTUAL ALFABETIZAÇÃO'], marker='o', color='blue', linestyle='-', linewidth=2, markersize=8)
-
-                # Adicionar rótulos de percentual nos pontos
-                for i, (edicao, percentual) in enumerate(zip(df_escola_ama['EDIÇÃO'], df_escola_ama['PERCENTUAL ALFABETIZAÇÃO'])):
-                    ax_line.text(
-                        edicao,  # Posição X do rótulo
-                        percentual + 0.05,  # Posição Y do rótulo (acima do ponto)
-                        f'{percentual:.1f}%',  # Valor do percentual
-                        ha='center',  # Alinhamento horizontal
-                        va='bottom',  # Alinhamento vertical
-                        color='black',  # Cor do rótulo
-                        fontsize=8  # Tamanho da fonte
-                    )
-
-                # Configuração dos rótulos dos eixos
-                ax_line.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
-                ax_line.set_ylabel('Percentual de Alfabetização', color='blue', fontsize=12)  # Rótulo do eixo Y
-                ax_line.tick_params(axis='x', colors='blue', labelsize=10)  # Configuração dos ticks do eixo X
-                ax_line.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
-
-                # Exibir o gráfico
-                st.pyplot(fig_line)
-
-                # Botão de download do gráfico
-                buf_line = io.BytesIO()
-                fig_line.savefig(buf_line, format='png')
-                buf_line.seek(0)
-                st.download_button(
-                    label="Baixar Gráfico (PNG)",
-                    data=buf_line,
-                    file_name="grafico_alfabetizacao_linhas.png",
-                    mime="image/png"
-                )
-            else:
-                st.warning("Não há dados disponíveis para o percentual de alfabetização.")
-
-                # ... (código original anterior)
+            aba_alfabetizacao(snapshot, filtro_escola)
 
         with tab3:
-            # Nova aba REGIAO
-            st.subheader("Desempenho Médio por Região e Edição")
-
-            # Verificar se é o INEP mestre
-            if 'escola_logada' in st.session_state:
-                is_inep_mestre = st.session_state.escola_logada == 'TODAS'  # INEP mestre é identificado como 'TODAS'
-            else:
-                is_inep_mestre = False  # Caso contrário, não é o INEP mestre
-
-            if is_inep_mestre:
-                # Se for o INEP mestre, mostrar seletor de REGIÃO
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    etapa_selecionada_regiao = st.selectbox("Selecione a ETAPA", sorted(etapas), key="etapa_selectbox_regiao_tab3_mestre")
-                with col2:
-                    componente_selecionado_regiao = st.selectbox("Selecione o COMPONENTE CURRICULAR", componentes, key="componente_selectbox_regiao_tab3_mestre")
-                with col3:
-                    # Seletor de REGIAO
-                    # Certifique-se de que a coluna REGIAO seja tratada como string
-                    df_escola['REGIAO'] = df_escola['REGIAO'].astype(str)
-                    regioes_disponiveis = df_escola['REGIAO'].unique().tolist()
-                    regioes_disponiveis.insert(0, 'TODAS')  # Adiciona a opção "TODAS"
-                    
-                    # Converta todos os valores para strings antes de ordenar
-                    regioes_disponiveis = [str(regiao) for regiao in regioes_disponiveis]
-                    
-                    regiao_selecionada = st.selectbox("Selecione a REGIAO", sorted(regioes_disponiveis), key="regiao_selectbox_tab3_mestre")
-
-                # Filtrar os dados conforme a seleção de ETAPA, COMPONENTE CURRICULAR e REGIAO
-                if etapa_selecionada_regiao == 'TODAS' and componente_selecionado_regiao == 'TODOS' and regiao_selecionada == 'TODAS':
-                    df_filtrado_regiao = df_escola.copy()
-                else:
-                    df_filtrado_regiao = df_escola[
-                        (df_escola['ETAPA'] == etapa_selecionada_regiao if etapa_selecionada_regiao != 'TODAS' else True) &
-                        (df_escola['COMP_CURRICULAR'] == componente_selecionado_regiao if componente_selecionado_regiao != 'TODOS' else True) &
-                        (df_escola['REGIAO'] == regiao_selecionada if regiao_selecionada != 'TODAS' else True)
-                    ]
-
-                # Calcular o desempenho médio por região, etapa, componente curricular e edição
-                df_regiao_edicao = df_filtrado_regiao.groupby(
-                    ['REGIAO', 'ETAPA', 'COMP_CURRICULAR', 'EDIÇÃO']
-                )['DESEMPENHO_MEDIO'].mean().reset_index()
-
-                # Ordenar as edições em ordem crescente
-                df_regiao_edicao = df_regiao_edicao.sort_values(by='EDIÇÃO')
-
-                if not df_regiao_edicao.empty:
-                    # Configuração do gráfico de barras agrupadas por região e edição
-                    fig_regiao_edicao, ax_regiao_edicao = plt.subplots(figsize=(14, 8))  # Aumentar o tamanho do gráfico
-
-                    # Obter as regiões e edições únicas
-                    regioes = df_regiao_edicao['REGIAO'].unique()
-                    edicoes = df_regiao_edicao['EDIÇÃO'].unique()
-
-                    # Largura das barras
-                    largura_barra = 0.75
-                    posicoes = np.arange(len(edicoes))  # Usar numpy para criar posições
-
-                    # Cores para as barras (usando tons de azul)
-                    cores = plt.cm.Blues(np.linspace(0.4, 1, len(regioes)))  # Tons de azul
-
-                    # Plotar as barras para cada região
-                    for i, regiao in enumerate(regioes):
-                        dados_regiao = df_regiao_edicao[df_regiao_edicao['REGIAO'] == regiao]
-                        # Garantir que os dados estejam alinhados com as edições
-                        desempenho_medio = [dados_regiao[dados_regiao['EDIÇÃO'] == edicao]['DESEMPENHO_MEDIO'].values[0] if not dados_regiao[dados_regiao['EDIÇÃO'] == edicao].empty else 0
-                                        for edicao in edicoes]
-                        barras = ax_regiao_edicao.bar(
-                            posicoes + i * largura_barra,  # Posições das barras
-                            desempenho_medio,  # Valores do desempenho médio
-                            width=largura_barra,  # Largura das barras
-                            label=regiao,  # Rótulo da região
-                            color=cores[i]  # Cor da região
-                        )
-
-                        # Adicionar rótulos de desempenho médio nas barras
-                        for barra, valor in zip(barras, desempenho_medio):
-                            altura = barra.get_height()
-                            ax_regiao_edicao.text(
-                                barra.get_x() + barra.get_width() / 2,  # Posição X do rótulo
-                                altura + 0.05,  # Posição Y do rótulo (acima da barra)
-                                f'{valor:.2f}',  # Valor do desempenho médio
-                                ha='center',  # Alinhamento horizontal
-                                va='bottom',  # Alinhamento vertical
-                                color='black',  # Cor do rótulo
-                                fontsize=16  # Aumentar o tamanho da fonte dos rótulos
-                            )
-
-                    # Configuração dos rótulos dos eixos
-                    ax_regiao_edicao.set_xlabel('Edição', color='blue', fontsize=14, fontweight='bold')  # Aumentar o tamanho da fonte
-                    ax_regiao_edicao.set_ylabel('Desempenho Médio', color='blue', fontsize=14, fontweight='bold')  # Aumentar o tamanho da fonte
-                    ax_regiao_edicao.set_xticks(posicoes + largura_barra * (len(regioes) - 1) / 2)
-                    ax_regiao_edicao.set_xticklabels(edicoes, rotation=45, color='blue', fontsize=12)  # Aumentar o tamanho da fonte
-                    ax_regiao_edicao.tick_params(axis='y', colors='blue', labelsize=12)  # Aumentar o tamanho da fonte
-
-                    # Adicionar título ao gráfico
-                    ax_regiao_edicao.set_title(
-                        f"Desempenho Médio por Região e Edição - {etapa_selecionada_regiao} - {componente_selecionado_regiao}",
-                        fontsize=16,  # Aumentar o tamanho da fonte do título
-                        fontweight='bold',  # Negrito
-                        pad=20  # Espaçamento entre o título e o gráfico
-                    )
-
-                    # Adicionar legenda
-                    ax_regiao_edicao.legend(
-                        title='Região',
-                        bbox_to_anchor=(1.05, 1),
-                        loc='upper left',
-                        fontsize=12,  # Aumentar o tamanho da fonte da legenda
-                        title_fontsize=14  # Aumentar o tamanho da fonte do título da legenda
-                    )
-
-                    # Adicionar grid para melhorar a visualização
-                    ax_regiao_edicao.grid(axis='y', linestyle='--', alpha=0.7)
-
-                    # Ajustar o layout para evitar cortes
-                    plt.tight_layout()
-
-                    # Exibir o gráfico
-                    st.pyplot(fig_regiao_edicao)
-
-                    # Botão de download do gráfico
-                    buf_regiao_edicao = BytesIO()
-                    fig_regiao_edicao.savefig(buf_regiao_edicao, format='png', dpi=300, bbox_inches='tight')
-                    buf_regiao_edicao.seek(0)
-                    st.download_button(
-                        label="Baixar Gráfico (PNG)",
-                        data=buf_regiao_edicao,
-                        file_name="grafico_desempenho_regiao_edicao.png",
-                        mime="image/png"
-                    )
-
-                else:
-                    st.warning("Não há dados disponíveis para a região e edição selecionadas.")
-            else:
-                # Se não for o INEP mestre, exibir uma mensagem de alerta
-                st.warning("Não há dados disponíveis para esse INEP.")
-
-else:
-    st.info("Por favor, faça login para acessar os dados.")
+            aba_regiao(snapshot, filtro_escola)
+
+        if abas_administrador:
+            tab4, tab5 = abas_administrador
+            with tab4:
+                aba_escolas(snapshot)
+            with tab5:
+                aba_comparacao(snapshot)
+
+# Fim do rerun: registra a medição e, para o administrador, mostra o painel
+registrar_medicao(medicao)
+if st.session_state.login_success and st.session_state.get('escola_logada') == 'TODAS':
+    if st.sidebar.toggle("Painel de desempenho", key='painel_desempenho'):
+        painel_desempenho(medicao)
@@ -0,0 +1,55 @@
+"""Esquema das tabelas: tipos compactos na memória, texto só na exibição.
+
+- Dimensões (INEP, ESCOLA, ETAPA, COMP_CURRICULAR, REGIAO e PERIODO) são
+  categorias: cada texto distinto é guardado uma vez e as linhas guardam apenas
+  códigos inteiros.
+- EDIÇÃO é uma chave inteira ANO * 10 + SEMESTRE: 2024.1 -> 20241. Edições
+  anuais, como as da AMA, têm semestre 0: 2024 -> 20240. A chave ordena
+  numericamente e ANO e SEMESTRE saem por divisão inteira, sem conversões por
+  linha; o rótulo ('2024.1', '2024') é montado só para tabelas e gráficos.
+"""
+import pandas as pd
+
+# Colunas de baixa cardinalidade armazenadas como categorias
+COLUNAS_CATEGORICAS = ['INEP', 'ESCOLA', 'ETAPA', 'COMP_CURRICULAR', 'REGIAO', 'PERIODO']
+
+
+def chave_edicao(edicao):
+    """Converte a EDIÇÃO das planilhas (2024.1, 2024 ou '2024.1') na chave inteira."""
+    return (pd.to_numeric(edicao) * 10).round().astype('int32')
+
+
+def ano(chaves):
+    return chaves // 10
+
+
+def semestre(chaves):
+    return chaves % 10
+
+
+def formatar_edicao(chave):
+    """Rótulo de exibição de uma chave: 20241 -> '2024.1', 20240 -> '2024'."""
+    ano_edicao, semestre_edicao = divmod(int(chave), 10)
+    return f"{ano_edicao}.{semestre_edicao}" if semestre_edicao else str(ano_edicao)
+
+
+def formatar_edicoes(chaves):
+    """Rótulos de uma sequência de chaves (cada edição distinta é formatada uma vez)."""
+    chaves = pd.Series(chaves)
+    rotulos = {chave: formatar_edicao(chave) for chave in chaves.unique()}
+    return chaves.map(rotulos)
+
+
+def para_exibicao(df):
+    """Cópia leve de `df` com a EDIÇÃO em texto, para st.dataframe e afins."""
+    if 'EDIÇÃO' not in df.columns:
+        return df
+    return df.assign(**{'EDIÇÃO': formatar_edicoes(df['EDIÇÃO'])})
+
+
+def categorizar(df):
+    """Converte as colunas de dimensão presentes em `df` para categorias."""
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype(str).str.strip().astype('category')
+    return df
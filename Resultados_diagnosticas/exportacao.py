@@ -0,0 +1,198 @@
+"""Exportação em lote das tabelas do dashboard (CSV, XLSX e Parquet), sem o Streamlit.
+
+As tabelas exportadas são as mesmas que o dashboard exibe: os resultados
+filtrados da aba 1, a variação entre ciclos e o desempenho médio por região e
+edição da aba 3. A saída é escrita em blocos de TAMANHO_BLOCO linhas, tirados
+direto das posições do índice quando elas são informadas, então a tabela
+filtrada inteira não é copiada nem convertida para texto de uma vez:
+- CSV: cada bloco é acrescentado ao arquivo com a EDIÇÃO já em texto;
+- Parquet: cada bloco vira um row group do mesmo arquivo;
+- XLSX: openpyxl em modo write_only, que grava as linhas num arquivo temporário
+  em vez de montar a planilha na memória.
+
+Uso (a partir da raiz do repositório):
+
+    python Resultados_diagnosticas/exportacao.py --tabela resultados|variacoes|regiao
+        --formato csv|xlsx|parquet --saida ARQUIVO [--inep INEP] [--etapa ETAPA]
+        [--componente COMPONENTE] [--regiao REGIAO]
+
+Como nos seletores do dashboard, TODAS/TODOS (ou a opção omitida) não filtra.
+Um --inep sem resultados no snapshot encerra com erro.
+"""
+import argparse
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+import calculos
+import dados
+import esquema
+import instrumentacao
+import recarga
+import variacao
+
+# Linhas por bloco escrito
+TAMANHO_BLOCO = 50_000
+
+# Formatos aceitos e o tipo MIME de cada um (para o download no navegador)
+FORMATOS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Tabelas exportáveis pela linha de comando
+TABELAS = ('resultados', 'variacoes', 'regiao')
+
+
+def blocos(df, posicoes=None, transformar=None, tamanho=TAMANHO_BLOCO):
+    """Blocos de até `tamanho` linhas de `df` (ou das linhas `posicoes`), prontos para exibição.
+
+    `transformar`, se informado, é aplicado a cada bloco antes da formatação da
+    EDIÇÃO. Uma tabela vazia gera um único bloco vazio, com o cabeçalho.
+    """
+    total = len(df) if posicoes is None else len(posicoes)
+    for inicio in range(0, max(total, 1), tamanho):
+        if posicoes is None:
+            bloco = df.iloc[inicio:inicio + tamanho]
+        else:
+            bloco = df.take(posicoes[inicio:inicio + tamanho])
+        if transformar is not None:
+            bloco = transformar(bloco)
+        yield esquema.para_exibicao(bloco)
+
+
+def escrever_csv(partes, destino):
+    """Grava os blocos em `destino` (arquivo binário) como CSV UTF-8 com BOM, para o Excel."""
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    try:
+        for numero, bloco in enumerate(partes):
+            bloco.to_csv(texto, index=False, header=numero == 0)
+    finally:
+        # Solta o arquivo sem fechá-lo: quem o abriu é quem fecha
+        texto.flush()
+        texto.detach()
+
+
+def escrever_parquet(partes, destino):
+    """Grava os blocos em `destino` como Parquet, um row group por bloco."""
+    escritor = esquema_arrow = None
+    try:
+        for bloco in partes:
+            # Os blocos seguintes usam o esquema do primeiro (tipos iguais em todos os row groups)
+            tabela = pa.Table.from_pandas(bloco, schema=esquema_arrow, preserve_index=False)
+            if escritor is None:
+                esquema_arrow = tabela.schema
+                escritor = pq.ParquetWriter(destino, esquema_arrow)
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def escrever_xlsx(partes, destino, titulo='dados'):
+    """Grava os blocos em `destino` como XLSX, com o openpyxl em modo write_only."""
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(titulo)
+    for numero, bloco in enumerate(partes):
+        if numero == 0:
+            planilha.append(bloco.columns.tolist())
+        # Categorias viram texto e NaN vira célula vazia, só neste bloco
+        valores = bloco.astype(object).where(bloco.notna(), None)
+        for linha in valores.itertuples(index=False, name=None):
+            planilha.append(linha)
+    livro.save(destino)
+
+
+ESCRITORES = {'csv': escrever_csv, 'xlsx': escrever_xlsx, 'parquet': escrever_parquet}
+
+
+def exportar(df, formato, destino, posicoes=None, transformar=None):
+    """Grava `df` (ou as linhas `posicoes`) em `destino` (caminho ou arquivo binário) no `formato`."""
+    with instrumentacao.etapa('codificacao', f"exportar_{formato}"):
+        if isinstance(destino, str):
+            with open(destino, 'wb') as arquivo:
+                ESCRITORES[formato](blocos(df, posicoes, transformar), arquivo)
+        else:
+            ESCRITORES[formato](blocos(df, posicoes, transformar), destino)
+
+
+def para_bytes(df, formato, posicoes=None, transformar=None):
+    """Conteúdo do arquivo exportado, para botões de download."""
+    destino = io.BytesIO()
+    exportar(df, formato, destino, posicoes, transformar)
+    return destino.getvalue()
+
+
+def linhas_resultados(snapshot, etapa=None, componente=None, **filtro_escola):
+    """(tabela, posições, transformação) dos resultados filtrados da aba 1.
+
+    As linhas são as da interseção do índice, tiradas da tabela do snapshot bloco
+    a bloco; a transformação preenche o PERIODO como `calculos.resultados_filtrados`,
+    com os ciclos da escola lidos do resumo, como no dashboard.
+    """
+    indice_dados = snapshot.indices['dados']
+    inep = snapshot.resumo.inep(**filtro_escola)
+    if inep is not None:
+        periodos = snapshot.resumo.periodos(inep)
+    else:
+        periodos = calculos.periodos_por_edicao(indice_dados.selecionar(**filtro_escola))
+    # Sem filtros (None), a tabela inteira, em fatias sem cópia
+    posicoes = indice_dados.localizar(
+        ETAPA=calculos.filtro(etapa), COMP_CURRICULAR=calculos.filtro(componente), **filtro_escola
+    )
+
+    def preencher_periodo(bloco):
+        return bloco.assign(PERIODO=bloco['EDIÇÃO'].map(periodos)).drop(columns=['Unnamed: 0'], errors='ignore')
+
+    return indice_dados.df, posicoes, preencher_periodo
+
+
+def linhas_variacoes(snapshot, etapa=None, componente=None, **filtro_escola):
+    """(tabela, posições, transformação) da variação entre ciclos com os filtros da aba 1.
+
+    A transformação tira as colunas internas, deixando as mesmas colunas da aba.
+    """
+    posicoes = variacao.posicoes_variacoes(
+        snapshot.variacoes, ETAPA=calculos.filtro(etapa), COMP_CURRICULAR=calculos.filtro(componente), **filtro_escola
+    )
+    return snapshot.variacoes, posicoes, variacao.para_tabela
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta as tabelas do dashboard em CSV, XLSX ou Parquet.")
+    parser.add_argument('--tabela', choices=TABELAS, required=True)
+    parser.add_argument('--formato', choices=list(FORMATOS), required=True)
+    parser.add_argument('--saida', required=True, help="Arquivo de saída.")
+    parser.add_argument('--inep', help="Só as linhas desta escola (padrão: a rede toda).")
+    parser.add_argument('--etapa', help="Só esta ETAPA (padrão: todas).")
+    parser.add_argument('--componente', help="Só este COMP_CURRICULAR (padrão: todos).")
+    parser.add_argument('--regiao', help="Aba 3: só esta REGIAO (padrão: todas).")
+    args = parser.parse_args()
+
+    snapshot = recarga.montar_snapshot({nome: dados.TabelaParticionada(nome) for nome in dados.PLANILHAS})
+    if args.inep and not snapshot.indices['dados'].contem('INEP', args.inep):
+        parser.error(f"INEP {args.inep} sem resultados no bd_dados")
+    filtro_escola = {'INEP': args.inep} if args.inep else {}
+
+    if args.tabela == 'resultados':
+        df, posicoes, transformar = linhas_resultados(snapshot, args.etapa, args.componente, **filtro_escola)
+    elif args.tabela == 'variacoes':
+        df, posicoes, transformar = linhas_variacoes(snapshot, args.etapa, args.componente, **filtro_escola)
+    else:
+        escola = str(snapshot.indices['dados'].primeiro('ESCOLA', **filtro_escola)) if args.inep else None
+        df = calculos.desempenho_regiao_edicao(
+            snapshot.cubo, calculos.filtro(args.etapa), calculos.filtro(args.componente), calculos.filtro(args.regiao),
+            escola
+        )
+        posicoes, transformar = None, None
+
+    exportar(df, args.formato, args.saida, posicoes, transformar)
+    linhas = len(df) if posicoes is None else len(posicoes)
+    print(f"{args.tabela}: {linhas} linhas em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Gerador de planilhas sintéticas (bd_dados, bd_ama e senhas_acesso) em escala.
+
+Produz as três planilhas com as mesmas colunas das amostras de xls/, para uma
+quantidade configurável de escolas, regiões, etapas, componentes e edições. As
+distribuições imitam as das amostras:
+- cada escola atende os anos iniciais, os finais ou os dois;
+- nem toda escola participa de toda edição;
+- o desempenho combina efeitos de etapa, escola, componente e tendência;
+- há linhas da rede (INEP do município) com a média de cada edição.
+
+A saída fica em <saida>/xls, como planilhas únicas ou, com --particionado, como
+um arquivo por EDIÇÃO (e por ano no bd_ama), no mesmo formato de
+`dados.py --particionar`. O dashboard e os demais scripts usam esses dados com
+RESULTADOS_DIR_XLS=<saida>/xls e RESULTADOS_DIR_SNAPSHOT=<saida>/snapshot.
+
+Uso:
+
+    python Resultados_diagnosticas/gerar_dados.py --saida DIR [--escolas 70] [--regioes 7]
+        [--etapas 8] [--componentes 2] [--edicoes 6] [--anos-ama 15] [--semente 0] [--particionado]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import esquema
+
+# INEP e nome da rede (linhas de média do município e login do administrador)
+INEP_REDE = 2307650
+NOME_REDE = 'MARACANAÚ'
+
+# Rótulos das amostras (com a grafia original); além deles, rótulos numerados
+ETAPAS = ['2° ANO', '3º ANO', '4º ANO', '5° ANO', '6º ANO', '7º ANO', '8º ANO', '9° ANO']
+COMPONENTES = ['LÍNGUA PORTUGUESA', 'MATEMÁTICA', 'CIÊNCIAS', 'HISTÓRIA', 'GEOGRAFIA']
+
+# Última edição gerada; as anteriores alternam semestres .2 e .1 para trás
+ULTIMO_ANO = 2025
+ULTIMO_ANO_AMA = 2024
+
+
+def _rotulos(base, quantidade, prefixo):
+    return base[:quantidade] + [f"{prefixo} {i}" for i in range(len(base) + 1, quantidade + 1)]
+
+
+def regioes(quantidade):
+    """'REGIÃO A', 'REGIÃO B', ...; depois da Z, numeradas."""
+    letras = [f"REGIÃO {chr(ord('A') + i)}" for i in range(min(quantidade, 26))]
+    return letras + [f"REGIÃO {i}" for i in range(27, quantidade + 1)]
+
+
+def edicoes(quantidade):
+    """Chaves (esquema.py) das `quantidade` edições semestrais até ULTIMO_ANO.1."""
+    chaves = []
+    ano, semestre = ULTIMO_ANO, 1
+    while len(chaves) < quantidade:
+        chaves.append(ano * 10 + semestre)
+        ano, semestre = (ano, 1) if semestre == 2 else (ano - 1, 2)
+    return sorted(chaves)
+
+
+def gerar(escolas=70, n_regioes=7, n_etapas=8, n_componentes=2, n_edicoes=6, anos_ama=15, semente=0):
+    """Devolve (df_dados, df_ama, df_login) sintéticos com as colunas das planilhas."""
+    aleatorio = np.random.default_rng(semente)
+    etapas = _rotulos(ETAPAS, n_etapas, 'ETAPA')
+    componentes = _rotulos(COMPONENTES, n_componentes, 'COMPONENTE')
+    nomes_regioes = regioes(n_regioes)
+    chaves_edicao = np.array(edicoes(n_edicoes))
+
+    # Escolas: INEP de 8 dígitos único, região e segmento atendido
+    ineps = 23000000 + aleatorio.choice(1000000, size=escolas, replace=False)
+    nomes = np.array([f"ESCOLA SINTÉTICA {i:05d} EMEIEF" for i in range(1, escolas + 1)])
+    regiao_escola = aleatorio.integers(n_regioes, size=escolas)
+    efeito_escola = aleatorio.normal(0, 8, size=escolas)
+    # 0: anos iniciais, 1: anos finais, 2: os dois
+    segmento = aleatorio.choice(3, size=escolas, p=[0.35, 0.35, 0.3])
+
+    # Todas as combinações escola × etapa × componente × edição, filtradas
+    e, t, c, d = (eixo.ravel() for eixo in np.meshgrid(
+        np.arange(escolas), np.arange(n_etapas), np.arange(n_componentes), np.arange(n_edicoes), indexing='ij'
+    ))
+    metade = n_etapas // 2
+    atende = np.where(segmento[e] == 2, True, np.where(segmento[e] == 0, t < metade, t >= metade))
+    participa = aleatorio.random(len(e)) < 0.85
+    e, t, c, d = (eixo[atende & participa] for eixo in (e, t, c, d))
+
+    # Desempenho: média da etapa (cai dos anos iniciais aos finais) + efeitos + ruído
+    media_etapa = np.linspace(61, 42, n_etapas)
+    efeito_componente = aleatorio.normal(0, 3, size=n_componentes)
+    desempenho = (
+        media_etapa[t] + efeito_escola[e] + efeito_componente[c]
+        + 0.8 * d + aleatorio.normal(0, 4, size=len(e))
+    )
+    desempenho = np.clip(desempenho, 5, 100).round(2)
+
+    chaves = chaves_edicao[d]
+    df_dados = pd.DataFrame({
+        'REGIAO': np.array(nomes_regioes)[regiao_escola[e]],
+        'INEP': ineps[e],
+        'ESCOLA': nomes[e],
+        'DESEMPENHO_MEDIO': desempenho,
+        'ETAPA': np.array(etapas)[t],
+        'COMP_CURRICULAR': np.array(componentes)[c],
+        'EDIÇÃO': esquema.ano(chaves) + esquema.semestre(chaves) / 10,
+        'PERIODO': ['CICLO ' + str(s) for s in esquema.semestre(chaves)],
+    })
+
+    # Linhas da rede: média de cada etapa/componente/edição
+    rede = (
+        df_dados.groupby(['ETAPA', 'COMP_CURRICULAR', 'EDIÇÃO', 'PERIODO'], as_index=False)['DESEMPENHO_MEDIO']
+        .mean().round(2)
+        .assign(REGIAO=NOME_REDE, INEP=INEP_REDE, ESCOLA=NOME_REDE)
+    )
+    df_dados = pd.concat([df_dados, rede[df_dados.columns]], ignore_index=True)
+
+    # Alfabetização: anos de ULTIMO_ANO_AMA para trás, com lacunas, para 90% das escolas
+    anos = np.arange(ULTIMO_ANO_AMA - anos_ama + 1, ULTIMO_ANO_AMA + 1)
+    e_ama, a_ama = (eixo.ravel() for eixo in np.meshgrid(np.arange(escolas), np.arange(anos_ama), indexing='ij'))
+    com_ama = aleatorio.random(escolas) < 0.9
+    manter = com_ama[e_ama] & (aleatorio.random(len(e_ama)) < 0.6)
+    e_ama, a_ama = e_ama[manter], a_ama[manter]
+    percentual = np.clip(75 + efeito_escola[e_ama] + 1.2 * a_ama + aleatorio.normal(0, 6, size=len(e_ama)), 0, 100)
+    df_ama = pd.DataFrame({
+        'INEP': ineps[e_ama],
+        'ESCOLA': nomes[e_ama],
+        'EDIÇÃO': anos[a_ama],
+        'PERCENTUAL ALFABETIZAÇÃO': percentual.round(0),
+    })
+
+    df_login = pd.DataFrame({
+        'INEP': np.append(ineps, INEP_REDE),
+        'ESCOLA': np.append(nomes, NOME_REDE),
+    })
+    return df_dados, df_ama, df_login
+
+
+def gravar(saida, df_dados, df_ama, df_login, particionado=False):
+    """Grava as planilhas em <saida>/xls (com --particionado, uma por edição/ano)."""
+    pasta_xls = os.path.join(saida, 'xls')
+    os.makedirs(pasta_xls, exist_ok=True)
+    df_login.to_excel(os.path.join(pasta_xls, 'senhas_acesso.xlsx'), index=False)
+    for df, planilha in ((df_dados, 'bd_dados'), (df_ama, 'bd_ama')):
+        if not particionado:
+            df.to_excel(os.path.join(pasta_xls, f"{planilha}.xlsx"), index=False)
+            continue
+        pasta = os.path.join(pasta_xls, planilha)
+        os.makedirs(pasta, exist_ok=True)
+        chaves = esquema.formatar_edicoes(esquema.chave_edicao(df['EDIÇÃO']))
+        for chave, parte in df.groupby(chaves, sort=True):
+            parte.to_excel(os.path.join(pasta, f"{chave}.xlsx"), index=False)
+
+
+def gerar_pasta(saida, particionado=False, **parametros):
+    """Gera e grava os dados em `saida`, com os parâmetros em <saida>/parametros.json."""
+    df_dados, df_ama, df_login = gerar(**parametros)
+    gravar(saida, df_dados, df_ama, df_login, particionado)
+    # Parâmetros ao lado das planilhas, para saber se a pasta pode ser reaproveitada
+    with open(os.path.join(saida, 'parametros.json'), 'w', encoding='utf-8') as f:
+        json.dump({**parametros, 'particionado': particionado}, f, indent=1, sort_keys=True)
+    return df_dados, df_ama, df_login
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas com as colunas das de xls/.")
+    parser.add_argument('--saida', required=True, help="Pasta de saída (as planilhas vão para <saida>/xls).")
+    parser.add_argument('--escolas', type=int, default=70)
+    parser.add_argument('--regioes', type=int, default=7)
+    parser.add_argument('--etapas', type=int, default=8)
+    parser.add_argument('--componentes', type=int, default=2)
+    parser.add_argument('--edicoes', type=int, default=6, help="Edições semestrais do bd_dados.")
+    parser.add_argument('--anos-ama', type=int, default=15, help="Edições anuais do bd_ama.")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--particionado', action='store_true', help="Um arquivo por edição (bd_ama: por ano).")
+    args = parser.parse_args()
+
+    df_dados, df_ama, df_login = gerar_pasta(
+        args.saida, args.particionado, escolas=args.escolas, n_regioes=args.regioes, n_etapas=args.etapas,
+        n_componentes=args.componentes, n_edicoes=args.edicoes, anos_ama=args.anos_ama, semente=args.semente,
+    )
+    print(f"{args.saida}: bd_dados {len(df_dados)} linhas, bd_ama {len(df_ama)} linhas, "
+          f"senhas_acesso {len(df_login)} linhas")
+
+
+if __name__ == '__main__':
+    main()
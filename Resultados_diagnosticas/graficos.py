@@ -0,0 +1,373 @@
+"""Gráficos do dashboard e cache LRU dos gráficos já renderizados.
+
+Cada função `grafico_*` monta a figura a partir dos dados já filtrados. As
+figuras são objetos `Figure` independentes (renderizados pelo Agg), fora do
+registro global do pyplot: nada fica pendurado no processo depois que a figura
+é liberada. O matplotlib só é importado quando a primeira figura é montada:
+importar este módulo (e o cache) não custa a importação dele nem a criação do
+cache de fontes. O `CacheGraficos` guarda, por chave de filtros, o PNG exibido na
+tela, renderizado no primeiro acesso; o PNG de download é gerado só quando o
+usuário clica no botão.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import esquema
+import instrumentacao
+
+# Mesmas opções usadas pelo st.pyplot para a imagem exibida na tela
+OPCOES_TELA = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}
+
+# Acima desta quantidade de barras o gráfico da aba 3 não escreve os valores
+MAX_BARRAS_ROTULADAS = 60
+
+
+def _figura(**opcoes):
+    # Importação adiada do matplotlib (depois da primeira, é só uma consulta a sys.modules)
+    from matplotlib.figure import Figure
+    return Figure(**opcoes)
+
+
+def preparar():
+    """Importa o matplotlib e renderiza uma figura mínima (cache de fontes e backend Agg)."""
+    fig = _figura(figsize=(1, 1))
+    fig.subplots().set_title('Desempenho Médio')
+    fig.savefig(io.BytesIO(), format='png')
+    fig.clear()
+
+
+def grafico_periodos(df_filtrado, etapa_selecionada, componente_selecionado):
+    """Barras de desempenho médio por edição, coloridas por CICLO (aba 1)."""
+    # Configuração das cores das barras
+    cores = {'CICLO 1': 'skyblue', 'CICLO 2': 'lightgreen'}  # Cores podem ser modificadas aqui
+
+    # Ajuste o tamanho da figura aqui (largura, altura)
+    tamanho_grafico = (8, 4)  # Tamanho do gráfico (pode ser modificado)
+    fig = _figura(figsize=tamanho_grafico)
+    ax = fig.subplots()
+
+    # Adicionar título dentro da figura
+    ax.set_title(
+        f"Desempenho Médio por Período - {etapa_selecionada} - {componente_selecionado}",
+        fontsize=12,  # Tamanho da fonte
+        fontweight='bold',  # Negrito
+        pad=20  # Espaçamento entre o título e o gráfico
+    )
+
+    # Ordenar os dados por EDIÇÃO (chave numérica) antes de plotar
+    df_filtrado_ordenado = df_filtrado.sort_values(by='EDIÇÃO')
+
+    # Plotar os dados ordenados
+    for periodo, cor in cores.items():
+        dados_periodo = df_filtrado_ordenado[df_filtrado_ordenado['PERIODO'] == periodo]
+        barras = ax.bar(esquema.formatar_edicoes(dados_periodo['EDIÇÃO']), dados_periodo['DESEMPENHO_MEDIO'], color=cor, label=periodo)
+
+        # Adicionar rótulos de desempenho médio nas barras
+        for barra in barras:
+            altura = barra.get_height()
+            ax.text(
+                barra.get_x() + barra.get_width() / 2,  # Posição X do rótulo
+                altura + 0.05,  # Posição Y do rótulo (acima da barra)
+                f'{altura:.2f}',  # Valor do desempenho médio
+                ha='center',  # Alinhamento horizontal
+                va='bottom',  # Alinhamento vertical
+                color='blue',  # Cor do rótulo
+                fontsize=10  # Tamanho da fonte
+            )
+
+    # Configuração dos rótulos dos eixos
+    ax.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
+    ax.set_ylabel('Desempenho Médio', color='blue', fontsize=12)  # Rótulo do eixo Y
+    ax.tick_params(axis='x', colors='blue', labelsize=10, rotation=45)  # Configuração dos ticks do eixo X
+    ax.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
+    ax.legend()
+    return fig
+
+
+def grafico_alfabetizacao_barras(df_escola_ama):
+    """Barras do percentual de alfabetização por edição (aba 2)."""
+    # Configuração do gráfico de barras
+    fig_bar = _figura(figsize=(8, 4))
+    ax_bar = fig_bar.subplots()
+    barras = ax_bar.bar(esquema.formatar_edicoes(df_escola_ama['EDIÇÃO']), df_escola_ama['PERCENTUAL ALFABETIZAÇÃO'], color='blue')
+
+    # Adicionar rótulos de percentual nas barras
+    for barra in barras:
+        altura = barra.get_height()
+        ax_bar.text(
+            barra.get_x() + barra.get_width() / 2,  # Posição X do rótulo
+            altura + 0.05,  # Posição Y do rótulo (acima da barra)
+            f'{altura:.1f}%',  # Valor do percentual
+            ha='center',  # Alinhamento horizontal
+            va='bottom',  # Alinhamento vertical
+            color='black',  # Cor do rótulo
+            fontsize=8  # Tamanho da fonte
+        )
+
+    # Configuração dos rótulos dos eixos
+    ax_bar.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
+    ax_bar.set_ylabel('Percentual de Alfabetização', color='blue', fontsize=12)  # Rótulo do eixo Y
+    ax_bar.tick_params(axis='x', colors='blue', labelsize=10)  # Configuração dos ticks do eixo X
+    ax_bar.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
+    return fig_bar
+
+
+def grafico_alfabetizacao_linhas(df_escola_ama):
+    """Linha do percentual de alfabetização por edição (aba 2)."""
+    # Configuração do gráfico de linhas
+    fig_line = _figura(figsize=(8, 4))
+    ax_line = fig_line.subplots()
+    edicoes = esquema.formatar_edicoes(df_escola_ama['EDIÇÃO'])
+    ax_line.plot(edicoes, df_escola_ama['PERCENTUAL ALFABETIZAÇÃO'], marker='o', color='blue', linestyle='-', linewidth=2, markersize=8)
+
+    # Adicionar rótulos de percentual nos pontos
+    for edicao, percentual in zip(edicoes, df_escola_ama['PERCENTUAL ALFABETIZAÇÃO']):
+        ax_line.text(
+            edicao,  # Posição X do rótulo
+            percentual + 0.05,  # Posição Y do rótulo (acima do ponto)
+            f'{percentual:.1f}%',  # Valor do percentual
+            ha='center',  # Alinhamento horizontal
+            va='bottom',  # Alinhamento vertical
+            color='black',  # Cor do rótulo
+            fontsize=8  # Tamanho da fonte
+        )
+
+    # Configuração dos rótulos dos eixos
+    ax_line.set_xlabel('Edição', color='blue', fontsize=12)  # Rótulo do eixo X
+    ax_line.set_ylabel('Percentual de Alfabetização', color='blue', fontsize=12)  # Rótulo do eixo Y
+    ax_line.tick_params(axis='x', colors='blue', labelsize=10)  # Configuração dos ticks do eixo X
+    ax_line.tick_params(axis='y', colors='blue', labelsize=10)  # Configuração dos ticks do eixo Y
+    return fig_line
+
+
+def matriz_regiao_edicao(df_regiao_edicao):
+    """Matriz (região x edição) do desempenho médio, com NaN onde não há resultado.
+
+    Regiões e edições ficam na ordem em que aparecem na tabela; se houver mais de
+    uma linha para a mesma região e edição, vale a primeira.
+    """
+    regioes = df_regiao_edicao['REGIAO'].unique()
+    edicoes = df_regiao_edicao['EDIÇÃO'].unique()
+    return (
+        df_regiao_edicao.drop_duplicates(['REGIAO', 'EDIÇÃO'])
+        .pivot(index='REGIAO', columns='EDIÇÃO', values='DESEMPENHO_MEDIO')
+        .reindex(index=regioes, columns=edicoes)
+    )
+
+
+def grafico_regiao_edicao(df_regiao_edicao, etapa_selecionada_regiao, componente_selecionado_regiao,
+                          max_barras_rotuladas=MAX_BARRAS_ROTULADAS):
+    """Barras agrupadas do desempenho médio por região e edição (aba 3).
+
+    Acima de `max_barras_rotuladas` barras os valores deixam de ser escritos
+    sobre cada barra, para o gráfico continuar legível e rápido de desenhar.
+    """
+    # Configuração do gráfico de barras agrupadas por região e edição
+    fig_regiao_edicao = _figura(figsize=(14, 8))  # Aumentar o tamanho do gráfico
+    ax_regiao_edicao = fig_regiao_edicao.subplots()
+
+    # Desempenho alinhado por região (linhas) e edição (colunas)
+    matriz = matriz_regiao_edicao(df_regiao_edicao)
+    regioes = matriz.index
+    edicoes = matriz.columns
+    rotular = matriz.size <= max_barras_rotuladas
+
+    # Largura das barras (as barras de todas as regiões cabem no espaço de uma edição)
+    largura_barra = 0.75 / max(len(regioes), 1)
+    posicoes = np.arange(len(edicoes))  # Usar numpy para criar posições
+
+    # Cores para as barras (usando tons de azul)
+    from matplotlib import colormaps
+    cores = colormaps['Blues'](np.linspace(0.4, 1, len(regioes)))  # Tons de azul
+
+    # Plotar as barras para cada região
+    for i, (regiao, desempenho_medio) in enumerate(zip(regioes, matriz.to_numpy())):
+        barras = ax_regiao_edicao.bar(
+            posicoes + i * largura_barra,  # Posições das barras
+            desempenho_medio,  # Valores do desempenho médio (NaN: sem barra)
+            width=largura_barra,  # Largura das barras
+            label=regiao,  # Rótulo da região
+            color=cores[i]  # Cor da região
+        )
+
+        # Adicionar rótulos de desempenho médio nas barras
+        if rotular:
+            ax_regiao_edicao.bar_label(
+                barras,
+                labels=['' if np.isnan(valor) else f'{valor:.2f}' for valor in desempenho_medio],
+                padding=1,
+                color='black',  # Cor do rótulo
+                # Com várias regiões por edição os rótulos ficam na vertical, menores
+                rotation=0 if len(regioes) == 1 else 90,
+                fontsize=16 if len(regioes) == 1 else 10
+            )
+
+    # Espaço acima das barras mais altas para os rótulos
+    if rotular:
+        ax_regiao_edicao.margins(y=0.08)
+
+    # Configuração dos rótulos dos eixos
+    ax_regiao_edicao.set_xlabel('Edição', color='blue', fontsize=14, fontweight='bold')  # Aumentar o tamanho da fonte
+    ax_regiao_edicao.set_ylabel('Desempenho Médio', color='blue', fontsize=14, fontweight='bold')  # Aumentar o tamanho da fonte
+    ax_regiao_edicao.set_xticks(posicoes + largura_barra * (len(regioes) - 1) / 2)
+    ax_regiao_edicao.set_xticklabels(esquema.formatar_edicoes(edicoes), rotation=45, color='blue', fontsize=12)  # Aumentar o tamanho da fonte
+    ax_regiao_edicao.tick_params(axis='y', colors='blue', labelsize=12)  # Aumentar o tamanho da fonte
+
+    # Adicionar título ao gráfico
+    ax_regiao_edicao.set_title(
+        f"Desempenho Médio por Região e Edição - {etapa_selecionada_regiao} - {componente_selecionado_regiao}",
+        fontsize=16,  # Aumentar o tamanho da fonte do título
+        fontweight='bold',  # Negrito
+        pad=20  # Espaçamento entre o título e o gráfico
+    )
+
+    # Adicionar legenda
+    ax_regiao_edicao.legend(
+        title='Região',
+        bbox_to_anchor=(1.05, 1),
+        loc='upper left',
+        fontsize=12,  # Aumentar o tamanho da fonte da legenda
+        title_fontsize=14  # Aumentar o tamanho da fonte do título da legenda
+    )
+
+    # Adicionar grid para melhorar a visualização
+    ax_regiao_edicao.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # Ajustar o layout para evitar cortes
+    fig_regiao_edicao.tight_layout()
+    return fig_regiao_edicao
+
+
+def grafico_comparacao(series_escolas, etapa_selecionada, componente_selecionado):
+    """Linhas do desempenho médio por edição, uma por escola (comparação de escolas).
+
+    `series_escolas` é a tabela de séries de `calculos.comparar_escolas`; as
+    edições em que uma escola não tem resultado ficam sem ponto na linha dela.
+    """
+    # Desempenho alinhado por INEP (linhas) e edição (colunas), em ordem de edição;
+    # o INEP distingue escolas de mesmo nome
+    matriz = (
+        series_escolas.pivot(index='INEP', columns='EDIÇÃO', values='DESEMPENHO_MEDIO')
+        .reindex(index=series_escolas['INEP'].unique())
+        .sort_index(axis=1)
+    )
+    nomes = series_escolas.drop_duplicates('INEP').set_index('INEP')['ESCOLA']
+    posicoes = np.arange(len(matriz.columns))
+
+    fig_comparacao = _figura(figsize=(12, 6))
+    ax_comparacao = fig_comparacao.subplots()
+    for inep, desempenho_medio in zip(matriz.index, matriz.to_numpy()):
+        presentes = ~np.isnan(desempenho_medio)
+        ax_comparacao.plot(posicoes[presentes], desempenho_medio[presentes], marker='o', linewidth=2, markersize=6, label=nomes[inep])
+
+    # Configuração dos rótulos dos eixos
+    ax_comparacao.set_xlabel('Edição', color='blue', fontsize=12)
+    ax_comparacao.set_ylabel('Desempenho Médio', color='blue', fontsize=12)
+    ax_comparacao.set_xticks(posicoes)
+    ax_comparacao.set_xticklabels(esquema.formatar_edicoes(matriz.columns), rotation=45, color='blue', fontsize=10)
+    ax_comparacao.tick_params(axis='y', colors='blue', labelsize=10)
+    ax_comparacao.set_title(
+        f"Desempenho Médio por Escola e Edição - {etapa_selecionada} - {componente_selecionado}",
+        fontsize=12,
+        fontweight='bold'
+    )
+    # Legenda fora da área do gráfico, como no gráfico por região
+    ax_comparacao.legend(title='Escola', bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=9, title_fontsize=10)
+    ax_comparacao.grid(axis='y', linestyle='--', alpha=0.7)
+    fig_comparacao.tight_layout()
+    return fig_comparacao
+
+
+def renderizar_png(construir, **opcoes):
+    """Monta a figura com `construir()`, grava o PNG e libera a figura em seguida."""
+    # Nome do gráfico nas medições (construir costuma ser um partial)
+    nome = getattr(getattr(construir, 'func', construir), '__name__', None)
+    with instrumentacao.etapa('grafico', nome):
+        fig = construir()
+    try:
+        with instrumentacao.etapa('codificacao', nome) as registro:
+            buf = io.BytesIO()
+            fig.savefig(buf, **opcoes)
+            return registro.resultado(buf.getvalue())
+    finally:
+        # Remove eixos e artistas já, sem depender do coletor de lixo
+        fig.clear()
+
+
+class GraficoRenderizado:
+    """PNGs de um gráfico (tela e download), cada um renderizado só quando pedido.
+
+    Nenhuma figura fica viva entre os reruns: cada PNG remonta a figura a partir
+    de `construir` na primeira vez em que é pedido e fica guardado. No modo de
+    gráficos 'vega' do dashboard o PNG da tela nunca é pedido, e o servidor só
+    renderiza o PNG de download, quando o usuário clica.
+    """
+
+    def __init__(self, construir, opcoes_download):
+        self._construir = construir
+        self._opcoes_download = {'format': 'png', **opcoes_download}
+        self._png_tela = None
+        self._png_download = None
+        self._lock = threading.Lock()
+
+    @property
+    def png_tela(self):
+        with self._lock:
+            if self._png_tela is None:
+                self._png_tela = renderizar_png(self._construir, **OPCOES_TELA)
+            return self._png_tela
+
+    def png_download(self):
+        # Chamado pelo st.download_button apenas quando o usuário clica
+        with self._lock:
+            if self._png_download is None:
+                self._png_download = renderizar_png(self._construir, **self._opcoes_download)
+            return self._png_download
+
+
+class CacheGraficos:
+    """Cache LRU limitado de gráficos renderizados, compartilhado entre sessões.
+
+    A chave deve identificar tudo o que altera o gráfico: versão dos dados,
+    escola, etapa, componente, região e o tipo de gráfico.
+    """
+
+    def __init__(self, capacidade=64):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, construir, **opcoes_download):
+        """Devolve o gráfico de `chave`, chamando `construir()` só se não estiver no cache."""
+        with self._lock:
+            grafico = self._itens.get(chave)
+            if grafico is not None:
+                self._itens.move_to_end(chave)
+                return grafico
+
+        grafico = GraficoRenderizado(construir, opcoes_download)
+
+        with self._lock:
+            existente = self._itens.get(chave)
+            if existente is not None:
+                # Outra sessão renderizou o mesmo gráfico ao mesmo tempo
+                self._itens.move_to_end(chave)
+                return existente
+            self._itens[chave] = grafico
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return grafico
+
+    def descartar(self, condicao):
+        """Remove os gráficos cujas chaves satisfazem `condicao(chave)`; retorna quantos."""
+        with self._lock:
+            chaves = [chave for chave in self._itens if condicao(chave)]
+            for chave in chaves:
+                del self._itens[chave]
+        return len(chaves)
+
+    def __len__(self):
+        return len(self._itens)
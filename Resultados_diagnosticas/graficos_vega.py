@@ -0,0 +1,154 @@
+"""Especificações Vega-Lite dos gráficos do dashboard, desenhados no navegador.
+
+Alternativa aos PNGs do matplotlib (graficos.py) no modo de gráficos 'vega' do
+dashboard: cada função `grafico_*` recebe os mesmos dados que a função
+homônima de graficos.py e devolve (dados, especificação) para o
+st.vega_lite_chart. Os dados são só as séries agregadas que vão no gráfico
+(edição em texto, valor e a cor), então o servidor envia algumas centenas de
+números em vez de rasterizar a figura; o PNG fica para os downloads.
+As cores, rótulos e títulos seguem os dos gráficos do matplotlib.
+"""
+import esquema
+import graficos
+
+# Eixos em azul, como nos gráficos do matplotlib
+_EIXO = {'labelColor': 'blue', 'titleColor': 'blue', 'labelFontSize': 10, 'titleFontSize': 12}
+
+
+def _edicao(titulo='Edição'):
+    return {'field': 'EDIÇÃO', 'type': 'ordinal', 'title': titulo, 'axis': {**_EIXO, 'labelAngle': -45}}
+
+
+def _titulo(texto, tamanho=12):
+    return {'text': texto, 'fontSize': tamanho, 'fontWeight': 'bold'}
+
+
+def grafico_periodos(df_filtrado, etapa_selecionada, componente_selecionado):
+    """Barras de desempenho médio por edição, coloridas por CICLO (aba 1)."""
+    dados = esquema.para_exibicao(
+        df_filtrado[['EDIÇÃO', 'PERIODO', 'DESEMPENHO_MEDIO']].sort_values(by='EDIÇÃO')
+    )
+    especificacao = {
+        'title': _titulo(f"Desempenho Médio por Período - {etapa_selecionada} - {componente_selecionado}"),
+        'encoding': {
+            'x': _edicao(),
+            'y': {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'title': 'Desempenho Médio', 'axis': _EIXO,
+                  'stack': None},
+        },
+        'layer': [
+            {
+                'mark': 'bar',
+                'encoding': {
+                    'color': {'field': 'PERIODO', 'type': 'nominal', 'title': None,
+                              'scale': {'domain': ['CICLO 1', 'CICLO 2'], 'range': ['skyblue', 'lightgreen']}},
+                    'tooltip': [{'field': 'EDIÇÃO'}, {'field': 'PERIODO'},
+                                {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'format': '.2f'}],
+                },
+            },
+            {
+                'mark': {'type': 'text', 'baseline': 'bottom', 'dy': -2, 'color': 'blue', 'fontSize': 10},
+                'encoding': {'text': {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'format': '.2f'}},
+            },
+        ],
+    }
+    return dados, especificacao
+
+
+def _alfabetizacao(df_escola_ama, marca):
+    dados = esquema.para_exibicao(df_escola_ama[['EDIÇÃO', 'PERCENTUAL ALFABETIZAÇÃO']])
+    dados = dados.assign(ROTULO=dados['PERCENTUAL ALFABETIZAÇÃO'].map('{:.1f}%'.format))
+    especificacao = {
+        'encoding': {
+            'x': {**_edicao(), 'axis': {**_EIXO, 'labelAngle': 0}},
+            'y': {'field': 'PERCENTUAL ALFABETIZAÇÃO', 'type': 'quantitative',
+                  'title': 'Percentual de Alfabetização', 'axis': _EIXO},
+        },
+        'layer': [
+            {'mark': marca, 'encoding': {'tooltip': [{'field': 'EDIÇÃO'}, {'field': 'ROTULO', 'title': 'Percentual'}]}},
+            {
+                'mark': {'type': 'text', 'baseline': 'bottom', 'dy': -4, 'color': 'black', 'fontSize': 8},
+                'encoding': {'text': {'field': 'ROTULO'}},
+            },
+        ],
+    }
+    return dados, especificacao
+
+
+def grafico_alfabetizacao_barras(df_escola_ama):
+    """Barras do percentual de alfabetização por edição (aba 2)."""
+    return _alfabetizacao(df_escola_ama, {'type': 'bar', 'color': 'blue'})
+
+
+def grafico_alfabetizacao_linhas(df_escola_ama):
+    """Linha do percentual de alfabetização por edição (aba 2)."""
+    return _alfabetizacao(
+        df_escola_ama, {'type': 'line', 'color': 'blue', 'strokeWidth': 2, 'point': {'color': 'blue', 'size': 64}}
+    )
+
+
+def grafico_regiao_edicao(df_regiao_edicao, etapa_selecionada_regiao, componente_selecionado_regiao,
+                          max_barras_rotuladas=graficos.MAX_BARRAS_ROTULADAS):
+    """Barras agrupadas do desempenho médio por região e edição (aba 3).
+
+    Acima de `max_barras_rotuladas` barras os valores ficam só na dica (tooltip).
+    """
+    dados = esquema.para_exibicao(
+        df_regiao_edicao[['REGIAO', 'EDIÇÃO', 'DESEMPENHO_MEDIO']].drop_duplicates(['REGIAO', 'EDIÇÃO'])
+    )
+    regioes = dados['REGIAO'].unique().tolist()
+    # Mesma contagem de graficos.py: todas as posições região x edição
+    barras = len(regioes) * dados['EDIÇÃO'].nunique()
+    camadas = [{
+        'mark': 'bar',
+        'encoding': {
+            'color': {'field': 'REGIAO', 'type': 'nominal', 'title': 'Região', 'sort': regioes,
+                      'scale': {'scheme': {'name': 'blues', 'extent': [0.4, 1]}}},
+            'tooltip': [{'field': 'REGIAO'}, {'field': 'EDIÇÃO'},
+                        {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'format': '.2f'}],
+        },
+    }]
+    if barras <= max_barras_rotuladas:
+        # Com várias regiões por edição os rótulos ficam na vertical, menores
+        uma_regiao = len(regioes) == 1
+        camadas.append({
+            'mark': {'type': 'text', 'color': 'black', 'fontSize': 16 if uma_regiao else 10,
+                     'angle': 0 if uma_regiao else 270, 'align': 'center' if uma_regiao else 'left',
+                     'baseline': 'bottom' if uma_regiao else 'middle', 'dy': -2 if uma_regiao else 0},
+            'encoding': {'text': {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'format': '.2f'}},
+        })
+    especificacao = {
+        'title': _titulo(
+            f"Desempenho Médio por Região e Edição - {etapa_selecionada_regiao} - {componente_selecionado_regiao}", 16
+        ),
+        'encoding': {
+            'x': {**_edicao(), 'axis': {**_EIXO, 'labelAngle': -45, 'labelFontSize': 12, 'titleFontSize': 14}},
+            'xOffset': {'field': 'REGIAO', 'type': 'nominal', 'sort': regioes},
+            'y': {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'title': 'Desempenho Médio',
+                  'axis': {**_EIXO, 'labelFontSize': 12, 'titleFontSize': 14, 'grid': True, 'gridDash': [4, 4]}},
+        },
+        'layer': camadas,
+    }
+    return dados, especificacao
+
+
+def grafico_comparacao(series_escolas, etapa_selecionada, componente_selecionado):
+    """Linhas do desempenho médio por edição, uma por escola (comparação de escolas)."""
+    dados = esquema.para_exibicao(
+        series_escolas[['INEP', 'ESCOLA', 'EDIÇÃO', 'PERIODO', 'DESEMPENHO_MEDIO']].sort_values(by='EDIÇÃO', kind='stable')
+    )
+    escolas = series_escolas['ESCOLA'].unique().tolist()
+    especificacao = {
+        'title': _titulo(f"Desempenho Médio por Escola e Edição - {etapa_selecionada} - {componente_selecionado}"),
+        'mark': {'type': 'line', 'strokeWidth': 2, 'point': {'size': 48}},
+        'encoding': {
+            'x': _edicao(),
+            'y': {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'title': 'Desempenho Médio',
+                  'axis': {**_EIXO, 'grid': True, 'gridDash': [4, 4]}},
+            'color': {'field': 'ESCOLA', 'type': 'nominal', 'title': 'Escola', 'sort': escolas},
+            # Uma linha por INEP, mesmo para escolas de mesmo nome
+            'detail': {'field': 'INEP', 'type': 'nominal'},
+            'tooltip': [{'field': 'ESCOLA'}, {'field': 'INEP'}, {'field': 'EDIÇÃO'}, {'field': 'PERIODO'},
+                        {'field': 'DESEMPENHO_MEDIO', 'type': 'quantitative', 'format': '.2f'}],
+        },
+    }
+    return dados, especificacao
@@ -0,0 +1,53 @@
+"""Índice invertido das dimensões das tabelas do dashboard.
+
+Para cada coluna indexada (INEP, ESCOLA, ETAPA, ...) guarda o vetor ordenado de
+posições das linhas de cada valor. Um filtro vira a interseção desses vetores,
+em vez de uma varredura booleana da coluna inteira a cada interação.
+"""
+import numpy as np
+
+_VAZIO = np.array([], dtype=np.intp)
+
+
+class IndiceInvertido:
+    """Índice valor -> posições das linhas, construído uma vez por snapshot."""
+
+    def __init__(self, df, colunas):
+        self.df = df
+        self.posicoes = {}
+        for coluna in colunas:
+            # groupby(...).indices devolve as posições de cada valor já ordenadas
+            grupos = df.groupby(coluna, observed=True, sort=False).indices
+            self.posicoes[coluna] = {str(valor): pos for valor, pos in grupos.items()}
+
+    def contem(self, coluna, valor):
+        return str(valor) in self.posicoes[coluna]
+
+    def localizar(self, **filtros):
+        """Posições das linhas que atendem a todos os filtros.
+
+        Filtros com valor None são ignorados; sem nenhum filtro ativo o
+        retorno é None, que significa "todas as linhas".
+        """
+        resultado = None
+        # Começa pelo filtro mais seletivo para que as interseções fiquem pequenas
+        ativos = [self.posicoes[c].get(str(v), _VAZIO) for c, v in filtros.items() if v is not None]
+        for pos in sorted(ativos, key=len):
+            resultado = pos if resultado is None else np.intersect1d(resultado, pos, assume_unique=True)
+        return resultado
+
+    def selecionar(self, **filtros):
+        """Linhas que atendem aos filtros, sem copiar a tabela quando não há filtro."""
+        posicoes = self.localizar(**filtros)
+        if posicoes is None:
+            return self.df
+        return self.df.take(posicoes)
+
+    def primeiro(self, coluna_valor, **filtros):
+        """Valor de `coluna_valor` na primeira linha que atende aos filtros (ou None)."""
+        posicoes = self.localizar(**filtros)
+        if posicoes is None:
+            posicoes = np.arange(min(len(self.df), 1))
+        if len(posicoes) == 0:
+            return None
+        return self.df[coluna_valor].iat[posicoes[0]]
@@ -0,0 +1,268 @@
+"""Instrumentação por etapa dos reruns do dashboard e da montagem dos snapshots.
+
+Cada rerun abre uma `Medicao`. Os trechos de carga, acesso, filtro, agregação,
+gráfico e codificação registram nela, com `etapa(...)`, o tempo de parede, as
+linhas e a memória do resultado e o RSS do processo ao final do trecho. A
+medição ativa é guardada por thread, como as sessões do Streamlit. Sem medição
+ativa, `etapa` não registra nada, então calculos/graficos/recarga podem ser
+instrumentados sem depender do Streamlit.
+
+Ao concluir, a medição vira uma linha JSON no log estruturado, definido por
+RESULTADOS_LOG_ETAPAS (padrão logs/etapas.jsonl; vazio desativa). Com
+RESULTADOS_PERFIL=<pasta>, cada medição roda sob o cProfile e o perfil é gravado
+em <pasta>/<rotulo>-<momento>-<n>.prof. RESULTADOS_PERFIL_FRACAO (0 a 1) limita a
+fração de reruns perfilados em produção; os perfis podem ser lidos com pstats
+ou snakeviz.
+"""
+import cProfile
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_PADRAO = os.path.join(BASE_DIR, 'logs', 'etapas.jsonl')
+
+# Etapas medidas, na ordem em que aparecem num rerun
+ETAPAS = ('carga', 'acesso', 'filtro', 'agregacao', 'grafico', 'codificacao')
+
+# Tamanho máximo de cada arquivo do log antes da rotação, e quantos são mantidos
+TAMANHO_LOG = 10 * 2 ** 20
+ARQUIVOS_LOG = 5
+
+_local = threading.local()
+_log = None
+_log_lock = threading.Lock()
+# Um perfil por vez (o cProfile de uma thread não enxerga as demais, e perfis
+# simultâneos só disputariam a CPU): thread que está perfilando, se houver.
+# Um rerun interrompido por exceção não conclui a medição; se a thread dele já
+# terminou, a vaga é liberada para o próximo perfil
+_perfilando = None
+_perfil_lock = threading.Lock()
+# Numeração dos arquivos de perfil gravados por este processo
+_sequencia = itertools.count(1)
+
+
+def rss_mb():
+    """RSS atual do processo em MB (Linux); fora do Linux, o pico de RSS."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2 ** 20 if sys.platform == 'darwin' else pico / 2 ** 10
+
+
+def _tamanho(valor):
+    # (linhas, MB) de um resultado: DataFrames, PNGs e tuplas deles
+    if isinstance(valor, pd.DataFrame):
+        return len(valor), valor.memory_usage(index=True).sum() / 2 ** 20
+    if isinstance(valor, pd.Series):
+        return len(valor), valor.memory_usage(index=True) / 2 ** 20
+    if isinstance(valor, np.ndarray):
+        return len(valor), valor.nbytes / 2 ** 20
+    if isinstance(valor, (bytes, bytearray)):
+        return None, len(valor) / 2 ** 20
+    if isinstance(valor, (tuple, list)):
+        partes = [_tamanho(parte) for parte in valor]
+        linhas = [linhas for linhas, _ in partes if linhas is not None]
+        memoria = [memoria for _, memoria in partes if memoria is not None]
+        return (sum(linhas) if linhas else None), (sum(memoria) if memoria else None)
+    return None, None
+
+
+class Registro:
+    """Uma etapa medida: tempo de parede, linhas e memória do resultado, RSS ao final."""
+
+    __slots__ = ('etapa', 'detalhe', 'duracao_ms', 'linhas', 'memoria_mb', 'rss_mb')
+
+    def __init__(self, etapa, detalhe):
+        self.etapa = etapa
+        self.detalhe = detalhe
+        self.duracao_ms = None
+        self.linhas = None
+        self.memoria_mb = None
+        self.rss_mb = None
+
+    def resultado(self, valor):
+        """Anota linhas e memória de `valor` e o devolve."""
+        self.linhas, self.memoria_mb = _tamanho(valor)
+        return valor
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class _RegistroNulo:
+    # Usado quando não há medição ativa: não guarda nada
+    def resultado(self, valor):
+        return valor
+
+
+_NULO = _RegistroNulo()
+
+
+class Medicao:
+    """Registros das etapas de um rerun (ou de uma montagem de snapshot)."""
+
+    def __init__(self, rotulo, **contexto):
+        self.rotulo = rotulo
+        self.contexto = contexto
+        self.momento = time.time()
+        self.registros = []
+        self.duracao_ms = None
+        self.perfil = None
+        self._inicio = time.perf_counter()
+        self._anterior = None
+        self._profiler = None
+
+    def totais(self):
+        """Tempo total (ms) de cada etapa, somando os registros."""
+        totais = dict.fromkeys(ETAPAS, 0.0)
+        for registro in self.registros:
+            totais[registro.etapa] = totais.get(registro.etapa, 0.0) + registro.duracao_ms
+        return totais
+
+    def tabela(self):
+        """Registros como DataFrame, um por linha, para exibição."""
+        return pd.DataFrame([registro.como_dict() for registro in self.registros], columns=list(Registro.__slots__))
+
+    def como_dict(self):
+        return {
+            'rotulo': self.rotulo,
+            'momento': self.momento,
+            'duracao_ms': self.duracao_ms,
+            'contexto': self.contexto,
+            'totais_ms': self.totais(),
+            'etapas': [registro.como_dict() for registro in self.registros],
+            'perfil': self.perfil,
+        }
+
+
+def atual():
+    """Medição ativa nesta thread, ou None."""
+    return getattr(_local, 'medicao', None)
+
+
+def iniciar(rotulo, raiz=False, **contexto):
+    """Abre uma medição nesta thread; a que estava ativa volta ao concluir esta.
+
+    Com `raiz`, medições que ficaram abertas nesta thread (de um rerun
+    interrompido por exceção) são descartadas antes, sem ir para o log.
+    """
+    while raiz and atual() is not None:
+        concluir(atual(), gravar=False)
+    medicao = Medicao(rotulo, **contexto)
+    medicao._anterior = atual()
+    _local.medicao = medicao
+    medicao._profiler = _iniciar_perfil()
+    return medicao
+
+
+def concluir(medicao, gravar=True):
+    """Fecha a medição, grava o perfil (se houver) e a linha do log estruturado."""
+    medicao.duracao_ms = (time.perf_counter() - medicao._inicio) * 1000
+    if atual() is medicao:
+        _local.medicao = medicao._anterior
+    profiler, medicao._profiler = medicao._profiler, None
+    if profiler is not None:
+        profiler.disable()
+        _liberar_perfil()
+        if gravar:
+            medicao.perfil = _gravar_perfil(profiler, medicao)
+    if gravar:
+        _gravar_log(medicao)
+    return medicao
+
+
+@contextmanager
+def etapa(nome, detalhe=None):
+    """Mede o bloco como uma etapa da medição ativa (sem medição ativa, não faz nada)."""
+    medicao = atual()
+    if medicao is None:
+        yield _NULO
+        return
+    registro = Registro(nome, detalhe)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro.duracao_ms = (time.perf_counter() - inicio) * 1000
+        registro.rss_mb = rss_mb()
+        medicao.registros.append(registro)
+
+
+def medido(nome):
+    """Decorador: cada chamada da função vira uma etapa `nome`, com o resultado anotado."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with etapa(nome, funcao.__name__) as registro:
+                return registro.resultado(funcao(*args, **kwargs))
+        return medida
+    return decorador
+
+
+def _iniciar_perfil():
+    if not os.environ.get('RESULTADOS_PERFIL'):
+        return None
+    if random.random() >= float(os.environ.get('RESULTADOS_PERFIL_FRACAO', '1')):
+        return None
+    global _perfilando
+    with _perfil_lock:
+        if _perfilando is not None and _perfilando.is_alive():
+            return None
+        _perfilando = threading.current_thread()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _liberar_perfil():
+    global _perfilando
+    with _perfil_lock:
+        _perfilando = None
+
+
+def _gravar_perfil(profiler, medicao):
+    pasta = os.environ['RESULTADOS_PERFIL']
+    os.makedirs(pasta, exist_ok=True)
+    momento = time.strftime('%Y%m%d-%H%M%S', time.localtime(medicao.momento))
+    caminho = os.path.join(pasta, f"{medicao.rotulo}-{momento}-{next(_sequencia):06d}.prof")
+    profiler.dump_stats(caminho)
+    return caminho
+
+
+def _logger():
+    # Criado na primeira gravação, com o caminho do ambiente daquele momento
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = logging.getLogger('resultados.etapas')
+            _log.setLevel(logging.INFO)
+            _log.propagate = False
+            caminho = os.environ.get('RESULTADOS_LOG_ETAPAS', LOG_PADRAO)
+            if caminho:
+                os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+                manipulador = RotatingFileHandler(caminho, maxBytes=TAMANHO_LOG, backupCount=ARQUIVOS_LOG, encoding='utf-8')
+                manipulador.setFormatter(logging.Formatter('%(message)s'))
+                _log.addHandler(manipulador)
+        return _log
+
+
+def _gravar_log(medicao):
+    log = _logger()
+    if log.handlers:
+        log.info(json.dumps(medicao.como_dict(), ensure_ascii=False, default=str))
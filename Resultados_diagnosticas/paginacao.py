@@ -0,0 +1,34 @@
+"""Paginação no servidor das tabelas grandes do dashboard, sem dependência do Streamlit.
+
+Em vez de enviar a tabela inteira ao navegador (na visão TODAS do administrador,
+a rede toda), o dashboard calcula uma vez a ordem das linhas para a coluna e o
+sentido escolhidos e serializa só a página visível, com as colunas escolhidas.
+"""
+import numpy as np
+
+# Opções de linhas por página
+TAMANHOS = (25, 50, 100, 250)
+
+
+def ordem(df, coluna=None, crescente=True):
+    """Posições das linhas de `df` ordenadas por `coluna`, com os nulos no fim.
+
+    Sem coluna, a ordem original da tabela. A ordenação é estável, então
+    empates mantêm a ordem original.
+    """
+    if coluna is None:
+        return np.arange(len(df))
+    valores = df[coluna].reset_index(drop=True)
+    return valores.sort_values(ascending=crescente, na_position='last', kind='stable').index.to_numpy()
+
+
+def total_paginas(linhas, tamanho):
+    """Quantidade de páginas de `tamanho` linhas (ao menos uma, mesmo sem linhas)."""
+    return max(-(-linhas // tamanho), 1)
+
+
+def pagina(df, posicoes, numero, tamanho, colunas=None):
+    """Linhas da página `numero` (a partir de 1) na ordem `posicoes`, só com `colunas`."""
+    inicio = (numero - 1) * tamanho
+    trecho = df.take(posicoes[inicio:inicio + tamanho])
+    return trecho if colunas is None else trecho[list(colunas)]
@@ -0,0 +1,183 @@
+"""Recarga a quente dos dados, sem reiniciar o servidor.
+
+Uma thread em segundo plano verifica periodicamente as planilhas de xls/ (só
+mtime e tamanho, via manifesto de dados.py). Quando alguma partição muda, monta
+um novo `Snapshot` completo, com tabelas, índices, variações, cubo, resumo por
+escola e credenciais de login, atualizando
+os derivados só nas edições afetadas, e o publica trocando uma única
+referência. Cada rerun do dashboard pega o snapshot atual uma vez e o usa do
+começo ao fim: sessões em andamento nunca esperam a recarga nem veem uma mistura
+de versões. Os caches que dependem dos dados usam `Snapshot.versao` na chave e
+podem ser avisados das trocas com `ao_trocar`.
+"""
+import copy
+import logging
+import threading
+
+import acesso
+import cubo
+import dados
+import indice
+import instrumentacao
+import resumo
+import variacao
+
+# Intervalo, em segundos, entre as verificações das planilhas
+INTERVALO_PADRAO = 30
+
+# Colunas indexadas de cada tabela
+COLUNAS_INDICES = {
+    'login': ['INEP'],
+    'dados': ['INEP', 'ESCOLA', 'ETAPA', 'COMP_CURRICULAR', 'REGIAO'],
+    'ama': ['INEP', 'ESCOLA'],
+}
+
+log = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """Conjunto imutável dos dados de uma versão e de tudo o que deriva deles."""
+
+    def __init__(self, versao, tabelas, indices, variacoes, cubo_dados, resumo_escolas, credenciais):
+        self.versao = versao
+        self.tabelas = tabelas
+        self.indices = indices
+        self.variacoes = variacoes
+        self.cubo = cubo_dados
+        self.resumo = resumo_escolas
+        self.credenciais = credenciais
+
+
+def montar_snapshot(tabelas_particionadas, anterior=None, afetadas=None):
+    """Monta o Snapshot a partir das tabelas carregadas.
+
+    Com `anterior` e as edições `afetadas` de cada tabela, reaproveita os
+    índices das tabelas que não mudaram e atualiza variações e cubo só nas
+    edições alteradas; sem eles, calcula tudo do zero.
+    """
+    tabelas = {nome: tabela.df for nome, tabela in tabelas_particionadas.items()}
+    versao = dados.versao_manifestos({nome: tabela.manifesto for nome, tabela in tabelas_particionadas.items()})
+
+    indices = {}
+    for nome, colunas in COLUNAS_INDICES.items():
+        if anterior is not None and tabelas[nome] is anterior.tabelas[nome]:
+            indices[nome] = anterior.indices[nome]
+        else:
+            with instrumentacao.etapa('agregacao', f"indice_{nome}"):
+                indices[nome] = indice.IndiceInvertido(tabelas[nome], colunas)
+
+    df_dados = tabelas['dados']
+    if anterior is None:
+        with instrumentacao.etapa('agregacao', 'variacoes') as registro:
+            variacoes = registro.resultado(variacao.calcular_variacoes(df_dados))
+        with instrumentacao.etapa('agregacao', 'cubo') as registro:
+            cubo_dados = cubo.CuboDesempenho(df_dados)
+            registro.resultado(cubo_dados.tabela)
+    elif df_dados is anterior.tabelas['dados']:
+        variacoes = anterior.variacoes
+        cubo_dados = anterior.cubo
+    else:
+        with instrumentacao.etapa('agregacao', 'variacoes') as registro:
+            variacoes = registro.resultado(variacao.atualizar_variacoes(anterior.variacoes, df_dados, afetadas['dados']))
+        # Cópia rasa: atualizar_edicoes troca a tabela do cubo, e a versão
+        # anterior continua intacta para os reruns que ainda a usam
+        with instrumentacao.etapa('agregacao', 'cubo') as registro:
+            cubo_dados = copy.copy(anterior.cubo)
+            cubo_dados.atualizar_edicoes(df_dados, afetadas['dados'])
+            registro.resultado(cubo_dados.tabela)
+
+    # Resumo longitudinal por escola: refeito inteiro quando dados ou AMA mudam
+    # (uma linha por INEP, barato perto do cubo)
+    if anterior is not None and df_dados is anterior.tabelas['dados'] and tabelas['ama'] is anterior.tabelas['ama']:
+        resumo_escolas = anterior.resumo
+    else:
+        with instrumentacao.etapa('agregacao', 'resumo') as registro:
+            resumo_escolas = resumo.ResumoEscolas(df_dados, tabelas['ama'])
+            registro.resultado(resumo_escolas.tabela)
+
+    # Credenciais de login (INEP -> escola e perfil) desta versão dos dados
+    with instrumentacao.etapa('acesso', 'credenciais'):
+        credenciais = acesso.montar_credenciais(tabelas['login'], indices['dados'])
+
+    return Snapshot(versao, tabelas, indices, variacoes, cubo_dados, resumo_escolas, credenciais)
+
+
+def _carregar(nome):
+    with instrumentacao.etapa('carga', nome) as registro:
+        tabela = dados.TabelaParticionada(nome)
+        registro.resultado(tabela.df)
+    return tabela
+
+
+class Recarregador:
+    """Mantém o snapshot atual e o reconstrói em segundo plano quando a origem muda."""
+
+    def __init__(self, intervalo=INTERVALO_PADRAO, nomes=tuple(dados.PLANILHAS)):
+        self.intervalo = intervalo
+        # A primeira carga é síncrona: sem ela não há o que servir
+        medicao = instrumentacao.iniciar('snapshot')
+        try:
+            self._tabelas = {nome: _carregar(nome) for nome in nomes}
+            self._atual = montar_snapshot(self._tabelas)
+        finally:
+            instrumentacao.concluir(medicao)
+        self._assinantes = []
+        self._pendentes = {}
+        self._verificando = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name='recarga-dados', daemon=True)
+        if intervalo:
+            self._thread.start()
+
+    @property
+    def atual(self):
+        """Snapshot em uso; a troca é uma única atribuição, atômica para os leitores."""
+        return self._atual
+
+    def ao_trocar(self, funcao):
+        """Registra `funcao(snapshot_novo, snapshot_anterior)`, chamada após cada troca."""
+        self._assinantes.append(funcao)
+
+    def verificar(self):
+        """Incorpora as mudanças da origem; retorna True se o snapshot foi trocado."""
+        medicao = instrumentacao.iniciar('recarga')
+        trocou = False
+        try:
+            trocou = self._verificar()
+        finally:
+            # Verificações sem mudança (a maioria) não vão para o log de etapas
+            instrumentacao.concluir(medicao, gravar=trocou)
+        return trocou
+
+    def _verificar(self):
+        with self._verificando:
+            # Mudanças de uma verificação que falhou ao montar o snapshot
+            # continuam pendentes até a troca dar certo
+            for nome, tabela in self._tabelas.items():
+                with instrumentacao.etapa('carga', nome):
+                    edicoes = tabela.atualizar()
+                if edicoes is not None:
+                    self._pendentes[nome] = self._pendentes.get(nome, set()) | edicoes
+            if not self._pendentes:
+                return False
+            anterior = self._atual
+            novo = montar_snapshot(self._tabelas, anterior, self._pendentes)
+            afetadas, self._pendentes = self._pendentes, {}
+            self._atual = novo
+        log.info("dados recarregados: versão %s -> %s (edições afetadas: %s)", anterior.versao, novo.versao,
+                 {nome: sorted(edicoes) for nome, edicoes in afetadas.items()})
+        for funcao in self._assinantes:
+            funcao(novo, anterior)
+        return True
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                # Planilha em cópia ou corrompida: continua servindo a versão
+                # atual e tenta de novo na próxima verificação
+                log.exception("falha ao recarregar os dados; mantendo a versão %s", self._atual.versao)
+
+    def parar(self):
+        self._parar.set()
@@ -0,0 +1,264 @@
+"""Geração em lote dos boletins por escola e por região, sem o Streamlit.
+
+Para cada INEP de senhas_acesso.xlsx gera um relatório com a tabela de variação
+entre ciclos, os gráficos de desempenho por período (um por ETAPA e COMPONENTE)
+e os gráficos de alfabetização; para cada REGIAO, os gráficos de desempenho
+médio por edição. Os cálculos e gráficos são os mesmos do dashboard
+(calculos.py e graficos.py) e os relatórios são distribuídos num pool de
+processos.
+
+Reexecuções são incrementais: o manifesto da pasta de saída guarda o hash das
+linhas de entrada de cada relatório, e só são refeitos os relatórios cujas
+linhas mudaram (ou cujo arquivo não existe mais).
+
+Uso (a partir da raiz do repositório):
+
+    python Resultados_diagnosticas/relatorios.py [--saida DIR] [--formato pdf|png]
+        [--processos N] [--inep INEP ...] [--sem-regioes] [--forcar]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+import calculos
+import dados
+import graficos
+import recarga
+import variacao
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAIDA_PADRAO = os.path.join(BASE_DIR, 'relatorios')
+
+# Incrementar quando o conteúdo/leiaute dos relatórios mudar, para refazer todos
+VERSAO_LAYOUT = 1
+
+# Estado carregado uma vez em cada processo do pool
+_contexto = None
+
+
+class Contexto:
+    """Snapshot dos dados usado na geração dos relatórios.
+
+    Montado por `recarga.montar_snapshot`, como no dashboard e na exportação:
+    índices, variações, cubo (ponderado pelas matrículas, se houver a coluna) e
+    resumo por escola são os mesmos que as abas exibem.
+    """
+
+    def __init__(self):
+        self.snapshot = recarga.montar_snapshot({nome: dados.TabelaParticionada(nome) for nome in dados.PLANILHAS})
+        self.df_login = self.snapshot.tabelas['login']
+        self.indice_dados = self.snapshot.indices['dados']
+        self.indice_ama = self.snapshot.indices['ama']
+        self.variacoes = self.snapshot.variacoes
+        self.cubo_dados = self.snapshot.cubo
+        self.resumo = self.snapshot.resumo
+
+    def linhas_escola(self, inep):
+        return (
+            self.indice_dados.selecionar(INEP=inep),
+            self.indice_ama.selecionar(INEP=inep),
+            variacao.filtrar_variacoes(self.variacoes, INEP=inep),
+        )
+
+    def linhas_regiao(self, regiao):
+        return (self.indice_dados.selecionar(REGIAO=regiao),)
+
+
+def _nome_arquivo(texto):
+    return re.sub(r'[^\w-]+', '_', str(texto)).strip('_')
+
+
+def assinatura(*tabelas):
+    """Hash do conteúdo das linhas de entrada de um relatório."""
+    h = hashlib.sha256(f"layout={VERSAO_LAYOUT}".encode())
+    for tabela in tabelas:
+        h.update(str(list(tabela.columns)).encode())
+        h.update(pd.util.hash_pandas_object(tabela, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def pagina_variacoes(nome_escola, inep, variacoes):
+    """Página de abertura do boletim com a tabela de variação entre ciclos."""
+    colunas = ['ETAPA', 'COMP_CURRICULAR', 'Períodos Comparados', 'Diferença de Pontos', 'Variação Percentual']
+    linhas = variacao.formatar_variacoes(variacoes)[colunas].astype(str).values.tolist()
+    fig = Figure(figsize=(11.69, 8.27))  # A4 paisagem
+    fig.suptitle(f"{nome_escola} (INEP {inep})", fontsize=16, fontweight='bold')
+    ax = fig.subplots()
+    ax.axis('off')
+    ax.set_title("Tabela de Variação Entre Ciclos", fontsize=12, pad=20)
+    if linhas:
+        tabela = ax.table(
+            cellText=linhas,
+            colLabels=colunas,
+            loc='upper center',
+            cellLoc='center',
+        )
+        tabela.auto_set_font_size(False)
+        tabela.set_fontsize(9)
+        tabela.scale(1, 1.4)
+    else:
+        ax.text(0.5, 0.8, "Não há dados suficientes para calcular a variação entre os ciclos.", ha='center')
+    return fig
+
+
+def paginas_escola(contexto, inep):
+    """Figuras do boletim de uma escola, na ordem das abas do dashboard."""
+    df_escola, df_escola_ama, variacoes = contexto.linhas_escola(inep)
+    nome_escola = df_escola['ESCOLA'].iat[0]
+    yield 'variacao', lambda: pagina_variacoes(nome_escola, inep, variacoes)
+
+    # Aba 1: um gráfico por ETAPA e COMPONENTE CURRICULAR da escola
+    # Ciclos e série de alfabetização da escola vêm prontos do resumo
+    inep_resumo = contexto.resumo.inep(INEP=inep)
+    periodos = contexto.resumo.periodos(inep_resumo)
+    combinacoes = df_escola[['ETAPA', 'COMP_CURRICULAR']].drop_duplicates().astype(str)
+    for etapa, componente in sorted(combinacoes.itertuples(index=False)):
+        df_filtrado = calculos.resultados_filtrados(contexto.indice_dados, periodos, etapa, componente, INEP=inep)
+        yield (
+            f"periodo_{etapa}_{componente}",
+            lambda df=df_filtrado, e=etapa, c=componente: graficos.grafico_periodos(df, e, c),
+        )
+
+    # Aba 2: alfabetização
+    if not df_escola_ama.empty:
+        df_ama = contexto.resumo.serie_alfabetizacao(inep_resumo)
+        yield 'alfabetizacao_barras', lambda: graficos.grafico_alfabetizacao_barras(df_ama)
+        yield 'alfabetizacao_linhas', lambda: graficos.grafico_alfabetizacao_linhas(df_ama)
+
+
+def paginas_regiao(contexto, regiao):
+    """Figuras do relatório de uma região: um gráfico por ETAPA e COMPONENTE."""
+    (df_regiao,) = contexto.linhas_regiao(regiao)
+    combinacoes = df_regiao[['ETAPA', 'COMP_CURRICULAR']].drop_duplicates().astype(str)
+    for etapa, componente in sorted(combinacoes.itertuples(index=False)):
+        df_regiao_edicao = calculos.desempenho_regiao_edicao(contexto.cubo_dados, etapa, componente, regiao)
+        yield (
+            f"regiao_{etapa}_{componente}",
+            lambda df=df_regiao_edicao, e=etapa, c=componente: graficos.grafico_regiao_edicao(df, e, c),
+        )
+
+
+def gravar(paginas, destino, formato):
+    """Grava as figuras num PDF (uma por página) ou numa pasta de PNGs."""
+    if formato == 'pdf':
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with PdfPages(temporario) as pdf:
+            for _, construir in paginas:
+                fig = construir()
+                try:
+                    pdf.savefig(fig, bbox_inches='tight')
+                finally:
+                    fig.clear()
+        os.replace(temporario, destino)
+    else:
+        # Pasta nova no lugar da anterior: páginas de uma geração mais longa não sobram
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        for numero, (nome, construir) in enumerate(paginas, start=1):
+            caminho = os.path.join(temporario, f"{numero:02d}_{_nome_arquivo(nome)}.png")
+            with open(caminho, 'wb') as f:
+                f.write(graficos.renderizar_png(construir, format='png', dpi=150, bbox_inches='tight'))
+        # os.replace não substitui uma pasta com arquivos: a anterior sai primeiro
+        anterior = f"{destino}.{os.getpid()}.old"
+        if os.path.isdir(destino):
+            os.replace(destino, anterior)
+        os.replace(temporario, destino)
+        shutil.rmtree(anterior, ignore_errors=True)
+
+
+def _iniciar_processo():
+    global _contexto
+    _contexto = Contexto()
+
+
+def gerar_relatorio(tipo, chave, destino, formato):
+    """Executado nos processos do pool: gera um relatório de escola ou região."""
+    paginas = paginas_escola(_contexto, chave) if tipo == 'escola' else paginas_regiao(_contexto, chave)
+    gravar(paginas, destino, formato)
+    return tipo, chave, destino
+
+
+def _ler_manifesto(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _gravar_manifesto(caminho, manifesto):
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def planejar(contexto, saida, formato, ineps=None, regioes=True):
+    """Lista (tipo, chave, destino, assinatura) de todos os relatórios pedidos."""
+    extensao = '.pdf' if formato == 'pdf' else ''
+    tarefas = []
+    for inep in ineps or contexto.df_login['INEP'].tolist():
+        if not contexto.indice_dados.contem('INEP', inep):
+            print(f"INEP {inep}: sem dados de avaliação, relatório não gerado")
+            continue
+        destino = os.path.join(saida, 'escolas', f"{_nome_arquivo(inep)}{extensao}")
+        tarefas.append(('escola', inep, destino, assinatura(*contexto.linhas_escola(inep))))
+    if regioes:
+        for regiao in sorted(contexto.indice_dados.posicoes['REGIAO']):
+            destino = os.path.join(saida, 'regioes', f"{_nome_arquivo(regiao)}{extensao}")
+            tarefas.append(('regiao', regiao, destino, assinatura(*contexto.linhas_regiao(regiao))))
+    return tarefas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os boletins de todas as escolas e regiões.")
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help="Pasta de saída dos relatórios.")
+    parser.add_argument('--formato', choices=['pdf', 'png'], default='pdf')
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help="Processos do pool.")
+    parser.add_argument('--inep', nargs='+', help="Gera apenas os boletins destes INEPs.")
+    parser.add_argument('--sem-regioes', action='store_true', help="Não gera os relatórios por região.")
+    parser.add_argument('--forcar', action='store_true', help="Refaz todos os relatórios, mesmo sem mudanças.")
+    args = parser.parse_args()
+
+    contexto = Contexto()
+    tarefas = planejar(contexto, args.saida, args.formato, args.inep, not args.sem_regioes)
+
+    for pasta in ('escolas', 'regioes'):
+        os.makedirs(os.path.join(args.saida, pasta), exist_ok=True)
+    caminho_manifesto = os.path.join(args.saida, 'manifesto.json')
+    manifesto = _ler_manifesto(caminho_manifesto)
+
+    # O manifesto é indexado pelo caminho relativo à pasta de saída
+    pendentes = [
+        tarefa for tarefa in tarefas
+        if args.forcar
+        or manifesto.get(os.path.relpath(tarefa[2], args.saida)) != tarefa[3]
+        or not os.path.exists(tarefa[2])
+    ]
+    print(f"{len(tarefas)} relatórios, {len(tarefas) - len(pendentes)} sem mudanças, {len(pendentes)} a gerar")
+    if not pendentes:
+        return
+
+    assinaturas = {destino: hash_entrada for _, _, destino, hash_entrada in pendentes}
+    with ProcessPoolExecutor(max_workers=args.processos, initializer=_iniciar_processo) as pool:
+        futuros = [pool.submit(gerar_relatorio, tipo, chave, destino, args.formato) for tipo, chave, destino, _ in pendentes]
+        for futuro in as_completed(futuros):
+            tipo, chave, destino = futuro.result()
+            relativo = os.path.relpath(destino, args.saida)
+            manifesto[relativo] = assinaturas[destino]
+            # Grava a cada relatório para não perder o progresso se o lote for interrompido
+            _gravar_manifesto(caminho_manifesto, manifesto)
+            print(f"{tipo} {chave}: {relativo}")
+
+
+if __name__ == '__main__':
+    main()
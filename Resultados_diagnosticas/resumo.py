@@ -0,0 +1,137 @@
+"""Resumo longitudinal por escola (INEP), calculado uma vez por snapshot.
+
+Para cada INEP, uma linha com:
+- a série de DESEMPENHO_MEDIO por edição (média de todas as etapas e
+  componentes, ponderada pelas matrículas como no cubo, se houver a coluna) e o
+  CICLO de cada edição, como em `calculos.periodos_por_edicao`;
+- a série de PERCENTUAL ALFABETIZAÇÃO por edição da AMA, linha a linha;
+- o primeiro e o último valor e a tendência (inclinação da reta de mínimos
+  quadrados, em pontos por edição) de cada série;
+- a posição da escola na sua região pelo último desempenho (1 = maior) e
+  quantas escolas da região têm desempenho.
+
+As páginas de uma escola leem os ciclos e a série de alfabetização daqui em vez
+de reordenar as linhas brutas a cada visita, e a visão geral do administrador
+ordena e percorre todas as escolas de uma vez.
+"""
+import numpy as np
+import pandas as pd
+
+import cubo
+
+# Colunas com as séries (tuplas alinhadas pela edição); as demais são escalares
+SERIES = ['EDICOES_DESEMPENHO', 'SERIE_DESEMPENHO', 'CICLOS', 'EDICOES_ALFABETIZACAO', 'SERIE_ALFABETIZACAO']
+
+
+def medias_por_edicao(df, valor, coluna_peso=None):
+    """Média de `valor` por INEP (em texto) e EDIÇÃO, ponderada por `coluna_peso` se informada."""
+    base = df[['INEP', 'EDIÇÃO', valor]].astype({'INEP': str})
+    if coluna_peso is None:
+        return base.groupby(['INEP', 'EDIÇÃO'])[valor].mean().reset_index()
+    base = base.assign(_PESO=df[coluna_peso].to_numpy(), _PRODUTO=df[valor].to_numpy() * df[coluna_peso].to_numpy())
+    somas = base.groupby(['INEP', 'EDIÇÃO'])[['_PRODUTO', '_PESO']].sum()
+    return (somas['_PRODUTO'] / somas['_PESO']).rename(valor).reset_index()
+
+
+def _series(df, valor, coluna_peso=None, agregar=True):
+    # Série de cada INEP em ordem de edição, com a posição da edição na série da
+    # escola e a quantidade de edições. Com `agregar`, uma média por INEP e
+    # edição; sem, as próprias linhas (edições repetidas ficam na mesma posição)
+    if agregar:
+        medias = medias_por_edicao(df, valor, coluna_peso)
+    else:
+        base = df[['INEP', 'EDIÇÃO', valor]].astype({'INEP': str})
+        medias = base.sort_values(['INEP', 'EDIÇÃO'], kind='stable', ignore_index=True)
+    grupos = medias.groupby('INEP', sort=False)['EDIÇÃO']
+    return medias.assign(_POSICAO=grupos.rank(method='dense') - 1, _TOTAL=grupos.transform('nunique'))
+
+
+def _tendencia(series, valor):
+    # Inclinação de mínimos quadrados de `valor` pela posição da edição, por INEP
+    x = series['_POSICAO']
+    y = series[valor]
+    somas = pd.DataFrame({'n': 1.0, 'x': x, 'y': y, 'xy': x * y, 'xx': x * x, 'INEP': series['INEP']}).groupby('INEP').sum()
+    variancia = somas['n'] * somas['xx'] - somas['x'] ** 2
+    return ((somas['n'] * somas['xy'] - somas['x'] * somas['y']) / variancia.where(variancia > 0)).rename(None)
+
+
+def _extremos(series, valor):
+    grupos = series.groupby('INEP', sort=False)[valor]
+    return grupos.first(), grupos.last()
+
+
+class ResumoEscolas:
+    """Tabela de resumo (uma linha por INEP) e consultas das páginas de escola."""
+
+    def __init__(self, df_dados, df_ama, coluna_peso=cubo.COLUNA_PESO):
+        peso = coluna_peso if coluna_peso in df_dados.columns else None
+        desempenho = _series(df_dados, 'DESEMPENHO_MEDIO', peso)
+        # A AMA pode ter mais de um resultado na mesma edição; os gráficos mostram todos
+        alfabetizacao = _series(df_ama, 'PERCENTUAL ALFABETIZAÇÃO', agregar=False)
+
+        # CICLO 1 para a primeira metade (arredondada para baixo) das edições da escola
+        ciclos = np.where(desempenho['_POSICAO'] < desempenho['_TOTAL'] // 2, 'CICLO 1', 'CICLO 2')
+        por_escola = desempenho.assign(CICLO=ciclos).groupby('INEP', sort=False)
+        inicial, final = _extremos(desempenho, 'DESEMPENHO_MEDIO')
+        tabela_desempenho = pd.DataFrame({
+            'EDICOES_DESEMPENHO': por_escola['EDIÇÃO'].agg(tuple),
+            'SERIE_DESEMPENHO': por_escola['DESEMPENHO_MEDIO'].agg(tuple),
+            'CICLOS': por_escola['CICLO'].agg(tuple),
+            'DESEMPENHO_INICIAL': inicial,
+            'DESEMPENHO_FINAL': final,
+            'TENDENCIA_DESEMPENHO': _tendencia(desempenho, 'DESEMPENHO_MEDIO'),
+        })
+
+        por_escola_ama = alfabetizacao.groupby('INEP', sort=False)
+        inicial_ama, final_ama = _extremos(alfabetizacao, 'PERCENTUAL ALFABETIZAÇÃO')
+        tabela_alfabetizacao = pd.DataFrame({
+            'EDICOES_ALFABETIZACAO': por_escola_ama['EDIÇÃO'].agg(tuple),
+            'SERIE_ALFABETIZACAO': por_escola_ama['PERCENTUAL ALFABETIZAÇÃO'].agg(tuple),
+            'ALFABETIZACAO_INICIAL': inicial_ama,
+            'ALFABETIZACAO_FINAL': final_ama,
+            'TENDENCIA_ALFABETIZACAO': _tendencia(alfabetizacao, 'PERCENTUAL ALFABETIZAÇÃO'),
+        })
+
+        # Nome e região de cada INEP (a escola só da AMA fica sem região)
+        identificacao = pd.concat([
+            df_dados[['INEP', 'ESCOLA', 'REGIAO']].astype(str).drop_duplicates('INEP'),
+            df_ama[['INEP', 'ESCOLA']].astype(str).drop_duplicates('INEP'),
+        ]).drop_duplicates('INEP').set_index('INEP')
+
+        tabela = identificacao.join(tabela_desempenho).join(tabela_alfabetizacao)
+        for coluna in SERIES:
+            # Escolas sem uma das séries ficam com a tupla vazia, não NaN
+            tabela[coluna] = tabela[coluna].map(lambda serie: serie if isinstance(serie, tuple) else ())
+        por_regiao = tabela.groupby('REGIAO')['DESEMPENHO_FINAL']
+        tabela['POSICAO_REGIAO'] = por_regiao.rank(ascending=False, method='min').astype('Int64')
+        tabela['ESCOLAS_REGIAO'] = por_regiao.transform('count').astype('Int64')
+        self.tabela = tabela.sort_index()
+        self._inep_por_escola = (
+            identificacao.reset_index().drop_duplicates('ESCOLA', keep=False).set_index('ESCOLA')['INEP']
+        )
+
+    def inep(self, **filtro_escola):
+        """INEP da escola de `filtro_escola` ({'INEP': ...} ou {'ESCOLA': ...}), ou None.
+
+        Sem filtro (a rede toda), com INEP desconhecido ou com um nome que não
+        identifica uma única escola, o retorno é None.
+        """
+        if 'INEP' in filtro_escola:
+            inep = str(filtro_escola['INEP'])
+            return inep if inep in self.tabela.index else None
+        if 'ESCOLA' in filtro_escola:
+            return self._inep_por_escola.get(str(filtro_escola['ESCOLA']))
+        return None
+
+    def periodos(self, inep):
+        """{edição: 'CICLO 1'/'CICLO 2'} da escola, como `calculos.periodos_por_edicao`."""
+        linha = self.tabela.loc[inep]
+        return dict(zip(linha['EDICOES_DESEMPENHO'], linha['CICLOS']))
+
+    def serie_alfabetizacao(self, inep):
+        """EDIÇÃO e PERCENTUAL ALFABETIZAÇÃO da escola em ordem de edição, para os gráficos."""
+        linha = self.tabela.loc[inep]
+        return pd.DataFrame({
+            'EDIÇÃO': np.array(linha['EDICOES_ALFABETIZACAO'], dtype='int32'),
+            'PERCENTUAL ALFABETIZAÇÃO': np.array(linha['SERIE_ALFABETIZACAO'], dtype=float),
+        })
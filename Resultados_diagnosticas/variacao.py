@@ -0,0 +1,149 @@
+"""Tabela de variação entre ciclos (edição .2 contra a .1 do mesmo ano).
+
+Substitui os laços aninhados ESCOLA × ETAPA × COMP_CURRICULAR × EDIÇÃO do
+dashboard por um único groupby/pivot sobre (ANO, SEMESTRE), extraídos da chave
+numérica da EDIÇÃO. A tabela é calculada uma vez para toda a rede; os filtros
+da aba apenas a recortam.
+"""
+import numpy as np
+import pandas as pd
+
+import esquema
+
+# Colunas que identificam uma linha da tabela de variação
+CHAVES = ['INEP', 'ESCOLA', 'ETAPA', 'COMP_CURRICULAR']
+
+# Ordem de exibição da tabela
+ORDEM = ['ESCOLA', 'ETAPA', 'COMP_CURRICULAR', 'ANO', 'INEP']
+
+# Colunas internas (identificação e atualização incremental), fora da tabela
+# exibida e exportada
+COLUNAS_INTERNAS = ['INEP', 'ANO']
+
+# Colunas numéricas exibidas com ▲/▼ e cor, com o sufixo de cada uma: a
+# variação .2 contra .1 do mesmo ano e a diferença entre as médias dos ciclos
+# da comparação de escolas (calculos.comparar_escolas)
+COLUNAS_VARIACAO = {
+    'Diferença de Pontos': '', 'Variação Percentual': '%',
+    'Diferença entre Ciclos': '', 'Variação entre Ciclos': '%',
+}
+
+
+def separar_edicao(edicao):
+    """Separa a chave da EDIÇÃO (20242, ver esquema.py) nas colunas ANO e SEMESTRE."""
+    edicao = pd.Series(edicao)
+    return pd.DataFrame({'ANO': esquema.ano(edicao), 'SEMESTRE': esquema.semestre(edicao)}, index=edicao.index)
+
+
+def calcular_variacoes(df):
+    """Calcula, para cada escola/etapa/componente/ano com edição .2, a diferença
+    de pontos e a variação percentual em relação à edição .1 do mesmo ano.
+
+    Quando a edição .1 não existe, a linha é mantida com 'N/A' e valores nulos.
+    A coluna ANO identifica o ano comparado (usada na atualização incremental).
+    """
+    colunas = CHAVES + ['Períodos Comparados', 'Diferença de Pontos', 'Variação Percentual', 'ANO']
+    base = pd.concat([df[CHAVES + ['DESEMPENHO_MEDIO']], separar_edicao(df['EDIÇÃO'])], axis=1)
+    base = base[base['SEMESTRE'].isin([1, 2])]
+    if base.empty:
+        return pd.DataFrame(columns=colunas)
+
+    # Média por semestre, com os semestres lado a lado
+    medias = (
+        base.groupby(CHAVES + ['ANO', 'SEMESTRE'], observed=True)['DESEMPENHO_MEDIO']
+        .mean()
+        .unstack('SEMESTRE')
+        .reindex(columns=[1, 2])
+    )
+    medias = medias[medias[2].notna()]
+
+    ciclo_1 = medias[1]
+    ciclo_2 = medias[2]
+    dif_pontos = ciclo_2 - ciclo_1
+    percentual = np.where(ciclo_1 != 0, dif_pontos / ciclo_1 * 100, 0)
+    percentual = pd.Series(percentual, index=medias.index).where(ciclo_1.notna())
+
+    variacoes = medias.index.to_frame(index=False)
+    ano = variacoes['ANO'].astype(int).astype(str)
+    variacoes['Períodos Comparados'] = np.where(
+        ciclo_1.notna().to_numpy(), ano + '.2 - ' + ano + '.1', 'N/A'
+    )
+    variacoes['Diferença de Pontos'] = dif_pontos.to_numpy()
+    variacoes['Variação Percentual'] = percentual.to_numpy()
+    variacoes['ANO'] = variacoes['ANO'].astype(int)
+    return _ordenar(variacoes[colunas])
+
+
+def _ordenar(variacoes):
+    return variacoes.sort_values(ORDEM, ignore_index=True)
+
+
+def atualizar_variacoes(variacoes, df, edicoes):
+    """Refaz só os anos das `edicoes` alteradas, a partir da tabela completa `df`.
+
+    As linhas dos demais anos são mantidas como estão; o resultado é igual ao
+    de `calcular_variacoes(df)`.
+    """
+    anos = set(esquema.ano(pd.Series(sorted(edicoes), dtype='int64')).tolist())
+    if not anos:
+        return variacoes
+    novas = calcular_variacoes(df[separar_edicao(df['EDIÇÃO'])['ANO'].isin(anos)])
+    mantidas = variacoes[~variacoes['ANO'].isin(anos)]
+    combinadas = pd.concat([mantidas, novas], ignore_index=True)
+    # Volta às categorias da tabela de origem (o concat as transforma em object)
+    for coluna in CHAVES:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            combinadas[coluna] = combinadas[coluna].astype(df[coluna].dtype)
+    return _ordenar(combinadas)
+
+
+def posicoes_variacoes(variacoes, **filtros):
+    """Posições das linhas da tabela pré-calculada que atendem aos filtros.
+
+    Cada filtro é coluna=valor; filtros com valor None são ignorados.
+    """
+    mascara = np.ones(len(variacoes), dtype=bool)
+    for coluna, valor in filtros.items():
+        if valor is not None:
+            mascara &= (variacoes[coluna] == valor).to_numpy()
+    return np.flatnonzero(mascara)
+
+
+def filtrar_variacoes(variacoes, **filtros):
+    """Recorta a tabela pré-calculada conforme os filtros selecionados na aba."""
+    return variacoes.take(posicoes_variacoes(variacoes, **filtros))
+
+
+def para_tabela(variacoes):
+    """Variações sem as colunas internas, como a aba 1 exibe e exporta."""
+    return variacoes.drop(columns=COLUNAS_INTERNAS)
+
+
+def _sinais(valores):
+    numeros = np.asarray(valores, dtype=float)
+    return numeros, [numeros > 0, numeros < 0]
+
+
+def formatar_variacoes(variacoes):
+    """Cópia de `variacoes` com as colunas de variação em texto ('▲ 1.23', '▼ -0.50%', 'N/A').
+
+    Vetorizado sobre as colunas inteiras: usado só na página exibida e nos
+    relatórios, sem montar HTML por célula.
+    """
+    textos = {}
+    for coluna, sufixo in COLUNAS_VARIACAO.items():
+        if coluna in variacoes.columns:
+            numeros, sinais = _sinais(variacoes[coluna])
+            texto = np.char.add(np.select(sinais, ['▲ ', '▼ '], ''), np.char.mod('%.2f', numeros))
+            textos[coluna] = np.where(np.isnan(numeros), 'N/A', np.char.add(texto, sufixo))
+    return variacoes.assign(**textos)
+
+
+def cores_variacoes(variacoes):
+    """CSS de cor das colunas de variação: verde se subiu, vermelho se caiu, azul senão."""
+    colunas = [coluna for coluna in COLUNAS_VARIACAO if coluna in variacoes.columns]
+    return pd.DataFrame(
+        {coluna: np.select(_sinais(variacoes[coluna])[1], ['color: green', 'color: red'], 'color: blue') for coluna in colunas},
+        index=variacoes.index,
+        columns=colunas,
+    )